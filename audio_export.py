@@ -0,0 +1,312 @@
+import os
+import re
+import json
+import time
+import wave
+import struct
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, List
+
+from fingerprint import document_fingerprint
+from pdf_engine import DOC_TYPES, PDFEngine, extractor_signature
+from tts_engine import fix_years
+
+MANIFEST_NAME = "manifest.json"
+TIMING_NAME = "timing.json"
+
+
+class SynthesisBackend:
+    """Renders texts to one audio file, faster than real time.
+
+    synthesize() writes the texts back to back into out_path and returns the
+    duration of each one in seconds. It always creates out_path, as a valid
+    zero-length file when there are no texts. Backends are created per chunk,
+    one per export worker, so they need not be thread-safe.
+    """
+    name = "base"
+    extension = ".wav"
+
+    def cache_key(self) -> str:
+        """Identifies the backend and its settings in the export manifest."""
+        return self.name
+
+    def synthesize(self, texts: List[str], out_path: str, should_stop: Callable[[], bool] = None) -> List[float]:
+        raise NotImplementedError
+
+
+class AVSynthesisBackend(SynthesisBackend):
+    """macOS AVSpeechSynthesizer.writeUtterance, appending each PCM buffer to a CAF file."""
+    name = "avspeech"
+    extension = ".caf"
+
+    def __init__(self, voice_id: str = None, rate: float = 0.5, timeout: float = 300.0):
+        self.voice_id = voice_id
+        self.rate = rate
+        self.timeout = timeout
+
+    def cache_key(self) -> str:
+        return f"{self.name}:{self.voice_id}:{self.rate:.3f}"
+
+    def synthesize(self, texts: List[str], out_path: str, should_stop: Callable[[], bool] = None) -> List[float]:
+        from AVFoundation import (AVSpeechSynthesizer, AVSpeechUtterance, AVSpeechSynthesisVoice, AVAudioFile,
+                                  AVAudioFormat)
+        from Foundation import NSURL
+
+        synth = AVSpeechSynthesizer.alloc().init()
+        voice = AVSpeechSynthesisVoice.voiceWithIdentifier_(self.voice_id) if self.voice_id else None
+        state = {"file": None}
+
+        def open_file(fmt):
+            url = NSURL.fileURLWithPath_(out_path)
+            state["file"], error = AVAudioFile.alloc().initForWriting_settings_commonFormat_interleaved_error_(
+                url, fmt.settings(), fmt.commonFormat(), fmt.isInterleaved(), None)
+            if state["file"] is None:
+                raise IOError(f"Cannot write {out_path}: {error}")
+        durations = []
+        for text in texts:
+            if should_stop and should_stop():
+                raise InterruptedError("Export stopped")
+            utterance = AVSpeechUtterance.speechUtteranceWithString_(text)
+            if voice:
+                utterance.setVoice_(voice)
+            utterance.setRate_(self.rate)
+            done = threading.Event()
+            frames = [0, 1.0]
+
+            def on_buffer(buffer):
+                # An empty buffer marks the end of the utterance
+                if buffer.frameLength() == 0:
+                    done.set()
+                    return
+                fmt = buffer.format()
+                if state["file"] is None:
+                    open_file(fmt)
+                state["file"].writeFromBuffer_error_(buffer, None)
+                frames[0] += buffer.frameLength()
+                frames[1] = fmt.sampleRate()
+
+            synth.writeUtterance_toBufferCallback_(utterance, on_buffer)
+            if not done.wait(self.timeout):
+                raise TimeoutError(f"Synthesis timed out after {self.timeout:.0f}s")
+            durations.append(frames[0] / frames[1])
+        if state["file"] is None:
+            # No text (or only silent utterances): an empty file, so the chunk can still be renamed into place
+            open_file(AVAudioFormat.alloc().initStandardFormatWithSampleRate_channels_(22050.0, 1))
+        # Closing the file flushes its header
+        state["file"] = None
+        return durations
+
+
+class StubSynthesisBackend(SynthesisBackend):
+    """Deterministic backend for Linux and tests: a short tone per word, silence between.
+
+    `compute_per_word` simulates synthesis cost (seconds of wall time per word).
+    """
+    name = "stub"
+
+    def __init__(self, words_per_minute: float = 180, sample_rate: int = 16000, compute_per_word: float = 0.0):
+        self.words_per_minute = words_per_minute
+        self.sample_rate = sample_rate
+        self.compute_per_word = compute_per_word
+
+    def cache_key(self) -> str:
+        return f"{self.name}:{self.words_per_minute}:{self.sample_rate}"
+
+    def synthesize(self, texts: List[str], out_path: str, should_stop: Callable[[], bool] = None) -> List[float]:
+        word_frames = int(self.sample_rate * 60 / self.words_per_minute)
+        tone = struct.pack(f"<{word_frames // 2}h", *([6000, -6000] * (word_frames // 4)))
+        gap = b"\0\0" * (word_frames - word_frames // 2)
+        durations = []
+        with wave.open(out_path, "wb") as out:
+            out.setnchannels(1)
+            out.setsampwidth(2)
+            out.setframerate(self.sample_rate)
+            for text in texts:
+                if should_stop and should_stop():
+                    raise InterruptedError("Export stopped")
+                words = len(text.split())
+                if self.compute_per_word:
+                    time.sleep(self.compute_per_word * words)
+                out.writeframes((tone + gap) * words)
+                durations.append(words * word_frames / self.sample_rate)
+        return durations
+
+
+def plan_chunks(engine: PDFEngine, pages_per_chunk: int = None) -> List[dict]:
+    """Splits a document into export chunks: {"title", "first", "last"} with 1-based pages.
+
+    Without pages_per_chunk, top-level outline entries become chapters (pages
+    before the first one form a "Front matter" chunk); documents without an
+    outline fall back to runs of 20 pages.
+    """
+    total = engine.total_pages
+    if not pages_per_chunk:
+        starts = {}
+        for level, title, page in engine.doc.get_toc():
+            if level == 1 and 1 <= page <= total and page not in starts:
+                starts[page] = title.strip() or f"Chapter {len(starts) + 1}"
+        if starts:
+            pages = sorted(starts)
+            if pages[0] > 1:
+                starts[1] = "Front matter"
+                pages.insert(0, 1)
+            return [{"title": starts[p], "first": p, "last": (pages[i + 1] - 1 if i + 1 < len(pages) else total)}
+                    for i, p in enumerate(pages)]
+        pages_per_chunk = 20
+    return [{"title": f"Pages {p}-{min(p + pages_per_chunk - 1, total)}", "first": p,
+             "last": min(p + pages_per_chunk - 1, total)} for p in range(1, total + 1, pages_per_chunk)]
+
+
+def _safe_name(title: str) -> str:
+    return re.sub(r"[^\w\- ]+", "", title).strip()[:60] or "chunk"
+
+
+class AudioExporter:
+    """Exports a PDF to audio files, one per chapter or per N pages.
+
+    Chunks are synthesized concurrently, each by its own backend instance and
+    PDFEngine; pass the app's OCRPipeline as `ocr` so scanned pages are read
+    and cached the same way as in the reader. A finished chunk is renamed into place and recorded in
+    manifest.json, so re-running an interrupted export only synthesizes the
+    chunks that are missing; changing the document, doc_type, chunking,
+    OCR or backend settings starts over. timing.json maps audio offsets back to the
+    page and block they came from:
+        {"chunks": [{"file", "title", "duration", "segments": [[start, end, page, block], ...]}]}
+    """
+
+    def __init__(self, file_path: str, out_dir: str, backend_factory: Callable[[], SynthesisBackend],
+                 doc_type: str = "Book", pages_per_chunk: int = None, workers: int = 3, cache=None, ocr=None):
+        self.file_path = file_path
+        self.out_dir = out_dir
+        self.backend_factory = backend_factory
+        self.doc_type = doc_type
+        self.pages_per_chunk = pages_per_chunk
+        self.workers = max(1, workers)
+        self.cache = cache
+        self.ocr = ocr
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+
+    def stop(self):
+        self._stop.set()
+
+    def run(self, on_progress: Callable[[int, int], None] = None) -> dict:
+        """Exports every missing chunk and returns the timing map; raises InterruptedError if stopped."""
+        os.makedirs(self.out_dir, exist_ok=True)
+        engine = PDFEngine(self.file_path, cache=self.cache)
+        if not engine.open():
+            raise ValueError(f"Cannot open {self.file_path}")
+        try:
+            chunks = plan_chunks(engine, self.pages_per_chunk)
+            # One header/footer pass for the whole document, shared by every chunk's engine
+            layout = engine.layout_profile()
+        finally:
+            engine.close()
+
+        probe = self.backend_factory()
+        settings = {"fingerprint": document_fingerprint(self.file_path), "doc_type": self.doc_type,
+                    "extractor": extractor_signature(ocr=self.ocr), "chunks": [[c["first"], c["last"]] for c in chunks], "backend": probe.cache_key()}
+        manifest = self._load_manifest()
+        if manifest.get("settings") != settings:
+            manifest = {"settings": settings, "chunks": {}}
+        done = manifest["chunks"]
+        for i, chunk in enumerate(chunks):
+            chunk["file"] = f"{i + 1:03d} {_safe_name(chunk['title'])}{probe.extension}"
+        pending = [c for c in chunks if c["file"] not in done or not os.path.exists(os.path.join(self.out_dir, c["file"]))]
+
+        completed = [len(chunks) - len(pending)]
+        if on_progress:
+            on_progress(completed[0], len(chunks))
+
+        def export(chunk):
+            entry = self._export_chunk(chunk, layout)
+            with self._lock:
+                done[chunk["file"]] = entry
+                self._write_json(MANIFEST_NAME, manifest)
+                completed[0] += 1
+                count = completed[0]
+            if on_progress:
+                on_progress(count, len(chunks))
+
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            futures = [pool.submit(export, c) for c in pending]
+            errors = []
+            for future in futures:
+                try:
+                    future.result()
+                except Exception as e:
+                    errors.append(e)
+                    self._stop.set()
+        if errors:
+            raise errors[0]
+
+        timing = {"source": os.path.basename(self.file_path),
+                  "chunks": [dict(done[c["file"]], file=c["file"]) for c in chunks]}
+        self._write_json(TIMING_NAME, timing)
+        return timing
+
+    def _export_chunk(self, chunk: dict, layout=None) -> dict:
+        engine = PDFEngine(self.file_path, cache=self.cache, ocr=self.ocr)
+        if not engine.open():
+            raise ValueError(f"Cannot open {self.file_path}")
+        engine.layout = layout
+        try:
+            units = []
+            for page_num in range(chunk["first"], chunk["last"] + 1):
+                if self._stop.is_set():
+                    raise InterruptedError("Export stopped")
+                for block_index, block in enumerate(engine.get_page_data(page_num, doc_type=self.doc_type)):
+                    units.append((fix_years(block["text"]), page_num, block_index))
+        finally:
+            engine.close()
+
+        backend = self.backend_factory()
+        stem, ext = os.path.splitext(chunk["file"])
+        part = os.path.join(self.out_dir, f"{stem}.part{ext}")
+        try:
+            durations = backend.synthesize([u[0] for u in units], part, should_stop=self._stop.is_set)
+            os.replace(part, os.path.join(self.out_dir, chunk["file"]))
+        finally:
+            if os.path.exists(part):
+                os.remove(part)
+
+        segments, offset = [], 0.0
+        for (_, page_num, block_index), duration in zip(units, durations):
+            segments.append([round(offset, 3), round(offset + duration, 3), page_num, block_index])
+            offset += duration
+        return {"title": chunk["title"], "first": chunk["first"], "last": chunk["last"],
+                "duration": round(offset, 3), "segments": segments}
+
+    def _load_manifest(self) -> dict:
+        try:
+            with open(os.path.join(self.out_dir, MANIFEST_NAME), "r") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _write_json(self, name: str, data):
+        path = os.path.join(self.out_dir, name)
+        with open(path + ".tmp", "w") as f:
+            json.dump(data, f)
+        os.replace(path + ".tmp", path)
+
+
+if __name__ == "__main__":
+    import sys
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Export a PDF to audio files.")
+    parser.add_argument("pdf")
+    parser.add_argument("out_dir")
+    parser.add_argument("--doc-type", default="Book", choices=DOC_TYPES)
+    parser.add_argument("--pages-per-chunk", type=int, default=None, help="Default: one file per chapter")
+    parser.add_argument("--workers", type=int, default=3)
+    parser.add_argument("--stub", action="store_true", help="Use the stub WAV backend instead of AVSpeechSynthesizer")
+    args = parser.parse_args()
+
+    factory = StubSynthesisBackend if args.stub or sys.platform != "darwin" else AVSynthesisBackend
+    exporter = AudioExporter(args.pdf, args.out_dir, factory, doc_type=args.doc_type,
+                             pages_per_chunk=args.pages_per_chunk, workers=args.workers)
+    result = exporter.run(on_progress=lambda done, total: print(f"{done}/{total} chunks"))
+    print(f"Wrote {len(result['chunks'])} files, {sum(c['duration'] for c in result['chunks']) / 60:.1f} min of audio")
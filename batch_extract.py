@@ -0,0 +1,255 @@
+"""Headless batch extraction: runs PDFEngine.get_page_data over many PDFs.
+
+    python batch_extract.py ~/Archive --doc-type Research -o archive.jsonl
+    python batch_extract.py a.pdf b.pdf --format text -o - --workers 4
+    python batch_extract.py ~/Archive --text-only -o new.jsonl --compare old.jsonl
+
+Page ranges run on a process pool and are written in input order with a
+bounded number in flight, so memory stays flat however large the archive.
+Timing and failures go to stderr. --compare reports pages whose text differs
+from an earlier JSONL run and exits with status 1, for checking changes to the
+extraction heuristics.
+"""
+import os
+import sys
+import json
+import time
+import hashlib
+import argparse
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Iterable, List
+
+import fitz  # PyMuPDF
+
+from pdf_engine import DOC_TYPES, OPEN_MODES, extract_page_range
+from layout_profile import build_layout_profile
+
+
+def iter_pdfs(inputs: Iterable[str]) -> Iterable[str]:
+    """Expands files and directories (recursively, sorted) into PDF paths."""
+    for item in inputs:
+        if os.path.isdir(item):
+            for root, dirs, files in os.walk(item):
+                dirs.sort()
+                for name in sorted(files):
+                    if name.lower().endswith(".pdf"):
+                        yield os.path.join(root, name)
+        else:
+            yield item
+
+
+def _extract_task(file_path: str, doc_type: str, first: int, last: int, layout: dict = None, mode: str = "file"):
+    """Process-pool task: extracts a page range and times it."""
+    start = time.perf_counter()
+    pages = extract_page_range(file_path, doc_type, first, last, layout, mode)
+    return pages, time.perf_counter() - start
+
+
+def _profile_task(file_path: str):
+    """Process-pool task: page count and layout profile of a file, built once for all its page ranges."""
+    with fitz.open(file_path) as doc:
+        return len(doc), build_layout_profile(doc).to_dict()
+
+
+def _page_digest(blocks: List[dict]) -> str:
+    return hashlib.sha1("\x1e".join(b["text"] for b in blocks).encode("utf-8")).hexdigest()
+
+
+class BatchStats:
+    """Per-file and overall counters for one batch run."""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.files = {}
+        self.pages = 0
+        self.blocks = 0
+        self.changed = []
+        self.compared = 0
+        self.seen = set()
+
+    def file(self, path: str) -> dict:
+        if path not in self.files:
+            self.files[path] = {"pages": 0, "blocks": 0, "seconds": 0.0, "cpu_seconds": 0.0,
+                                "started": time.perf_counter(), "errors": []}
+        return self.files[path]
+
+    def elapsed(self) -> float:
+        return time.perf_counter() - self.started
+
+    def failures(self) -> List[tuple]:
+        return [(path, err) for path, f in self.files.items() for err in f["errors"]]
+
+    def to_dict(self) -> dict:
+        elapsed = self.elapsed()
+        return {
+            "pages": self.pages, "blocks": self.blocks, "seconds": round(elapsed, 3),
+            "pages_per_sec": round(self.pages / elapsed, 2) if elapsed else 0.0,
+            "files": {p: {k: (round(v, 3) if isinstance(v, float) else v) for k, v in f.items() if k != "started"}
+                      for p, f in self.files.items()},
+            "changed_pages": self.changed, "compared_pages": self.compared,
+        }
+
+
+class _Writer:
+    def __init__(self, out, fmt: str, text_only: bool, doc_type: str):
+        self.out = out
+        self.fmt = fmt
+        self.text_only = text_only
+        self.doc_type = doc_type
+
+    def page(self, path: str, page_num: int, blocks: List[dict]):
+        if self.fmt == "text":
+            self.out.write(f"# {path} - page {page_num}\n")
+            for block in blocks:
+                self.out.write(block["text"] + "\n\n")
+            return
+        if self.text_only:
+            blocks = [b["text"] for b in blocks]
+        record = {"file": path, "page": page_num, "doc_type": self.doc_type, "blocks": blocks}
+        self.out.write(json.dumps(record, ensure_ascii=False, separators=(",", ":")) + "\n")
+
+
+def load_baseline(path: str) -> dict:
+    """Reads a previous JSONL run into {(file, page): digest of its block texts}."""
+    baseline = {}
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            record = json.loads(line)
+            blocks = [b if isinstance(b, dict) else {"text": b} for b in record["blocks"]]
+            baseline[(record["file"], record["page"])] = _page_digest(blocks)
+    return baseline
+
+
+def run_batch(paths: Iterable[str], out, doc_type: str = "Book", fmt: str = "jsonl", text_only: bool = False,
+              workers: int = None, pages_per_task: int = 8, baseline: dict = None, progress=None,
+              open_mode: str = "file") -> BatchStats:
+    """Extracts every page of every PDF in paths and writes them to out in input order.
+
+    open_mode is how workers open each file (pdf_engine.OPEN_MODES); with "mmap"
+    the workers extracting one file share its pages in the OS page cache.
+    """
+    workers = workers or os.cpu_count() or 1
+    writer = _Writer(out, fmt, text_only, doc_type)
+    stats = BatchStats()
+
+    def consume(path, first, last, future):
+        entry = stats.file(path)
+        try:
+            pages, cpu = future.result()
+        except Exception as e:
+            entry["errors"].append(f"pages {first}-{last}: {e}")
+            return
+        entry["cpu_seconds"] += cpu
+        for page_num, blocks in pages:
+            writer.page(path, page_num, blocks)
+            entry["pages"] += 1
+            entry["blocks"] += len(blocks)
+            stats.pages += 1
+            stats.blocks += len(blocks)
+            if baseline is not None:
+                stats.compared += 1
+                stats.seen.add((path, page_num))
+                if baseline.get((path, page_num)) != _page_digest(blocks):
+                    stats.changed.append([path, page_num])
+        entry["seconds"] = time.perf_counter() - entry["started"]
+        if progress:
+            progress(stats)
+
+    paths = iter(paths)
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        # Layout passes run in the pool too, up to `workers` files ahead, so the next files'
+        # profiles are ready (or queued ahead of their ranges) by the time their turn comes
+        profiles = deque()
+        pending = deque()
+
+        def queue_profiles():
+            while len(profiles) < workers:
+                path = next(paths, None)
+                if path is None:
+                    return
+                stats.file(path)
+                profiles.append((path, pool.submit(_profile_task, path)))
+
+        queue_profiles()
+        while profiles:
+            path, future = profiles.popleft()
+            queue_profiles()
+            try:
+                total, layout = future.result()
+            except Exception as e:
+                stats.file(path)["errors"].append(f"open: {e}")
+                continue
+            for first in range(1, total + 1, pages_per_task):
+                last = min(first + pages_per_task - 1, total)
+                pending.append((path, first, last, pool.submit(_extract_task, path, doc_type, first, last, layout,
+                                                               open_mode)))
+                # Bounded look-ahead: results are written in order, so never let many finished ranges pile up
+                while len(pending) >= workers * 2:
+                    consume(*pending.popleft())
+        while pending:
+            consume(*pending.popleft())
+    return stats
+
+
+def main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(description="Extract the text blocks of many PDFs.")
+    parser.add_argument("inputs", nargs="+", help="PDF files and/or directories (searched recursively)")
+    parser.add_argument("--doc-type", default="Book", choices=DOC_TYPES)
+    parser.add_argument("-o", "--output", default="-", help="Output file, '-' for stdout")
+    parser.add_argument("--format", default="jsonl", choices=["jsonl", "text"])
+    parser.add_argument("--text-only", action="store_true", help="JSONL blocks as plain strings (no boxes)")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: CPU count)")
+    parser.add_argument("--pages-per-task", type=int, default=8)
+    parser.add_argument("--open-mode", default="file", choices=OPEN_MODES,
+                        help="How workers open each PDF: 'mmap' maps it once per worker instead of reading it")
+    parser.add_argument("--compare", metavar="BASELINE", help="Report pages whose text differs from a previous JSONL run")
+    parser.add_argument("--stats-json", metavar="PATH", help="Also write the run statistics as JSON")
+    parser.add_argument("-q", "--quiet", action="store_true", help="No progress line")
+    args = parser.parse_args(argv)
+
+    baseline = load_baseline(args.compare) if args.compare else None
+
+    def progress(stats):
+        sys.stderr.write(f"\r{stats.pages} pages, {stats.pages / max(stats.elapsed(), 1e-9):.1f} pages/s")
+        sys.stderr.flush()
+
+    out = sys.stdout if args.output == "-" else open(args.output, "w", encoding="utf-8")
+    try:
+        stats = run_batch(iter_pdfs(args.inputs), out, doc_type=args.doc_type, fmt=args.format,
+                          text_only=args.text_only, workers=args.workers, pages_per_task=args.pages_per_task,
+                          baseline=baseline, progress=None if args.quiet else progress, open_mode=args.open_mode)
+    finally:
+        if out is not sys.stdout:
+            out.close()
+
+    if not args.quiet:
+        sys.stderr.write("\n")
+    for path, f in stats.files.items():
+        rate = f["pages"] / f["seconds"] if f["seconds"] else 0.0
+        status = "FAILED" if f["errors"] else "ok"
+        sys.stderr.write(f"{status:6} {f['pages']:6d} pages {f['seconds']:8.2f}s {rate:8.1f} p/s  {path}\n")
+    for path, err in stats.failures():
+        sys.stderr.write(f"error: {path}: {err}\n")
+    summary = stats.to_dict()
+    sys.stderr.write(f"{summary['pages']} pages, {summary['blocks']} blocks from {len(stats.files)} files "
+                     f"in {summary['seconds']:.2f}s ({summary['pages_per_sec']:.1f} pages/s), "
+                     f"{len(stats.failures())} failures\n")
+    if baseline is not None:
+        missing = len(set(baseline) - stats.seen)
+        sys.stderr.write(f"compare: {len(stats.changed)} of {stats.compared} pages changed, {missing} baseline pages missing\n")
+        for path, page_num in stats.changed[:20]:
+            sys.stderr.write(f"  changed: {path} page {page_num}\n")
+    if args.stats_json:
+        with open(args.stats_json, "w") as f:
+            json.dump(summary, f, indent=2)
+
+    if stats.failures():
+        return 2
+    if baseline is not None and stats.changed:
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
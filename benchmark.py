@@ -0,0 +1,270 @@
+"""Benchmarks for the PDFEngine hot paths on a reproducible synthetic corpus.
+
+    python benchmark.py --quick -o before.json
+    python benchmark.py -o after.json --baseline before.json
+
+The corpus is generated once with fitz from a fixed seed (single and
+multi-column, dense and sparse, running heads/footers, image-only pages,
+10 to 2,000 pages) and reused from --corpus-dir. Opening is timed per open
+mode, warm and (on Linux) with the file evicted from the OS page cache.
+Every metric reports per-call milliseconds (mean, median, p95, min). With
+--baseline, medians are compared and anything slower by more than
+--threshold is flagged; the exit status is 1 when --fail-on-regression is
+given and something regressed.
+"""
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import platform
+import statistics
+from typing import Callable, List
+
+import fitz  # PyMuPDF
+
+from pdf_engine import OPEN_MODES, PDFEngine, page_text_layer
+from layout_profile import build_layout_profile
+from fingerprint import content_fingerprint
+
+BENCH_VERSION = 1
+ZOOMS = (1.0, 2.0, 4.0)
+DOC_TYPES = ("Book", "Research")
+
+_WORDS = ("the of and to in is that for it as with was on be by this are from at or an which have not but "
+          "were all can their has more one other been these some such also into computer differ- ent").split()
+
+# name: (pages, columns, paragraphs per column, words per paragraph, running heads, image-only pages)
+CORPUS = {
+    "single_dense_10": (10, 1, 14, 60, False, False),
+    "multi3_dense_50": (50, 3, 20, 48, True, False),
+    "single_sparse_200": (200, 1, 3, 30, False, False),
+    "headers_footers_100": (100, 1, 10, 60, True, False),
+    "image_only_20": (20, 0, 0, 0, False, True),
+    "large_2000": (2000, 1, 8, 50, True, False),
+}
+QUICK = ("single_dense_10", "multi3_dense_50", "headers_footers_100", "image_only_20")
+
+
+def make_pdf(path: str, pages: int, columns: int, paragraphs: int, words: int, running_heads: bool,
+             image_only: bool, seed: int = 1):
+    """Writes one deterministic synthetic PDF."""
+    rng = random.Random(seed)
+    doc = fitz.open()
+    if image_only:
+        pix = fitz.Pixmap(fitz.csRGB, fitz.IRect(0, 0, 850, 1100), False)
+        pix.set_rect(pix.irect, (235, 230, 220))
+        png = pix.tobytes("png")
+    for p in range(pages):
+        page = doc.new_page(width=612, height=792)
+        if image_only:
+            page.insert_image(page.rect, stream=png)
+            continue
+        if running_heads:
+            page.insert_text((72, 40), f"Synthetic Journal of Benchmarks - Vol. {p // 10 + 1}", fontsize=9)
+            page.insert_text((300, 770), str(p + 1), fontsize=9)
+        col_w = (612 - 144 - 10 * (columns - 1)) / columns
+        para_h = (792 - 160) / paragraphs
+        # Largest size at which a paragraph of ~5.5 chars per word should fill its box
+        font = min(10.0, 0.85 * (col_w * para_h / (words * 5.5 * 0.65)) ** 0.5)
+        for c in range(columns):
+            x0 = 72 + c * (col_w + 10)
+            for i in range(paragraphs):
+                y0 = 80 + i * para_h
+                text = " ".join(rng.choice(_WORDS) for _ in range(words)).capitalize() + "."
+                size = font
+                # insert_textbox writes nothing when the text overflows, so shrink until it fits
+                while page.insert_textbox(fitz.Rect(x0, y0, x0 + col_w, y0 + para_h - 2), text, fontsize=size) < 0:
+                    size *= 0.9
+    doc.save(path, garbage=3, deflate=True)
+    doc.close()
+
+
+def ensure_corpus(corpus_dir: str, names) -> dict:
+    os.makedirs(corpus_dir, exist_ok=True)
+    paths = {}
+    for name in names:
+        path = os.path.join(corpus_dir, f"{name}.v{BENCH_VERSION}.pdf")
+        if not os.path.exists(path):
+            start = time.perf_counter()
+            make_pdf(path + ".tmp", *CORPUS[name])
+            os.replace(path + ".tmp", path)
+            print(f"  generated {name} in {time.perf_counter() - start:.1f}s", file=sys.stderr)
+        paths[name] = path
+    return paths
+
+
+def summarize(samples: List[float]) -> dict:
+    ordered = sorted(samples)
+    ms = lambda s: round(s * 1000, 4)
+    return {"n": len(ordered), "mean_ms": ms(statistics.fmean(ordered)), "median_ms": ms(statistics.median(ordered)),
+            "p95_ms": ms(ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))]), "min_ms": ms(ordered[0])}
+
+
+def measure(fn: Callable, items, repeat: int = 1, setup: Callable = None) -> dict:
+    """Times fn(item) for every item, `repeat` times over; setup(item), if given, runs untimed before each call."""
+    samples = []
+    for _ in range(repeat):
+        for item in items:
+            if setup:
+                setup(item)
+            start = time.perf_counter()
+            fn(item)
+            samples.append(time.perf_counter() - start)
+    return summarize(samples)
+
+
+def evict(path: str) -> bool:
+    """Drops a file from the OS page cache so the next read comes from disk; False where unsupported."""
+    if not hasattr(os, "posix_fadvise"):
+        return False
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+        os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_DONTNEED)
+    finally:
+        os.close(fd)
+    return True
+
+
+def open_engine(path: str, mode: str) -> PDFEngine:
+    """Opens path in one of OPEN_MODES, or "bytes" (read into memory, then PDFEngine.from_bytes)."""
+    if mode == "bytes":
+        with open(path, "rb") as f:
+            engine = PDFEngine.from_bytes(f.read())
+    else:
+        engine = PDFEngine(path, mode=mode)
+    if not engine.open():
+        raise RuntimeError(f"Could not open {path} ({mode})")
+    return engine
+
+
+def bench_open(path: str, repeat: int) -> dict:
+    """Open plus first-page text per open mode, with the file in the OS page cache (warm) and evicted (cold).
+
+    Cold runs need posix_fadvise (Linux) and are skipped elsewhere.
+    """
+    results = {}
+    cold = evict(path)
+    for mode in OPEN_MODES + ("bytes",):
+        def run(_):
+            engine = open_engine(path, mode)
+            engine.doc[0].get_text()
+            engine.close()
+        results[f"open[{mode},warm]"] = measure(run, range(3), repeat)
+        if cold:
+            results[f"open[{mode},cold]"] = measure(run, range(3), repeat, setup=lambda _: evict(path))
+    return results
+
+
+def sample_pages(total: int, count: int) -> List[int]:
+    if total <= count:
+        return list(range(1, total + 1))
+    return sorted({1 + round(i * (total - 1) / (count - 1)) for i in range(count)})
+
+
+def bench_document(path: str, pages: int, repeat: int, render_pages: int) -> dict:
+    results = {}
+
+    def open_close(_):
+        engine = PDFEngine(path)
+        engine.open()
+        engine.close()
+    results["open"] = measure(open_close, range(3), repeat)
+    results.update(bench_open(path, repeat))
+    # Uncached hashing; FingerprintIndex skips it for files whose stat is unchanged
+    results["content_fingerprint"] = measure(lambda _: content_fingerprint(path), range(3), repeat)
+
+    engine = PDFEngine(path)
+    engine.open()
+    try:
+        page_nums = sample_pages(engine.total_pages, pages)
+        # The whole-document layout pass, timed separately from per-page extraction
+        results["layout_profile"] = measure(lambda _: build_layout_profile(engine.doc), range(1), repeat)
+        engine.layout_profile()
+        for doc_type in DOC_TYPES:
+            results[f"get_page_data[{doc_type}]"] = measure(lambda p: engine.get_page_data(p, doc_type), page_nums, repeat)
+
+        # Sub-stages on precomputed inputs, so each number isolates one step
+        layers = {p: page_text_layer(engine.doc[p - 1]) for p in page_nums}
+        bboxes = {p: [b["bbox"] for b in layers[p]["blocks"]] for p in page_nums}
+        results["_extract_word_boxes"] = measure(
+            lambda p: engine._extract_word_boxes(engine.doc[p - 1], bboxes[p], words=layers[p]["words"]), page_nums, repeat)
+        texts = [" ".join(span["text"] for line in b["lines"] for span in line["spans"])
+                 for p in page_nums for b in layers[p]["blocks"]]
+        if texts:
+            results["_clean_text"] = measure(engine._clean_text, texts, repeat)
+
+        for zoom in ZOOMS:
+            results[f"get_page_image[{zoom:g}x]"] = measure(
+                lambda p: engine.get_page_image(p, zoom), page_nums[:render_pages], repeat)
+    finally:
+        engine.close()
+    return results
+
+
+def compare(results: dict, baseline: dict, threshold: float) -> List[tuple]:
+    """Returns (key, old median, new median, ratio, regressed) for metrics in both runs."""
+    rows = []
+    for key, stats in results["results"].items():
+        old = baseline.get("results", {}).get(key)
+        if not old or not old["median_ms"]:
+            continue
+        ratio = stats["median_ms"] / old["median_ms"]
+        rows.append((key, old["median_ms"], stats["median_ms"], ratio, ratio > 1 + threshold))
+    return rows
+
+
+def main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark the PDFEngine hot paths.")
+    parser.add_argument("-o", "--output", help="Write results JSON here")
+    parser.add_argument("--baseline", help="Compare against a previous results JSON")
+    parser.add_argument("--threshold", type=float, default=0.10, help="Relative slowdown flagged as a regression")
+    parser.add_argument("--fail-on-regression", action="store_true")
+    parser.add_argument("--quick", action="store_true", help="Skip the large documents")
+    parser.add_argument("--only", nargs="*", choices=sorted(CORPUS), help="Run these corpus documents only")
+    parser.add_argument("--corpus-dir", default=os.path.join(os.path.expanduser("~/.audile_cache"), "bench"))
+    parser.add_argument("--pages", type=int, default=20, help="Pages sampled per document")
+    parser.add_argument("--render-pages", type=int, default=3, help="Pages rendered per zoom level")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args(argv)
+
+    names = args.only or (QUICK if args.quick else list(CORPUS))
+    paths = ensure_corpus(args.corpus_dir, names)
+    results = {"meta": {"bench_version": BENCH_VERSION, "python": platform.python_version(),
+                        "pymupdf": fitz.VersionBind, "platform": platform.platform(),
+                        "machine": platform.machine(), "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S")},
+               "results": {}}
+    for name in names:
+        start = time.perf_counter()
+        for metric, stats in bench_document(paths[name], args.pages, args.repeat, args.render_pages).items():
+            results["results"][f"{name}/{metric}"] = stats
+        print(f"  {name}: {time.perf_counter() - start:.1f}s", file=sys.stderr)
+
+    width = max(len(k) for k in results["results"])
+    for key, stats in results["results"].items():
+        print(f"{key:{width}}  median {stats['median_ms']:9.3f} ms  p95 {stats['p95_ms']:9.3f} ms  n={stats['n']}")
+
+    regressed = []
+    if args.baseline:
+        with open(args.baseline, "r") as f:
+            baseline = json.load(f)
+        rows = compare(results, baseline, args.threshold)
+        results["comparison"] = {key: {"baseline_ms": old, "median_ms": new, "ratio": round(ratio, 3), "regressed": bad}
+                                 for key, old, new, ratio, bad in rows}
+        print(f"\nvs {args.baseline} (threshold +{args.threshold:.0%}):")
+        for key, old, new, ratio, bad in rows:
+            flag = "REGRESSION" if bad else ("faster" if ratio < 1 - args.threshold else "")
+            print(f"{key:{width}}  {old:9.3f} -> {new:9.3f} ms  x{ratio:5.2f}  {flag}")
+        regressed = [row[0] for row in rows if row[4]]
+        print(f"{len(regressed)} regressions out of {len(rows)} compared metrics")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+    return 1 if regressed and args.fail_on_regression else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
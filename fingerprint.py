@@ -0,0 +1,144 @@
+import os
+import re
+import sqlite3
+import hashlib
+import threading
+
+from page_cache import CACHE_DIR
+from profiling import timed
+
+# Bump whenever the sampling or hashing changes; every document then gets a new identity
+FINGERPRINT_VERSION = 1
+# Bytes read per sample; files up to SAMPLES * CHUNK are hashed whole
+CHUNK = 64 * 1024
+SAMPLES = 10
+
+# First element of the trailer /ID: a hex or literal string that stays fixed across edits of the document
+_PDF_ID = re.compile(rb"/ID\s*\[\s*(<[0-9A-Fa-f\s]*>|\((?:\\.|[^\\)])*\))")
+
+
+def sample_offsets(size: int) -> list:
+    """Start offsets of the chunks hashed for a file of `size` bytes: head, tail and evenly spaced between."""
+    if size <= SAMPLES * CHUNK:
+        return list(range(0, size, CHUNK)) or [0]
+    step = (size - CHUNK) / (SAMPLES - 1)
+    return [round(i * step) for i in range(SAMPLES)]
+
+
+def pdf_document_id(data: bytes):
+    """The permanent /ID of a PDF found in a trailer (or xref stream) within `data`, else None."""
+    found = _PDF_ID.findall(data)
+    return found[-1] if found else None
+
+
+def _sampled_digest(size: int, read_chunk) -> str:
+    h = hashlib.sha1(f"{FINGERPRINT_VERSION}|{size}|".encode("utf-8"))
+    head = tail = b""
+    for offset in sample_offsets(size):
+        chunk = read_chunk(offset)
+        h.update(chunk)
+        if offset == 0:
+            head = chunk
+        tail = chunk
+    # The trailer sits at the end; linearized files repeat it in the first chunk
+    doc_id = pdf_document_id(tail) or pdf_document_id(head)
+    h.update(b"|" + (doc_id or b""))
+    return h.hexdigest()
+
+
+@timed("fingerprint.hash")
+def content_fingerprint(file_path: str) -> str:
+    """Identity of a PDF's content: its size, SAMPLES chunks of at most CHUNK bytes and its /ID.
+
+    Reads a bounded amount however large the file is. The path and mtime are
+    not part of it, so a moved, renamed or copied file keeps its identity.
+    """
+    with open(file_path, "rb") as f:
+        size = os.fstat(f.fileno()).st_size
+
+        def read_chunk(offset):
+            f.seek(offset)
+            return f.read(CHUNK)
+        return _sampled_digest(size, read_chunk)
+
+
+def buffer_fingerprint(data) -> str:
+    """content_fingerprint() of a document held in memory (bytes, mmap, memoryview)."""
+    with memoryview(data) as view:
+        return _sampled_digest(len(view), lambda offset: bytes(view[offset:offset + CHUNK]))
+
+
+class FingerprintIndex:
+    """Resolves paths to content fingerprints, hashing a file only when it changed.
+
+    Each resolved path is remembered with its size, mtime and inode, in memory
+    and in SQLite, so an unchanged file costs one stat() even across restarts.
+    Resolution may be called from any thread; the GUI only calls it from its
+    loader threads.
+    """
+
+    def __init__(self, db_path: str = None):
+        if db_path is None:
+            os.makedirs(CACHE_DIR, exist_ok=True)
+            db_path = os.path.join(CACHE_DIR, "fingerprints.db")
+        self.db_path = db_path
+        self._memory = {}
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        with self._conn:
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS files ("
+                " path TEXT PRIMARY KEY, size INTEGER, mtime_ns INTEGER, inode INTEGER, version INTEGER,"
+                " fingerprint TEXT)")
+
+    def resolve(self, file_path: str) -> str:
+        """The content fingerprint of a file; raises OSError if it cannot be read."""
+        path = os.path.realpath(file_path)
+        st = os.stat(path)
+        stamp = (st.st_size, st.st_mtime_ns, st.st_ino, FINGERPRINT_VERSION)
+        with self._lock:
+            known = self._memory.get(path)
+            if known is None:
+                row = self._conn.execute(
+                    "SELECT size, mtime_ns, inode, version, fingerprint FROM files WHERE path = ?", (path,)).fetchone()
+                known = (tuple(row[:4]), row[4]) if row else None
+            if known and known[0] == stamp:
+                self._memory[path] = known
+                return known[1]
+        fingerprint = content_fingerprint(path)
+        with self._lock:
+            self._memory[path] = (stamp, fingerprint)
+            try:
+                with self._conn:
+                    self._conn.execute(
+                        "INSERT OR REPLACE INTO files (path, size, mtime_ns, inode, version, fingerprint)"
+                        " VALUES (?, ?, ?, ?, ?, ?)", (path,) + stamp + (fingerprint,))
+            except sqlite3.Error as e:
+                print(f"Fingerprint store failed: {e}")
+        return fingerprint
+
+    def forget(self, file_path: str):
+        path = os.path.realpath(file_path)
+        with self._lock:
+            self._memory.pop(path, None)
+            with self._conn:
+                self._conn.execute("DELETE FROM files WHERE path = ?", (path,))
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+_default_index = None
+_default_lock = threading.Lock()
+
+
+def document_fingerprint(file_path: str, index: FingerprintIndex = None) -> str:
+    """Content fingerprint of a document, through the shared FingerprintIndex unless one is given."""
+    global _default_index
+    if index is None:
+        with _default_lock:
+            if _default_index is None:
+                _default_index = FingerprintIndex()
+            index = _default_index
+    return index.resolve(file_path)
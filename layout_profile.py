@@ -0,0 +1,140 @@
+import re
+import zlib
+import threading
+from typing import List
+
+import fitz  # PyMuPDF
+
+# Bump whenever signatures or detection rules change; part of the extractor signature
+LAYOUT_VERSION = 1
+
+# Furniture candidates: the outermost few lines within this fraction of the page height at each edge
+EDGE_FRACTION = 0.2
+EDGE_LINES = 3
+# Vertical position buckets per page height for line signatures
+BANDS = 100
+# A line counts as furniture once it recurs on MIN_RUN pages, each within MAX_GAP pages of the last,
+# so running heads (every page or every other page) match and a heading that happens to repeat does not
+MIN_RUN = 3
+MAX_GAP = 2
+
+_DIGITS = re.compile(r"\d+")
+_ROMAN_LINE = re.compile(r"[ivxlc]+")
+_PAGE_NUMBER = re.compile(r"(?:page\s+)?[-–—(\[]?\s*(\d{1,5})\s*[-–—)\]]?(?:\s+of\s+\d+)?", re.IGNORECASE)
+
+# Text only: image blocks would be decoded for nothing
+_TEXT_FLAGS = fitz.TEXTFLAGS_DICT & ~fitz.TEXT_PRESERVE_IMAGES
+
+_build_locks = {}
+_build_locks_lock = threading.Lock()
+
+
+def profile_lock(key: str) -> threading.Lock:
+    """One lock per document, so engines sharing a cache build its profile only once."""
+    with _build_locks_lock:
+        return _build_locks.setdefault(key, threading.Lock())
+
+
+def normalize_line(text: str) -> str:
+    """Lowercases and collapses whitespace; numbers (and lone roman numerals) become '#'."""
+    text = " ".join(text.lower().split())
+    if _ROMAN_LINE.fullmatch(text):
+        return "#"
+    return _DIGITS.sub("#", text)
+
+
+def line_signature(text: str, bbox, page_height: float, band_offset: int = 0) -> int:
+    """Hash of a line's normalized text and its vertical band on the page."""
+    band = int((bbox[1] + bbox[3]) / 2 / page_height * BANDS) + band_offset
+    return zlib.crc32(f"{band}|{normalize_line(text)}".encode("utf-8"))
+
+
+def page_number(text: str):
+    """The number printed by a page-number line ("12", "- 12 -", "Page 12 of 300"), else None."""
+    m = _PAGE_NUMBER.fullmatch(text.strip())
+    return int(m.group(1)) if m else None
+
+
+def edge_lines(lines: List[tuple], page_height: float) -> List[int]:
+    """Indices of the candidate furniture lines among (text, bbox) pairs."""
+    mids = [((bbox[1] + bbox[3]) / 2, i) for i, (text, bbox) in enumerate(lines) if text.strip()]
+    top = sorted(m for m in mids if m[0] < page_height * EDGE_FRACTION)[:EDGE_LINES]
+    bottom = sorted((m for m in mids if m[0] > page_height * (1 - EDGE_FRACTION)), reverse=True)[:EDGE_LINES]
+    return [i for _, i in top + bottom]
+
+
+def page_lines(page) -> List[tuple]:
+    """(text, bbox) of every text line, with spans joined the way extraction joins them."""
+    return [(" ".join(span["text"] for span in line["spans"]).strip(), line["bbox"])
+            for block in page.get_text("dict", flags=_TEXT_FLAGS)["blocks"] if "lines" in block
+            for line in block["lines"]]
+
+
+class LayoutProfile:
+    """Page furniture of one document: signatures of repeated edge lines and page-number offsets.
+
+    Built once per document by build_layout_profile() and stored with the
+    document fingerprint; furniture_lines() then classifies a page's lines
+    with set lookups only.
+    """
+
+    def __init__(self, signatures=(), page_offsets=(), pages: int = 0, text_pages: int = 0):
+        self.signatures = frozenset(signatures)
+        self.page_offsets = frozenset(page_offsets)
+        self.pages = pages
+        self.text_pages = text_pages
+
+    def furniture_lines(self, lines: List[tuple], page_height: float, page_num: int) -> set:
+        """Indices of the (text, bbox) lines that are running heads, footers or page numbers."""
+        found = set()
+        if not self.signatures and not self.page_offsets:
+            return found
+        for i in edge_lines(lines, page_height):
+            text, bbox = lines[i]
+            number = page_number(text)
+            if number is not None and number - page_num in self.page_offsets:
+                found.add(i)
+            # Neighbouring bands too, in case a line sits on a band boundary
+            elif any(line_signature(text, bbox, page_height, d) in self.signatures for d in (0, -1, 1)):
+                found.add(i)
+        return found
+
+    def to_dict(self) -> dict:
+        return {"version": LAYOUT_VERSION, "pages": self.pages, "text_pages": self.text_pages,
+                "signatures": sorted(self.signatures), "page_offsets": sorted(self.page_offsets)}
+
+    @classmethod
+    def from_dict(cls, data: dict):
+        return cls(data["signatures"], data["page_offsets"], data["pages"], data["text_pages"])
+
+
+def _bump(runs: dict, key, page_num: int):
+    # runs[key] = [last page, current run, longest run]
+    state = runs.get(key)
+    if state is None:
+        runs[key] = [page_num, 1, 1]
+    elif state[0] != page_num:
+        state[1] = state[1] + 1 if page_num - state[0] <= MAX_GAP else 1
+        state[2] = max(state[2], state[1])
+        state[0] = page_num
+
+
+def build_layout_profile(doc) -> LayoutProfile:
+    """Reads every page's edge lines once and keeps those that recur as page furniture."""
+    signatures, offsets = {}, {}
+    text_pages = 0
+    for index in range(len(doc)):
+        page = doc[index]
+        page_height = page.rect.height
+        lines = page_lines(page)
+        if lines:
+            text_pages += 1
+        for i in edge_lines(lines, page_height):
+            text, bbox = lines[i]
+            _bump(signatures, line_signature(text, bbox, page_height), index + 1)
+            number = page_number(text)
+            if number is not None:
+                _bump(offsets, number - (index + 1), index + 1)
+    return LayoutProfile([key for key, state in signatures.items() if state[2] >= MIN_RUN],
+                         [key for key, state in offsets.items() if state[2] >= MIN_RUN],
+                         pages=len(doc), text_pages=text_pages)
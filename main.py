@@ -1,23 +1,28 @@
 import os
-import json
+import time
 import tkinter as tk
 from tkinter import filedialog, messagebox
 import customtkinter as ctk
-from pdf_engine import PDFEngine
+from page_cache import PageCache
+from render_cache import RenderCache, quantize_zoom
+from state_store import StateStore
+from virtual_list import VirtualList
 from tts_engine import TTSEngine
+from playback import PlaybackController
+from profiling import PROFILER, timed
+import sqlite3
 import threading
+import multiprocessing
 import darkdetect
-import time
 import re
 from ctypes import c_void_p
 
-# High-Precision macOS Integration
-try:
-    from AppKit import NSView, NSVisualEffectView, NSVisualEffectBlendingModeBehindWindow, \
-                       NSVisualEffectMaterialSidebar, NSWindow, NSVisualEffectStateActive
-    import objc
-except ImportError:
-    pass
+# PyMuPDF (pdf_engine and everything built on it), AVFoundation and AppKit are
+# imported where they are first used, so the window can paint before they load.
+# See _finish_startup.
+
+# Startup reference point: the harness passes its launch time, otherwise module import
+_LAUNCHED = float(os.environ.get("AUDILE_STARTUP_T0") or time.time())
 
 class AudileApp(ctk.CTk):
     def __init__(self):
@@ -41,25 +46,67 @@ class AudileApp(ctk.CTk):
         
         # Initialize engines
         self.pdf_engine = None
-        self.tts_engine = TTSEngine()
+        self.prefetcher = None
+        self.exporter, self._export_thread = None, None  # The running AudioExporter, if any
+        self.tts_engine = TTSEngine()  # The speech backend is created on first use
+        self.playback = PlaybackController(self.tts_engine, get_blocks=self._blocks_for_page,
+                                           total_pages=lambda: self.pdf_engine.total_pages,
+                                           post=lambda fn: self.after(0, fn))
+        self.playback.on_sentence = self._on_playback_sentence
+        self.playback.on_word = self._on_playback_word
+        self.playback.on_finished = self._on_playback_finished
+        # Opened in the background after the first paint; see _finish_startup
+        self.ocr_pipeline = None
+        self.page_cache = None
+        self.search_index, self.search_indexer = None, None
+        self._services_ready = threading.Event()
+        self._startup_times = {"imports": time.time() - _LAUNCHED}
+        self.voice_catalog = None  # VoiceCatalog, loaded in the background at startup
+        self.voices = []  # Voices in the menu, in menu order
+        self._restore_pdf = None  # Last document, reopened once the services are up
         
         # Application State
-        self.config_file = os.path.expanduser("~/.audile_config.json")
+        self.config_file = os.path.expanduser("~/.audile_config.json")  # Legacy config, migrated on first launch
+        try:
+            self.state = StateStore()
+            self._state_error = None
+        except sqlite3.Error as e:
+            # A locked or corrupt store must not stop the app; this session's state is kept in memory only
+            print(f"Opening saved state failed: {e}")
+            self.state = StateStore(":memory:")
+            self._state_error = e
         self.current_pdf_path = None
+        self.current_doc_id = None  # Content fingerprint of the open document; its library/bookmark key
         self.current_page_blocks = []
         self.current_page_num = 1
         self.current_block_index = 0
+        self.current_sentence_index = 0
+        self.current_sentence = None  # Sentence being spoken, as returned by block_sentences
         self.is_playing = False
         self.is_loading = False
         self.current_page_rendered = -1
         self.zoom_factor = 1.0
         self.manual_zoom = False  # Track if user has manually zoomed
         self.current_tk_img = None
+        self.prefetch_depth = 2  # Pages extracted and rendered ahead of the reader
+        self.ocr_ahead = 4  # Pages recognized ahead of the reader once a scanned page is met
+        self.render_cache_mb = 256  # Memory budget for rendered pages of the open document
+        self.grayscale_text_pages = False  # Render image-free pages in grayscale to save memory
+        self.open_mode = "file"  # "mmap" reads documents through a memory map (pdf_engine.OPEN_MODES)
+        self.tile_size = 512
+        self.tiles_per_pass = 2  # Tiles rasterized per Tk callback; the rest follow, so scrolling stays responsive
+        self.tile_threshold_px = 4_000_000  # Pages larger than this are rendered as viewport tiles
+        self.page_tiles = None
+        self._tile_update_pending = False
+        self._render_token = 0  # Identifies the latest full-resolution render request
+        self.search_hit_boxes = []  # Word boxes of the search hit shown on the current page
+        self._pending_hit = None  # Search hit to show once its document finishes loading
         
         # Persistence State
         self.hidden_voice_ids = set()
-        self.bookmarks = {} 
-        self.library = {} 
+        self.bookmarks = {}  # doc_id -> bookmarks
+        self.library = {}  # doc_id -> {"path", "title", "doc_type", "page"}; see StateStore
+        self.missing_docs = set()  # Library documents whose file the background check found missing
         
         # UI Construction
         self._setup_ui()
@@ -69,10 +116,81 @@ class AudileApp(ctk.CTk):
         self.bind("<space>", lambda e: self._toggle_play())
         self.bind("<Left>", lambda e: self._prev_page())
         self.bind("<Right>", lambda e: self._next_page())
+        self.bind("<Up>", lambda e: self.playback.skip(-1))
+        self.bind("<Down>", lambda e: self.playback.skip(1))
+        modifier = "Command" if self.tk.call("tk", "windowingsystem") == "aqua" else "Control"
+        self.bind(f"<{modifier}-Shift-P>", lambda e: self._dump_profile())
+        self.protocol("WM_DELETE_WINDOW", self._on_close)
+        self.after_idle(self._finish_startup)
+
+    def _finish_startup(self):
+        """Runs once the window is up: heavy imports, caches and voices load off the Tk thread."""
+        self.update_idletasks()
+        self._startup_times["first_paint"] = time.time() - _LAUNCHED
+        PROFILER.record("startup.first_paint", self._startup_times["first_paint"])
+        threading.Thread(target=self._load_services, daemon=True).start()
+        if self._state_error:
+            messagebox.showwarning("Audile", f"Your library could not be opened ({self._state_error}). "
+                                             "Changes made now will not be saved.")
+
+    def _load_services(self):
+        from ocr import OCRPipeline, TesseractBackend
+        try:
+            self.ocr_pipeline = OCRPipeline(TesseractBackend())
+            self.page_cache = self._open_page_cache()
+            self.ocr_pipeline.cache = self.page_cache
+            self.search_index, self.search_indexer = self._open_search_index()
+        finally:
+            self._services_ready.set()
+        self.tts_engine.preload()
+        self.after(0, self._on_services_ready)
+
+    def _load_voices(self):
+        try:
+            catalog = self.tts_engine.voice_catalog()
+        except Exception as e:
+            print(f"Voice enumeration failed: {e}")
+            catalog = None
+        self.after(0, lambda: self._on_voices_loaded(catalog))
+
+    def _on_services_ready(self):
+        self._startup_times["services"] = time.time() - _LAUNCHED
+        PROFILER.record("startup.services", self._startup_times["services"])
+        # The synthesizer is created here on the Tk thread; listing voices is slow, so that is not
+        try:
+            self.tts_engine.backend
+        except Exception as e:
+            print(f"Speech unavailable: {e}")
+        threading.Thread(target=self._load_voices, daemon=True).start()
+        if self.search_indexer:
+            for info in self.library.values():
+                self.search_indexer.enqueue(info["path"], info.get("doc_type", "Book"))
+        if self._restore_pdf and not self.current_pdf_path:
+            self._load_pdf(self._restore_pdf)
+        self._report_startup()
+
+    def _on_voices_loaded(self, catalog):
+        self._startup_times["voices"] = time.time() - _LAUNCHED
+        PROFILER.record("startup.voices", self._startup_times["voices"])
+        self.voice_catalog = catalog
+        self._refresh_voice_list()
+        self._report_startup()
+
+    def _report_startup(self):
+        """With AUDILE_STARTUP_REPORT set (see startup_timing.py), prints the milestones and quits."""
+        if not os.environ.get("AUDILE_STARTUP_REPORT") or not {"services", "voices"} <= set(self._startup_times):
+            return
+        if self._restore_pdf and "document" not in self._startup_times:
+            return
+        print("AUDILE_STARTUP " + " ".join(f"{k}={v:.4f}" for k, v in self._startup_times.items()), flush=True)
+        self.after(0, self._on_close)
 
     def _apply_native_vibrancy(self):
         """Uses PyObjC to inject a native macOS blur view behind the window."""
         try:
+            from AppKit import NSVisualEffectView, NSVisualEffectBlendingModeBehindWindow, \
+                               NSVisualEffectMaterialSidebar, NSVisualEffectStateActive
+            import objc
             self.update()
             view_id = self.winfo_id()
             ns_view = objc.objc_object(c_void_p=view_id)
@@ -93,6 +211,27 @@ class AudileApp(ctk.CTk):
         except Exception as e:
             print(f"Native vibrancy skipped: {e}")
 
+    def _open_page_cache(self):
+        """Opens the shared extracted-page cache, dropping rows from older extractors."""
+        from pdf_engine import extractor_signature
+        try:
+            cache = PageCache()
+            cache.prune_versions(extractor_signature(ocr=self.ocr_pipeline))
+            return cache
+        except Exception as e:
+            print(f"Page cache disabled: {e}")
+            return None
+
+    def _open_search_index(self):
+        """Opens the library search index and its background indexer."""
+        from search_index import SearchIndex, SearchIndexer
+        try:
+            index = SearchIndex()
+            return index, SearchIndexer(index, cache=self.page_cache, ocr=self.ocr_pipeline)
+        except Exception as e:
+            print(f"Library search disabled: {e}")
+            return None, None
+
     def _setup_ui(self):
         # Appearance - Default to System but allow the user's OS to dictate
         ctk.set_appearance_mode("system")
@@ -137,9 +276,17 @@ class AudileApp(ctk.CTk):
                                          fg_color=self.CLR_ACCENT, hover_color=self.CLR_ACCENT_ALT,
                                          font=ctk.CTkFont(weight="bold"), command=self._open_file)
         self.lib_add_btn.pack(padx=10, pady=10, fill="x")
+
+        self.search_entry = ctk.CTkEntry(self.lib_tab, placeholder_text="🔍 Search library", height=40, corner_radius=12,
+                                         fg_color=self.CLR_CARD, border_color=self.CLR_BORDER)
+        self.search_entry.pack(padx=10, pady=(0, 5), fill="x")
+        self.search_entry.bind("<Return>", lambda e: self._run_search())
         
-        self.lib_scroll = ctk.CTkScrollableFrame(self.lib_tab, fg_color="transparent")
-        self.lib_scroll.pack(padx=5, pady=5, expand=True, fill="both")
+        self.font_row = ctk.CTkFont(size=14)
+        self.font_row_active = ctk.CTkFont(size=14, weight="bold")
+        self.lib_list = VirtualList(self.lib_tab, row_height=75, make_row=self._make_library_row,
+                                    bind_row=self._bind_library_row, empty_text="Collection is empty", fg_color="transparent")
+        self.lib_list.pack(padx=5, pady=5, expand=True, fill="both")
 
         # --- TAB: PLAYING ---
         self.voice_menu = ctk.CTkOptionMenu(self.play_tab, values=[], height=40, corner_radius=12, 
@@ -172,6 +319,11 @@ class AudileApp(ctk.CTk):
         self.premium_only_switch.select()
         self.premium_only_switch.pack(padx=10, pady=10)
 
+        self.export_btn = ctk.CTkButton(self.play_tab, text="⤓ Export Audio", height=35, corner_radius=10,
+                                        fg_color="transparent", border_width=1, text_color=("#1C1C1E", "#F2F2F7"),
+                                        command=self._export_audio)
+        self.export_btn.pack(padx=10, pady=10, fill="x")
+
         # Help / Reset at bottom
         self.help_frame = ctk.CTkFrame(self.play_tab, fg_color="transparent")
         self.help_frame.pack(side="bottom", pady=10)
@@ -186,8 +338,9 @@ class AudileApp(ctk.CTk):
         self.add_bmk_btn = ctk.CTkButton(self.notes_tab, text="🔖 New Highlight", height=45, corner_radius=12,
                                          fg_color=self.CLR_ACCENT, command=self._add_bookmark)
         self.add_bmk_btn.pack(padx=10, pady=10, fill="x")
-        self.bmk_scroll = ctk.CTkScrollableFrame(self.notes_tab, fg_color="transparent")
-        self.bmk_scroll.pack(padx=5, pady=5, expand=True, fill="both")
+        self.bmk_list = VirtualList(self.notes_tab, row_height=51, make_row=self._make_bookmark_row,
+                                    bind_row=self._bind_bookmark_row, fg_color="transparent")
+        self.bmk_list.pack(padx=5, pady=5, expand=True, fill="both")
 
         # --- MAIN VIEWING CONTAINER ---
         self.main_container = ctk.CTkFrame(self, corner_radius=32, fg_color=self.CLR_CARD, border_width=1, border_color=self.CLR_BORDER)
@@ -199,6 +352,8 @@ class AudileApp(ctk.CTk):
         canvas_bg = "#111112" if darkdetect.isDark() else "#F2F2F7"
         self.canvas = tk.Canvas(self.main_container, bg=canvas_bg, highlightthickness=0)
         self.canvas.grid(row=0, column=0, sticky="nsew", padx=20, pady=20)
+        # Any scroll or resize of the view fills in tiles for high-zoom pages
+        self.canvas.configure(xscrollcommand=self._on_canvas_view_changed, yscrollcommand=self._on_canvas_view_changed)
         
         # Interactions for Canvas - macOS trackpad scroll requires global bindings
         self.canvas.bind("<MouseWheel>", self._on_mousewheel)
@@ -249,7 +404,6 @@ class AudileApp(ctk.CTk):
         self.version_label = ctk.CTkLabel(self.sidebar, text="Audile v1.0", font=ctk.CTkFont(size=11), text_color=self.CLR_TEXT_SEC)
         self.version_label.pack(side="bottom", pady=(0, 20))
 
-        self._refresh_voice_list()
         self._switch_nav("Library")
 
     def _switch_nav(self, target):
@@ -286,12 +440,35 @@ class AudileApp(ctk.CTk):
         self.is_loading = True
         
         def extract():
+            from pdf_engine import PDFEngine
+            from prefetch import PagePrefetcher
+            from fingerprint import document_fingerprint
+            # A document picked during startup waits for the caches and OCR
+            self._services_ready.wait()
             try:
-                engine = PDFEngine(file_path)
+                render_cache = RenderCache(max_bytes=self.render_cache_mb * 1024 * 1024)
+                engine = PDFEngine(file_path, cache=self.page_cache, render_cache=render_cache, ocr=self.ocr_pipeline,
+                                   mode=self.open_mode)
+                engine.grayscale_text_pages = self.grayscale_text_pages
+                # Scanned pages are recognized in the background and shown when ready; see _watch_ocr
+                engine.ocr_wait = False
                 if engine.open():
-                    self.pdf_engine = engine
+                    # Header/footer analysis is cached per document; the first open shows page 1
+                    # (and prefetches) with fixed margins while it runs in the background
+                    engine.layout_pending = engine.layout_profile(build=False) is None
+                    doc_id = engine.fingerprint or document_fingerprint(file_path)
+                    if self.prefetcher: self.prefetcher.close()
+                    self.prefetcher = PagePrefetcher(file_path, cache=self.page_cache, render_cache=render_cache,
+                                                     depth=self.prefetch_depth,
+                                                     grayscale_text_pages=self.grayscale_text_pages,
+                                                     ocr=self.ocr_pipeline, open_mode=self.open_mode,
+                                                     layout_pending=engine.layout_pending)
+                    old_engine, self.pdf_engine = self.pdf_engine, engine
                     self.current_pdf_path = file_path
-                    self.after(0, lambda: self._on_pdf_loaded(doc_type))
+                    self.current_doc_id = doc_id
+                    self.after(0, lambda: self._on_pdf_loaded(doc_type, old_engine))
+                    if engine.layout_pending:
+                        threading.Thread(target=self._build_layout, args=(engine, file_path), daemon=True).start()
                 else:
                     self.after(0, lambda: messagebox.showerror("Error", "Unsupported PDF format."))
             except Exception as e:
@@ -300,51 +477,212 @@ class AudileApp(ctk.CTk):
                 self.is_loading = False
         threading.Thread(target=extract, daemon=True).start()
 
-    def _on_pdf_loaded(self, doc_type):
-        if self.current_pdf_path not in self.library:
-            self.library[self.current_pdf_path] = {"page": 1, "title": os.path.basename(self.current_pdf_path), "doc_type": doc_type}
-        
-        self.current_page_num = self.library[self.current_pdf_path].get("page", 1)
+    def _build_layout(self, engine, file_path):
+        """Builds a document's header/footer profile on an engine of its own, then hands it to `engine`."""
+        from pdf_engine import PDFEngine
+        builder = PDFEngine(file_path, cache=self.page_cache, mode=self.open_mode)
+        try:
+            profile = builder.layout_profile() if builder.open() else None
+        except Exception as e:
+            print(f"Layout analysis failed: {e}")
+            return
+        finally:
+            builder.close()
+        if profile is not None:
+            self.after(0, lambda: self._on_layout_ready(engine, profile))
+
+    def _on_layout_ready(self, engine, profile):
+        """Re-reads the page on screen, which was extracted with fixed margins, once the profile exists."""
+        engine.layout, engine.layout_pending = profile, False
+        if engine is not self.pdf_engine: return
+        if self.prefetcher: self.prefetcher.set_layout(profile)
+        # Indexing was held back so it reads the document with the profile, not its own pass
+        self._enqueue_search_index()
+        # A playing page keeps its blocks; the pages after it are read with the profile
+        if not self.is_playing:
+            self._reread_page()
+
+    def _watch_ocr(self, page_num):
+        """Re-reads the page once its OCR, still running when it was shown, has finished."""
+        engine = self.pdf_engine
+        future = engine.ocr_pending.get(page_num)
+        if future is not None:
+            future.add_done_callback(lambda f: self.after(0, lambda: self._on_ocr_ready(engine, page_num)))
+
+    def _on_ocr_ready(self, engine, page_num):
+        if engine is self.pdf_engine and page_num == self.current_page_num and not self.is_playing:
+            self._reread_page()
+
+    def _reread_page(self):
+        """Extracts the page on screen again, keeping the reading position when its blocks are unchanged."""
+        doc_type = self.library.get(self.current_doc_id, {}).get("doc_type", "Book")
+        blocks = self.pdf_engine.get_page_data(self.current_page_num, doc_type=doc_type)
+        if len(blocks) != len(self.current_page_blocks):
+            self.current_block_index, self.current_sentence_index, self.current_sentence = 0, 0, None
+        self.current_page_blocks = blocks
+        self._render_page()
+
+    def _on_pdf_loaded(self, doc_type, old_engine=None):
+        # The previous document's engine (and its mmap) is closed on the Tk thread, which may still have been drawing from it
+        if old_engine is not None: old_engine.close()
+        doc_id, path = self.current_doc_id, self.current_pdf_path
+        if doc_id not in self.library:
+            # New content at a known path (file edited, or an entry from before fingerprints) keeps its progress
+            old_id = next((k for k, info in self.library.items() if info["path"] == path), None)
+            if old_id is not None:
+                self._rekey_document(old_id, doc_id, path)
+            else:
+                self.library[doc_id] = {"page": 1, "path": path, "title": os.path.basename(path), "doc_type": doc_type}
+        # A known document opened from a new location was moved or renamed
+        self.library[doc_id]["path"] = path
+        self.missing_docs.discard(doc_id)
+
+        self.current_page_num = self.library[doc_id].get("page", 1)
         self._load_page_data(self.current_page_num)
+        if "document" not in self._startup_times:
+            self._startup_times["document"] = time.time() - _LAUNCHED
+            self._report_startup()
         self._refresh_library_list()
         self._refresh_bookmark_list()
-        self._save_config()
+        self.state.put_document(doc_id, self.library[doc_id])
+        self.state.set_setting("last_pdf", path)
         self._switch_nav("Playing")
+        if not self.pdf_engine.layout_pending:
+            self._enqueue_search_index()
+        hit, self._pending_hit = self._pending_hit, None
+        if hit and hit["fingerprint"] == doc_id:
+            self._show_search_hit(hit)
+
+    def _enqueue_search_index(self):
+        if self.search_indexer:
+            self.search_indexer.enqueue(self.current_pdf_path, self.library[self.current_doc_id].get("doc_type", "Book"))
 
     def _load_page_data(self, page_num):
         self.current_page_num = page_num
-        if self.current_pdf_path in self.library:
-            self.library[self.current_pdf_path]["page"] = page_num
+        if self.current_doc_id in self.library:
+            self.library[self.current_doc_id]["page"] = page_num
+            self.state.set_position(self.current_doc_id, page_num)
         
-        doc_type = self.library[self.current_pdf_path].get("doc_type", "Book")
+        doc_type = self.library[self.current_doc_id].get("doc_type", "Book")
         self.current_page_blocks = self.pdf_engine.get_page_data(page_num, doc_type=doc_type)
         self.current_block_index = 0
+        self.current_sentence_index = 0
+        self.current_sentence = None
+        self.search_hit_boxes = []
         self.page_lbl.configure(text=f"Page {page_num} / {self.pdf_engine.total_pages}")
         self._render_page()
+        self._watch_ocr(page_num)
+        # Scanned documents (or mixed ones once a scanned page shows up) get OCR ahead of the reader
+        scanned = page_num in self.pdf_engine.ocr_pages or page_num in self.pdf_engine.ocr_pending
+        if self.ocr_pipeline and (self.pdf_engine.is_scanned or scanned):
+            self.ocr_pipeline.prefetch(self.current_pdf_path, self.pdf_engine.fingerprint,
+                                       range(page_num + 1, min(page_num + self.ocr_ahead, self.pdf_engine.total_pages) + 1))
+        # Look ahead from the new position; this also cancels any stale look-ahead
+        if self.prefetcher:
+            self.prefetcher.schedule(page_num, doc_type, None if self.page_tiles else self.zoom_factor)
 
+    @timed("ui.render_page")
     def _render_page(self, force=False):
         if not self.pdf_engine: return
         self.update_idletasks()
         canvas_width = self.canvas.winfo_width()
         if canvas_width > 50 and not self.manual_zoom:
             orig_w, _ = self.pdf_engine.get_page_size(self.current_page_num)
-            if orig_w: self.zoom_factor = (canvas_width - 100) / orig_w
+            if orig_w: self.zoom_factor = quantize_zoom((canvas_width - 100) / orig_w)
         
-        if self.current_page_num != self.current_page_rendered or force or self.current_tk_img is None:
-            from PIL import ImageTk
-            self.current_img = self.pdf_engine.get_page_image(self.current_page_num, zoom=self.zoom_factor)
-            if not self.current_img: return
-            self.current_tk_img = ImageTk.PhotoImage(self.current_img)
-            self.canvas.delete("all")
-            img_w, img_h = self.current_tk_img.width(), self.current_tk_img.height()
-            x_off = max(50, (canvas_width - img_w) // 2)
-            self.canvas.create_image(x_off, 50, anchor="nw", image=self.current_tk_img, tags="page")
-            self.canvas.config(scrollregion=(0, 0, max(canvas_width, img_w + x_off*2), img_h + 150))
+        needs_render = self.current_tk_img is None and self.page_tiles is None
+        if self.current_page_num != self.current_page_rendered or force or needs_render:
+            orig_w, orig_h = self.pdf_engine.get_page_size(self.current_page_num)
+            if not orig_w: return
+            if orig_w * orig_h * self.zoom_factor ** 2 > self.tile_threshold_px:
+                self._render_page_tiled(canvas_width, orig_w, orig_h)
+            else:
+                self._render_token += 1
+                data = self.pdf_engine.peek_page_pnm(self.current_page_num, self.zoom_factor)
+                if data is None and self.prefetcher:
+                    # Show a low-resolution stand-in now; the worker swaps in full resolution
+                    data = self.pdf_engine.get_page_preview(self.current_page_num, self.zoom_factor)
+                    token = self._render_token
+                    self.prefetcher.request_render(self.current_page_num, self.zoom_factor,
+                                                   lambda p, z: self.after(0, lambda: self._on_full_render_ready(token, p, z)))
+                elif data is None:
+                    data = self.pdf_engine.get_page_pnm(self.current_page_num, zoom=self.zoom_factor)
+                if not data: return
+                self.page_tiles = None
+                # Tk decodes the PPM/PGM bytes straight into the photo; no PIL image in between
+                self.current_tk_img = tk.PhotoImage(data=data, format="PPM")
+                self.canvas.delete("all")
+                img_w, img_h = self.current_tk_img.width(), self.current_tk_img.height()
+                x_off = max(50, (canvas_width - img_w) // 2)
+                self.canvas.create_image(x_off, 50, anchor="nw", image=self.current_tk_img, tags="page")
+                self.canvas.config(scrollregion=(0, 0, max(canvas_width, img_w + x_off*2), img_h + 150))
             self.current_page_rendered = self.current_page_num
 
         self._highlight_current_block()
         self.progress_bar.set(self.current_page_num / self.pdf_engine.total_pages)
 
+    def _on_full_render_ready(self, token, page_num, zoom):
+        """Swaps the preview for the full-resolution image unless the user has moved on."""
+        if token != self._render_token or page_num != self.current_page_rendered or zoom != self.zoom_factor:
+            return
+        data = self.pdf_engine.get_page_pnm(page_num, zoom=zoom)
+        if not data: return
+        self.current_tk_img = tk.PhotoImage(data=data, format="PPM")
+        self.canvas.itemconfigure("page", image=self.current_tk_img)
+
+    def _render_page_tiled(self, canvas_width, orig_w, orig_h):
+        """Lays out a high-zoom page as a placeholder and renders only the tiles in view."""
+        img_w, img_h = int(orig_w * self.zoom_factor), int(orig_h * self.zoom_factor)
+        x_off = max(50, (canvas_width - img_w) // 2)
+        self.current_tk_img = None
+        self.canvas.delete("all")
+        # The placeholder carries the "page" tag so highlight and click math stay unchanged
+        self.canvas.create_rectangle(x_off, 50, x_off + img_w, 50 + img_h, fill="white", outline="", tags="page")
+        self.canvas.config(scrollregion=(0, 0, max(canvas_width, img_w + x_off*2), img_h + 150))
+        self.page_tiles = {"page": self.current_page_num, "zoom": self.zoom_factor,
+                           "origin": (x_off, 50), "size": (img_w, img_h), "items": {}}
+        self._update_tiles()
+
+    def _on_canvas_view_changed(self, *args):
+        if self.page_tiles and not self._tile_update_pending:
+            self._tile_update_pending = True
+            self.after_idle(self._update_tiles)
+
+    def _update_tiles(self):
+        """Renders tiles intersecting the viewport plus a one-tile margin, and drops the rest.
+
+        At most tiles_per_pass tiles are rasterized per call, nearest the top first;
+        the rest are left to another pass so input is handled between them.
+        """
+        self._tile_update_pending = False
+        tiles = self.page_tiles
+        if not tiles or not self.pdf_engine: return
+        ts = self.tile_size
+        (ox, oy), (img_w, img_h) = tiles["origin"], tiles["size"]
+        view_x0 = self.canvas.canvasx(0) - ox - ts
+        view_y0 = self.canvas.canvasy(0) - oy - ts
+        view_x1 = self.canvas.canvasx(self.canvas.winfo_width()) - ox + ts
+        view_y1 = self.canvas.canvasy(self.canvas.winfo_height()) - oy + ts
+        cols = range(max(0, int(view_x0 // ts)), min((img_w - 1) // ts, int(view_x1 // ts)) + 1)
+        rows = range(max(0, int(view_y0 // ts)), min((img_h - 1) // ts, int(view_y1 // ts)) + 1)
+        wanted = {(c, r) for r in rows for c in cols}
+
+        items = tiles["items"]
+        for key in [k for k in items if k not in wanted]:
+            self.canvas.delete(items.pop(key)[0])
+        missing = sorted(wanted - items.keys(), key=lambda k: (k[1], k[0]))
+        if len(missing) > self.tiles_per_pass:
+            # Re-evaluated against the viewport at that time, so tiles scrolled away are never drawn
+            self._tile_update_pending = True
+            self.after(1, self._update_tiles)
+        for c, r in missing[:self.tiles_per_pass]:
+            data = self.pdf_engine.get_page_tile(tiles["page"], tiles["zoom"], c, r, tile_size=ts)
+            if data is None: continue
+            photo = tk.PhotoImage(data=data, format="PPM")
+            item = self.canvas.create_image(ox + c * ts, oy + r * ts, anchor="nw", image=photo, tags="tile")
+            items[(c, r)] = (item, photo)
+        self.canvas.tag_raise("focus")
+
     def _highlight_current_block(self):
         """Draws a professional focus indicator for the active block."""
         self.canvas.delete("focus")
@@ -357,17 +695,23 @@ class AudileApp(ctk.CTk):
         if not coords: return
         x_off, y_off = coords[0], coords[1]
         
-        # Sleek Sidebar Bar (localized to text column)
-        self.canvas.create_rectangle(bbox[0]*z + x_off - 15, bbox[1]*z + y_off + 2, 
-                                   bbox[0]*z + x_off - 10, bbox[3]*z + y_off - 2, 
+        # Sleek Sidebar Bar (localized to text column, spanning the sentence being read)
+        span = self.current_sentence["bbox"] if self.current_sentence else bbox
+        self.canvas.create_rectangle(bbox[0]*z + x_off - 15, span[1]*z + y_off + 2, 
+                                   bbox[0]*z + x_off - 10, span[3]*z + y_off - 2, 
                                    fill=self.CLR_ACCENT, outline="", tags="focus")
+
+        # Outline the words of a search hit
+        for x0, y0, x1, y1 in self.search_hit_boxes:
+            self.canvas.create_rectangle(x0*z + x_off - 1, y0*z + y_off - 1, x1*z + x_off + 1, y1*z + y_off + 1,
+                                         outline=self.CLR_ACCENT, width=2, tags="focus")
         
         # Auto-scroll to keep paragraph in view
-        if self.is_playing:
+        if self.is_playing or self.search_hit_boxes:
             canvas_h = self.canvas.winfo_height()
             if canvas_h > 1:
                 # Calculate the Y position in the scrollregion
-                block_y_center = (bbox[1] + bbox[3]) / 2 * z + y_off
+                block_y_center = (span[1] + span[3]) / 2 * z + y_off
                 scroll_region = self.canvas.cget("scrollregion").split()
                 if len(scroll_region) == 4:
                     total_h = float(scroll_region[3])
@@ -382,44 +726,56 @@ class AudileApp(ctk.CTk):
             return
         self.is_playing = True
         self.play_btn.configure(text="■")
-        self._speak_current_block()
+        self._highlight_current_block()
+        self.playback.play(self.current_page_num, self.current_block_index, self.current_sentence_index)
+
+    def _blocks_for_page(self, page_num):
+        if page_num == self.current_page_num: return self.current_page_blocks
+        doc_type = self.library.get(self.current_doc_id, {}).get("doc_type", "Book")
+        return self.pdf_engine.get_page_data(page_num, doc_type=doc_type)
 
-    def _speak_current_block(self):
+    def _on_playback_sentence(self, page_num, block_index, sentence_index, sentence):
+        """Called as each sentence starts speaking; the next one is already queued."""
         if not self.is_playing: return
-        if self.current_block_index < len(self.current_page_blocks):
-            block = self.current_page_blocks[self.current_block_index]
-            self.tts_engine.speak(block["text"])
+        kind = "page" if page_num != self.current_page_num else "block" if block_index != self.current_block_index else "sentence"
+        with PROFILER.span(f"ui.{kind}_transition"):
+            if page_num != self.current_page_num:
+                self._load_page_data(page_num)
+            self.current_block_index = block_index
+            self.current_sentence_index = sentence_index
+            self.current_sentence = sentence
             self._highlight_current_block()
-            self.after(100, self._check_speech_status)
-        else:
-            self._on_page_finished()
 
-    def _check_speech_status(self):
-        if not self.is_playing: return
-        if self.tts_engine.is_speaking():
-            self.after(100, self._check_speech_status)
-        else:
-            self.current_block_index += 1
-            if self.current_block_index < len(self.current_page_blocks):
-                self._speak_current_block()
-            else:
-                self._on_page_finished()
-
-    def _on_page_finished(self):
-        if self.current_page_num < self.pdf_engine.total_pages:
-            self.current_page_num += 1
-            self._load_page_data(self.current_page_num)
-            self._save_config()
-            self.after(600, self._speak_current_block)
+    def _on_playback_word(self, page_num, block_index, offset):
+        """Underlines the word being spoken; one canvas item, moved in place for every word."""
+        if not self.is_playing or page_num != self.current_page_num or block_index >= len(self.current_page_blocks):
+            return
+        from pdf_engine import word_at
+        block = self.current_page_blocks[block_index]
+        index = word_at(block.get("offsets", []), offset)
+        coords = self.canvas.coords("page")
+        if index < 0 or not coords: return
+        x0, _, x1, y1 = block["words"][index]["bbox"]
+        z, x_off, y_off = self.zoom_factor, coords[0], coords[1]
+        box = (x0*z + x_off, y1*z + y_off + 1, x1*z + x_off, y1*z + y_off + 3)
+        if self.canvas.find_withtag("word"):
+            self.canvas.coords("word", *box)
+            self.canvas.itemconfigure("word", state="normal")
         else:
-            self._stop()
-            self.page_lbl.configure(text="✓ Finished")
+            self.canvas.create_rectangle(*box, fill=self.CLR_ACCENT, outline="", tags="word")
+        # Tiles rendered after the marker was created would otherwise cover it
+        self.canvas.tag_raise("word")
+
+    def _on_playback_finished(self):
+        self._stop()
+        self.page_lbl.configure(text="✓ Finished")
 
     def _pause(self): self.tts_engine.pause()
     def _stop(self):
         self.is_playing = False
         self.play_btn.configure(text="▶")
-        self.tts_engine.stop()
+        self.playback.stop()
+        self.canvas.itemconfigure("word", state="hidden")
 
     def _toggle_play(self):
         if self.is_playing and not self.tts_engine.is_paused: self._pause()
@@ -455,12 +811,12 @@ class AudileApp(ctk.CTk):
     
     def _zoom_in(self):
         self.manual_zoom = True  # User is manually zooming
-        self.zoom_factor = min(5.0, self.zoom_factor * 1.2)
+        self.zoom_factor = quantize_zoom(min(5.0, self.zoom_factor * 1.2))
         self._render_page(force=True)
     
     def _zoom_out(self):
         self.manual_zoom = True  # User is manually zooming
-        self.zoom_factor = max(0.3, self.zoom_factor * 0.8)
+        self.zoom_factor = quantize_zoom(max(0.3, self.zoom_factor * 0.8))
         self._render_page(force=True)
     
     def _on_canvas_click(self, event):
@@ -486,67 +842,151 @@ class AudileApp(ctk.CTk):
                 # Stop current playback and start from this block
                 self._stop()
                 self.current_block_index = i
-                self._highlight_current_block()
-                self.is_playing = True
-                self.play_btn.configure(text="■")
-                self._speak_current_block()
+                self.current_sentence_index = self._sentence_at(block, click_y)
+                self._play()
                 return
 
+    def _sentence_at(self, block, y):
+        """Index of the first sentence of block that reaches down to y (PDF coordinates)."""
+        from pdf_engine import block_sentences
+        for i, sentence in enumerate(block_sentences(block)):
+            if sentence["bbox"][3] >= y: return i
+        return 0
+
     def _on_speed_change(self, v):
         self.tts_engine.set_rate(v)
         self.speed_label.configure(text=f"Speed: {v:.1f}x")
     def _on_voice_change(self, display_name):
         """Robustly switch narrator based on menu selection."""
-        # Find voice by display name match
-        for i, dn in enumerate(self.voice_display_names):
-            if dn == display_name:
-                self.tts_engine.set_voice(self.voices[i]['id'])
-                # Auto-stop and preview if playing? No, just set.
-                break
+        voice = self._current_voice(display_name)
+        if voice: self.tts_engine.set_voice(voice['id'])
 
     def _refresh_library_list(self):
-        for widget in self.lib_scroll.winfo_children(): widget.destroy()
-        if not self.library:
-            ctk.CTkLabel(self.lib_scroll, text="Collection is empty", font=ctk.CTkFont(slant="italic")).pack(pady=40)
+        items = [("doc", doc_id, info["title"], doc_id == self.current_doc_id)
+                 for doc_id, info in self.library.items() if doc_id not in self.missing_docs]
+        self.lib_list.set_items(items, empty_text="Collection is empty")
+
+    def _make_library_row(self, parent):
+        row = ctk.CTkFrame(parent, fg_color="transparent")
+        row.del_btn = ctk.CTkButton(row, text="🗑", width=40, height=40, corner_radius=20, fg_color="transparent",
+                                    text_color=self.CLR_TEXT_SEC, hover_color="#FF3B30")
+        row.del_btn.pack(side="right", padx=(0, 10))
+        row.btn = ctk.CTkButton(row, text="", anchor="w", height=65, corner_radius=15)
+        row.btn.pack(side="left", fill="x", expand=True, padx=10, pady=5)
+        return row
+
+    def _bind_library_row(self, row, item):
+        if item[0] == "hit":
+            hit = item[1]
+            title = self.library.get(hit["fingerprint"], {}).get("title", os.path.basename(hit["path"]))
+            row.btn.configure(text=f"{title} · P{hit['page']}\n{hit['snippet']}", fg_color="transparent",
+                              text_color=("#1C1C1E", "#F2F2F7"), hover_color=self.CLR_BORDER, font=self.font_row,
+                              command=lambda h=hit: self._open_search_hit(h))
+            row.del_btn.pack_forget()
             return
-        for path, info in self.library.items():
-            if not os.path.exists(path): continue
-            frame = ctk.CTkFrame(self.lib_scroll, fg_color="transparent")
-            frame.pack(fill="x", pady=5, padx=10)
-            is_active = (path == self.current_pdf_path)
-            
-            btn = ctk.CTkButton(frame, text=f"• {info['title']}", anchor="w", height=65, corner_radius=15,
-                               fg_color=self.CLR_BORDER[1] if is_active else "transparent",
-                               text_color=self.CLR_ACCENT if is_active else "white",
-                               font=ctk.CTkFont(size=14, weight="bold" if is_active else "normal"),
-                               command=lambda p=path: self._load_pdf(p))
-            btn.pack(side="left", fill="x", expand=True, padx=(0, 10))
-            
-            del_btn = ctk.CTkButton(frame, text="🗑", width=40, height=40, corner_radius=20, fg_color="transparent", 
-                                   text_color=self.CLR_TEXT_SEC, hover_color="#FF3B30",
-                                   command=lambda p=path: self._confirm_remove(p))
-            del_btn.pack(side="right")
+        _, doc_id, title, is_active = item
+        row.btn.configure(text=f"• {title}", fg_color=self.CLR_BORDER[1] if is_active else "transparent",
+                          text_color=self.CLR_ACCENT if is_active else "white", hover_color=self.CLR_BORDER,
+                          font=self.font_row_active if is_active else self.font_row,
+                          command=lambda p=self.library[doc_id]["path"]: self._load_pdf(p))
+        row.del_btn.configure(command=lambda d=doc_id: self._confirm_remove(d))
+        if not row.del_btn.winfo_manager():
+            row.del_btn.pack(side="right", padx=(0, 10), before=row.btn)
+
+    def _check_library_paths(self):
+        """Checks all library files in one background pass: which are missing, and their current fingerprints.
+
+        Unchanged files cost a stat() each (FingerprintIndex); entries whose file
+        now has other content, or that predate fingerprints, are re-keyed.
+        """
+        docs = [(doc_id, info["path"]) for doc_id, info in self.library.items()]
+        def check():
+            from fingerprint import document_fingerprint
+            missing, rekeys = set(), []
+            for doc_id, path in docs:
+                try:
+                    fingerprint = document_fingerprint(path)
+                except OSError:
+                    missing.add(doc_id)
+                    continue
+                if fingerprint != doc_id:
+                    rekeys.append((doc_id, fingerprint, path))
+            self.after(0, lambda: self._on_library_paths_checked(missing, rekeys))
+        threading.Thread(target=check, daemon=True).start()
 
-    def _confirm_remove(self, path):
+    def _on_library_paths_checked(self, missing, rekeys):
+        for old_id, new_id, path in rekeys:
+            # Skip entries that were opened, moved or removed while the check ran
+            if self.library.get(old_id, {}).get("path") == path and old_id != self.current_doc_id:
+                self._rekey_document(old_id, new_id, path)
+        missing &= set(self.library)
+        if rekeys or missing != self.missing_docs:
+            self.missing_docs = missing
+            self._refresh_library_list()
+
+    def _rekey_document(self, old_id, new_id, path):
+        """Moves a library entry and its bookmarks to the fingerprint of the file's current content."""
+        if new_id in self.library:
+            del self.library[old_id]
+        else:
+            self.library = {(new_id if k == old_id else k): (dict(v, path=path) if k == old_id else v)
+                            for k, v in self.library.items()}
+        old_marks = self.bookmarks.pop(old_id, None)
+        self.state.rekey_document(old_id, new_id, path)
+        if old_marks:
+            # Both ids may have bookmarks (e.g. a copy was opened before the original was edited): keep one per page
+            marks = self.bookmarks.setdefault(new_id, [])
+            pages = {m["page"] for m in marks}
+            for mark in old_marks:
+                if mark["page"] not in pages:
+                    pages.add(mark["page"])
+                    marks.append(mark)
+            self.state.put_bookmarks(new_id, marks)
+
+    def _run_search(self):
+        query = self.search_entry.get().strip()
+        if not query or not self.search_index:
+            self._refresh_library_list()
+            return
+        self._show_search_results(self.search_index.search(query))
+
+    def _show_search_results(self, hits):
+        self.lib_list.set_items([("hit", hit) for hit in hits], empty_text="No matches")
+        self.lib_list.scroll_to(0)
+
+    def _open_search_hit(self, hit):
+        if hit["fingerprint"] != self.current_doc_id or not self.pdf_engine:
+            self._pending_hit = hit
+            self._load_pdf(hit["path"], self.library.get(hit["fingerprint"], {}).get("doc_type", "Book"))
+            return
+        self._show_search_hit(hit)
+
+    def _show_search_hit(self, hit):
+        """Jumps to the hit's page and block and outlines the matching words."""
+        self._stop()
+        self._load_page_data(hit["page"])
+        if not self.current_page_blocks: return
+        self.current_block_index = min(hit["block"], len(self.current_page_blocks) - 1)
+        self.search_hit_boxes = hit["words"]
+        self._highlight_current_block()
+
+    def _confirm_remove(self, doc_id):
         if messagebox.askyesno("Audile Pro", "Permanently remove this document?\n\nHighlights and library progress will be lost."):
-            del self.library[path]
-            if path == self.current_pdf_path:
+            path = self.library.pop(doc_id)["path"]
+            self.state.remove_document(doc_id)
+            if self.search_index: self.search_index.remove_document(path)
+            if doc_id == self.current_doc_id:
                 self.current_pdf_path = None
+                self.current_doc_id = None
+                self.state.set_setting("last_pdf", None)
+                if self.prefetcher: self.prefetcher.cancel()
                 self.canvas.delete("all")
             self._refresh_library_list()
-            self._save_config()
 
     def _refresh_voice_list(self):
-        raw = self.tts_engine.get_voices()
-        premium_only = self.premium_only_switch.get() == 1
-        voice_map = {}
-        for v in raw:
-            if v['id'] in self.hidden_voice_ids or v['is_novelty']: continue
-            if premium_only and not v['is_premium']: continue
-            key = (v['name'], v['lang'])
-            if key not in voice_map or v['quality_val'] > voice_map[key]['quality_val']: voice_map[key] = v
-        self.voices = sorted(list(voice_map.values()), key=lambda v: (not v.get('is_personal', False), -v['quality_val'], v['name']))
-        self.voice_display_names = [f"{v['name']}  {'👤' if v.get('is_personal') else '✨' if v['quality_val']==3 else '★' if v['quality_val']==2 else ''}" for v in self.voices]
+        if not self.voice_catalog: return
+        self.voices = self.voice_catalog.visible(self.premium_only_switch.get() == 1, self.hidden_voice_ids)
+        self.voice_display_names = [v['display'] for v in self.voices]
         if self.voice_menu:
             self.voice_menu.configure(values=self.voice_display_names)
             # Auto-select first voice if available
@@ -554,52 +994,139 @@ class AudileApp(ctk.CTk):
                 self.voice_menu.set(self.voice_display_names[0])
                 self.tts_engine.set_voice(self.voices[0]['id'])
 
+    def _export_audio(self):
+        """Exports the open document to one audio file per chapter, resuming a previous export.
+
+        Clicking the button again while an export runs stops it after the current utterance.
+        """
+        if self.exporter:
+            self.exporter.stop()
+            self.export_btn.configure(text="⤓ Stopping…", state="disabled")
+            return
+        if not self.current_pdf_path: return
+        from audio_export import AudioExporter, AVSynthesisBackend
+        out_dir = filedialog.askdirectory(title="Export audio to")
+        if not out_dir: return
+        name = os.path.splitext(os.path.basename(self.current_pdf_path))[0]
+        voice_id, rate = self.tts_engine.voice_id, self.tts_engine.rate
+        exporter = AudioExporter(self.current_pdf_path, os.path.join(out_dir, name),
+                                 lambda: AVSynthesisBackend(voice_id=voice_id, rate=rate),
+                                 doc_type=self.library[self.current_doc_id].get("doc_type", "Book"), cache=self.page_cache,
+                                 ocr=self.ocr_pipeline)
+
+        def export():
+            try:
+                exporter.run(on_progress=lambda done, total: self.after(
+                    0, lambda: self.export_btn.configure(text=f"⤓ Exporting {done}/{total} (click to stop)")))
+                self.after(0, lambda: messagebox.showinfo("Audile", f"Audio saved to {exporter.out_dir}"))
+            except InterruptedError:
+                pass  # Stopped from the button or by closing the window; finished chunks are kept
+            except Exception as e:
+                self.after(0, lambda e=e: messagebox.showerror("Error", f"Export failed: {e}"))
+            finally:
+                self.after(0, self._on_export_finished)
+        self.exporter = exporter
+        self.export_btn.configure(text="⤓ Exporting (click to stop)")
+        self._export_thread = threading.Thread(target=export, daemon=True)
+        self._export_thread.start()
+
+    def _on_export_finished(self):
+        self.exporter, self._export_thread = None, None
+        self.export_btn.configure(text="⤓ Export Audio", state="normal")
+
     def _add_bookmark(self):
         if not self.current_pdf_path: return
         note = ctk.CTkInputDialog(text="Personal Annotation:", title="Add Note").get_input()
         if note:
-            if self.current_pdf_path not in self.bookmarks: self.bookmarks[self.current_pdf_path] = []
-            self.bookmarks[self.current_pdf_path].append({"page": self.current_page_num, "note": note, "timestamp": time.time()})
+            if self.current_doc_id not in self.bookmarks: self.bookmarks[self.current_doc_id] = []
+            self.bookmarks[self.current_doc_id].append({"page": self.current_page_num, "note": note, "timestamp": time.time()})
             self._refresh_bookmark_list()
-            self._save_config()
+            self.state.put_bookmarks(self.current_doc_id, self.bookmarks[self.current_doc_id])
 
     def _refresh_bookmark_list(self):
-        for widget in self.bmk_scroll.winfo_children(): widget.destroy()
-        if not self.current_pdf_path or self.current_pdf_path not in self.bookmarks: return
-        for b in sorted(self.bookmarks[self.current_pdf_path], key=lambda x: x['page']):
-            btn = ctk.CTkButton(self.bmk_scroll, text=f"P{b['page']}: {b['note']}", anchor="w", height=45, corner_radius=15,
-                               fg_color=self.CLR_BORDER[1], text_color="white", command=lambda p=b['page']: self._load_page_data(p))
-            btn.pack(fill="x", pady=3, padx=10)
+        marks = self.bookmarks.get(self.current_doc_id, []) if self.current_doc_id else []
+        self.bmk_list.set_items([(b['page'], b['note']) for b in sorted(marks, key=lambda x: x['page'])])
+
+    def _make_bookmark_row(self, parent):
+        row = ctk.CTkFrame(parent, fg_color="transparent")
+        row.btn = ctk.CTkButton(row, text="", anchor="w", height=45, corner_radius=15,
+                                fg_color=self.CLR_BORDER[1], text_color="white")
+        row.btn.pack(fill="x", pady=3, padx=10)
+        return row
 
+    def _bind_bookmark_row(self, row, item):
+        page, note = item
+        row.btn.configure(text=f"P{page}: {note}", command=lambda p=page: self._load_page_data(p))
+
+    def _current_voice(self, display_name=None):
+        """The voice under a menu label (default: the selected one), resolved with the menu's current filters."""
+        if not self.voice_catalog: return None
+        return self.voice_catalog.for_display(display_name or self.voice_menu.get(),
+                                              self.premium_only_switch.get() == 1, self.hidden_voice_ids)
     def _preview_voice(self):
-        current = self.voice_menu.get()
-        for v in self.voices:
-            if current.startswith(v['name']): self.tts_engine.preview(v['id']); break
+        voice = self._current_voice()
+        if voice: self.tts_engine.preview(voice['id'])
     def _hide_current_voice(self):
-        current = self.voice_menu.get()
-        for v in self.voices:
-            if current.startswith(v['name']): self.hidden_voice_ids.add(v['id']); break
-        self._refresh_voice_list(); self._save_config()
-    def _reset_hidden_voices(self): self.hidden_voice_ids.clear(); self._refresh_voice_list(); self._save_config()
+        voice = self._current_voice()
+        if voice: self.hidden_voice_ids.add(voice['id'])
+        self._refresh_voice_list(); self.state.set_hidden_voices(self.hidden_voice_ids)
+    def _reset_hidden_voices(self): self.hidden_voice_ids.clear(); self._refresh_voice_list(); self.state.set_hidden_voices(self.hidden_voice_ids)
     def _show_voice_help(self): messagebox.showinfo("Voices", "Install 'Enhanced' voices in System Settings > Accessibility > Spoken Content.")
 
     def _load_config(self):
-        if os.path.exists(self.config_file):
-            try:
-                with open(self.config_file, 'r') as f:
-                    config = json.load(f)
-                    self.hidden_voice_ids = set(config.get("hidden_voices", []))
-                    self.bookmarks = config.get("bookmarks", {})
-                    self.library = config.get("library", {})
-                    self._refresh_voice_list()
-                    if config.get("last_pdf") and os.path.exists(config["last_pdf"]): self._load_pdf(config["last_pdf"])
-            except: pass
-
-    def _save_config(self):
         try:
-            with open(self.config_file, 'w') as f:
-                json.dump({"last_pdf": self.current_pdf_path, "hidden_voices": list(self.hidden_voice_ids), "bookmarks": self.bookmarks, "library": self.library}, f)
-        except: pass
+            self.state.migrate_json(self.config_file)
+            state = self.state.load()
+        except Exception as e:
+            print(f"Loading saved state failed: {e}")
+            return
+        settings = state["settings"]
+        self.hidden_voice_ids = state["hidden_voices"]
+        self.bookmarks = state["bookmarks"]
+        self.library = state["library"]
+        self._refresh_library_list()
+        self._check_library_paths()
+        self.prefetch_depth = int(settings.get("prefetch_depth", self.prefetch_depth))
+        self.render_cache_mb = int(settings.get("render_cache_mb", self.render_cache_mb))
+        self.grayscale_text_pages = bool(settings.get("grayscale_text_pages", self.grayscale_text_pages))
+        if settings.get("open_mode") in ("file", "mmap"): self.open_mode = settings["open_mode"]
+        if settings.get("profiling") and not PROFILER.enabled:
+            PROFILER.enable(trace_memory=settings.get("profiling") == "memory")
+        last_pdf = settings.get("last_pdf")
+        if last_pdf and os.path.exists(last_pdf): self._restore_pdf = last_pdf
+
+    def _dump_profile(self):
+        """Writes the span histograms and a Chrome trace next to the caches (Ctrl/Cmd-Shift-P)."""
+        if not PROFILER.enabled:
+            self.page_lbl.configure(text="Profiling is off (set AUDILE_PROFILE=1)")
+            return
+        try:
+            PROFILER.snapshot("dump")
+            base = os.path.join(os.path.expanduser("~/.audile_cache"), f"profile-{time.strftime('%Y%m%d-%H%M%S')}")
+            os.makedirs(os.path.dirname(base), exist_ok=True)
+            PROFILER.dump_json(base + ".json")
+            PROFILER.dump_chrome_trace(base + ".trace.json")
+            self.page_lbl.configure(text=f"Profile saved to {os.path.basename(base)}.json")
+        except Exception as e:
+            print(f"Profile dump failed: {e}")
+
+    def _on_close(self):
+        self._stop()
+        # Stop the background workers and any export, then cancel queued OCR so none of them is left
+        # waiting on it; all of them must be done with the page cache before it is closed
+        workers = [w for w in (self.prefetcher, self.search_indexer) if w]
+        for worker in workers: worker.close()
+        if self.exporter: self.exporter.stop()
+        if self.ocr_pipeline: self.ocr_pipeline.close()
+        for worker in workers: worker.join(timeout=2.0)
+        if self._export_thread: self._export_thread.join(timeout=10.0)
+        if self.pdf_engine: self.pdf_engine.close()
+        if self.search_index: self.search_index.close()
+        if self.page_cache: self.page_cache.close()
+        self.state.close()
+        self.destroy()
 
 if __name__ == "__main__":
+    # Process pools (OCR, bulk extraction) must not relaunch the GUI in frozen builds
+    multiprocessing.freeze_support()
     AudileApp().mainloop()
@@ -0,0 +1,193 @@
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from typing import Iterable
+
+import fitz  # PyMuPDF
+
+from pdf_engine import page_text_layer
+
+
+class OCRBackend:
+    """Recognizes one page and returns its text layer as {"blocks": [...], "words": [...]}.
+
+    Backends are pickled into pool workers, so keep their state to plain settings.
+    """
+    name = "base"
+
+    def cache_key(self) -> str:
+        """Identifies the backend and its settings for the OCR and page caches."""
+        return self.name
+
+    def recognize(self, page) -> dict:
+        raise NotImplementedError
+
+
+class TesseractBackend(OCRBackend):
+    """PyMuPDF's built-in OCR through a local Tesseract installation."""
+    name = "tesseract"
+
+    def __init__(self, language: str = "eng", dpi: int = 300, tessdata: str = None):
+        self.language = language
+        self.dpi = dpi
+        self.tessdata = tessdata
+
+    def cache_key(self) -> str:
+        return f"{self.name}:{self.language}:{self.dpi}"
+
+    def recognize(self, page) -> dict:
+        textpage = page.get_textpage_ocr(language=self.language, dpi=self.dpi, full=True, tessdata=self.tessdata)
+        return page_text_layer(page, textpage)
+
+
+class StubOCRBackend(OCRBackend):
+    """Deterministic backend for tests: lays out fixed text as one block mid-page."""
+    name = "stub"
+
+    def __init__(self, text: str = "Recognized text."):
+        self.text = text
+
+    def recognize(self, page) -> dict:
+        x0, y0 = page.rect.x0 + 72, page.rect.y0 + page.rect.height / 2
+        words, x = [], x0
+        for token in self.text.split():
+            width = 6.0 * len(token)
+            words.append([x, y0, x + width, y0 + 12, token])
+            x += width + 4
+        bbox = [x0, y0, max(x - 4, x0), y0 + 12]
+        return {
+            "blocks": [{"bbox": bbox, "lines": [{"bbox": bbox, "spans": [{"text": self.text}]}]}],
+            "words": words,
+        }
+
+
+def needs_ocr(page) -> bool:
+    """Per-page classification: no extractable words but at least one image."""
+    return not page.get_text("words") and bool(page.get_images())
+
+
+def _recognize_page(backend: OCRBackend, file_path: str, page_num: int):
+    """Process-pool task: recognizes one page of its own copy of the document.
+
+    Returns None for pages that already have a text layer.
+    """
+    doc = fitz.open(file_path)
+    try:
+        page = doc[page_num - 1]
+        return backend.recognize(page) if needs_ocr(page) else None
+    finally:
+        doc.close()
+
+
+class OCRPipeline:
+    """Recognizes pages without a text layer in a process pool, caching results on disk.
+
+    PDFEngine calls recognize() when it meets a page with no words but with
+    images. prefetch() queues pages ahead of the reading position so that, by
+    the time the reader gets there, the page is a cache lookup. Each page is
+    recognized at most once per (document fingerprint, backend settings); a
+    page whose recognition failed is not retried by the same pipeline.
+    """
+
+    def __init__(self, backend: OCRBackend = None, cache=None, workers: int = 2):
+        self.backend = backend or TesseractBackend()
+        self.cache = cache
+        self.workers = workers
+        self._pool = None
+        self._pending = {}
+        self._results = {}
+        # (fingerprint, page, backend key) of pages whose recognition raised
+        self._failed = set()
+        self._closed = False
+        self._lock = threading.Lock()
+
+    def recognize(self, file_path: str, fingerprint: str, page_num: int, wait: bool = True):
+        """Returns the OCR text layer for a page, waiting for it if necessary; None on failure.
+
+        With wait=False a page that is still being recognized returns its Future
+        instead, so the caller (the GUI thread) can read the page again once it is done.
+        """
+        key = (fingerprint, page_num)
+        cached = self._cached(key)
+        if cached is not None:
+            return cached
+        with self._lock:
+            if self._failed_key(key) in self._failed:
+                return None
+        future = self._submit(file_path, fingerprint, page_num)
+        if future is None:
+            return None
+        if not wait and not future.done():
+            return future
+        try:
+            return future.result()
+        except Exception as e:
+            print(f"OCR of page {page_num} failed: {e}")
+            return None
+
+    def prefetch(self, file_path: str, fingerprint: str, pages: Iterable[int]):
+        """Starts recognition of pages that are not known, cached or already queued.
+
+        Workers classify each page themselves, so born-digital pages cost one open.
+        """
+        for page_num in pages:
+            key = (fingerprint, page_num)
+            with self._lock:
+                known = key in self._results or key in self._pending or self._failed_key(key) in self._failed
+            if not known and self._cached(key) is None:
+                self._submit(file_path, fingerprint, page_num)
+
+    def close(self):
+        """Cancels queued pages and stops the pool; later requests are refused."""
+        with self._lock:
+            self._closed = True
+            pool, self._pool = self._pool, None
+            self._pending.clear()
+        if pool:
+            pool.shutdown(wait=False, cancel_futures=True)
+
+    def _cached(self, key):
+        with self._lock:
+            if self._results.get(key) is not None:
+                return self._results[key]
+        if self.cache is not None:
+            layer = self.cache.get_ocr(key[0], key[1], self.backend.cache_key())
+            if layer is not None:
+                with self._lock:
+                    self._results[key] = layer
+                return layer
+        return None
+
+    def _failed_key(self, key) -> tuple:
+        return key + (self.backend.cache_key(),)
+
+    def _submit(self, file_path: str, fingerprint: str, page_num: int):
+        """Queues a page and returns its Future; None once the pipeline is closed."""
+        key = (fingerprint, page_num)
+        with self._lock:
+            if self._closed:
+                return None
+            future = self._pending.get(key)
+            if future is not None:
+                return future
+            if self._pool is None:
+                self._pool = ProcessPoolExecutor(max_workers=self.workers)
+            future = self._pool.submit(_recognize_page, self.backend, file_path, page_num)
+            self._pending[key] = future
+        future.add_done_callback(lambda f: self._on_done(key, f))
+        return future
+
+    def _on_done(self, key, future):
+        with self._lock:
+            self._pending.pop(key, None)
+        if future.cancelled():
+            return
+        if future.exception() is not None:
+            with self._lock:
+                self._failed.add(self._failed_key(key))
+            return
+        layer = future.result()
+        with self._lock:
+            # None marks a page that turned out to have its own text layer
+            self._results[key] = layer
+        if layer is not None and self.cache is not None:
+            self.cache.put_ocr(key[0], key[1], self.backend.cache_key(), layer)
@@ -0,0 +1,165 @@
+import os
+import json
+import zlib
+import sqlite3
+import threading
+from collections import OrderedDict
+
+CACHE_DIR = os.path.expanduser("~/.audile_cache")
+
+
+class PageCache:
+    """Extracted page data cache: an in-memory LRU in front of a SQLite store.
+
+    Entries are keyed by (document fingerprint, page, doc_type, extractor version),
+    so editing the file or the cleaning rules simply stops old rows from matching,
+    while moving or renaming the file keeps them. Stale rows are pruned when a path
+    is re-registered with a new fingerprint that no other path still uses, and
+    when the store is opened under a different extractor version.
+    """
+
+    def __init__(self, db_path: str = None, memory_entries: int = 64):
+        if db_path is None:
+            os.makedirs(CACHE_DIR, exist_ok=True)
+            db_path = os.path.join(CACHE_DIR, "pages.db")
+        self.db_path = db_path
+        self.memory_entries = memory_entries
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        # Pages are extracted on the loader thread and read on the Tk thread
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        with self._conn:
+            # Older stores left version out of the key, so one extractor's rows replaced another's
+            keyed = {row[1]: row[5] for row in self._conn.execute("PRAGMA table_info(pages)")}
+            if keyed and not keyed.get("version"):
+                self._conn.execute("ALTER TABLE pages RENAME TO pages_unversioned")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS pages ("
+                " fingerprint TEXT, page INTEGER, doc_type TEXT, version TEXT, data BLOB,"
+                " PRIMARY KEY (fingerprint, page, doc_type, version))")
+            if keyed and not keyed.get("version"):
+                self._conn.execute("INSERT INTO pages SELECT fingerprint, page, doc_type, version, data"
+                                   " FROM pages_unversioned")
+                self._conn.execute("DROP TABLE pages_unversioned")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS documents (path TEXT PRIMARY KEY, fingerprint TEXT)")
+            # Raw OCR text layers; kept separately so cleaning-rule changes never force re-recognition
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS ocr ("
+                " fingerprint TEXT, page INTEGER, backend TEXT, data BLOB,"
+                " PRIMARY KEY (fingerprint, page, backend))")
+            # Per-document header/footer profiles (layout_profile.py)
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS layouts ("
+                " fingerprint TEXT, version INTEGER, data BLOB, PRIMARY KEY (fingerprint, version))")
+
+    def register_document(self, path: str, fingerprint: str):
+        """Records the current fingerprint for a path and drops pages of its old version."""
+        with self._lock:
+            row = self._conn.execute("SELECT fingerprint FROM documents WHERE path = ?", (path,)).fetchone()
+            if row and row[0] == fingerprint:
+                return
+            with self._conn:
+                shared = row and self._conn.execute(
+                    "SELECT 1 FROM documents WHERE fingerprint = ? AND path != ?", (row[0], path)).fetchone()
+                if row and not shared:
+                    self._conn.execute("DELETE FROM pages WHERE fingerprint = ?", (row[0],))
+                    self._conn.execute("DELETE FROM ocr WHERE fingerprint = ?", (row[0],))
+                    self._conn.execute("DELETE FROM layouts WHERE fingerprint = ?", (row[0],))
+                    for key in [k for k in self._memory if k[0] == row[0]]:
+                        del self._memory[key]
+                self._conn.execute("INSERT OR REPLACE INTO documents (path, fingerprint) VALUES (?, ?)",
+                                   (path, fingerprint))
+
+    def get(self, fingerprint: str, page_num: int, doc_type: str, version: str):
+        """Returns the cached blocks for a page, or None on a miss."""
+        key = (fingerprint, page_num, doc_type, version)
+        with self._lock:
+            if key in self._memory:
+                self._memory.move_to_end(key)
+                return self._memory[key]
+            row = self._conn.execute(
+                "SELECT data FROM pages WHERE fingerprint = ? AND page = ? AND doc_type = ? AND version = ?",
+                (fingerprint, page_num, doc_type, version)).fetchone()
+            if row is None:
+                return None
+            try:
+                blocks = json.loads(zlib.decompress(row[0]))
+            except (zlib.error, ValueError):
+                return None
+            self._remember(key, blocks)
+            return blocks
+
+    def put(self, fingerprint: str, page_num: int, doc_type: str, version: str, blocks):
+        data = zlib.compress(json.dumps(blocks, separators=(",", ":")).encode("utf-8"))
+        with self._lock:
+            self._remember((fingerprint, page_num, doc_type, version), blocks)
+            try:
+                with self._conn:
+                    self._conn.execute(
+                        "INSERT OR REPLACE INTO pages (fingerprint, page, doc_type, version, data) VALUES (?, ?, ?, ?, ?)",
+                        (fingerprint, page_num, doc_type, version, data))
+            except sqlite3.Error as e:
+                print(f"Page cache write failed: {e}")
+
+    def get_ocr(self, fingerprint: str, page_num: int, backend: str):
+        """Returns a cached OCR text layer ({"blocks", "words"}) for a page, or None."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT data FROM ocr WHERE fingerprint = ? AND page = ? AND backend = ?",
+                (fingerprint, page_num, backend)).fetchone()
+        if row is None:
+            return None
+        try:
+            return json.loads(zlib.decompress(row[0]))
+        except (zlib.error, ValueError):
+            return None
+
+    def put_ocr(self, fingerprint: str, page_num: int, backend: str, layer: dict):
+        data = zlib.compress(json.dumps(layer, separators=(",", ":")).encode("utf-8"))
+        with self._lock:
+            try:
+                with self._conn:
+                    self._conn.execute(
+                        "INSERT OR REPLACE INTO ocr (fingerprint, page, backend, data) VALUES (?, ?, ?, ?)",
+                        (fingerprint, page_num, backend, data))
+            except sqlite3.Error as e:
+                print(f"OCR cache write failed: {e}")
+
+    def get_layout(self, fingerprint: str, version: int):
+        """Returns a cached layout profile dict for a document, or None."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT data FROM layouts WHERE fingerprint = ? AND version = ?", (fingerprint, version)).fetchone()
+        if row is None:
+            return None
+        try:
+            return json.loads(zlib.decompress(row[0]))
+        except (zlib.error, ValueError):
+            return None
+
+    def put_layout(self, fingerprint: str, version: int, profile: dict):
+        data = zlib.compress(json.dumps(profile, separators=(",", ":")).encode("utf-8"))
+        with self._lock:
+            try:
+                with self._conn:
+                    self._conn.execute("INSERT OR REPLACE INTO layouts (fingerprint, version, data) VALUES (?, ?, ?)",
+                                       (fingerprint, version, data))
+            except sqlite3.Error as e:
+                print(f"Layout cache write failed: {e}")
+
+    def prune_versions(self, version: str):
+        """Deletes rows written by any other extractor version."""
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM pages WHERE version != ?", (version,))
+            self._memory.clear()
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    def _remember(self, key, blocks):
+        self._memory[key] = blocks
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_entries:
+            self._memory.popitem(last=False)
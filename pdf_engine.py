@@ -1,18 +1,301 @@
 import fitz  # PyMuPDF
+import io
 import re
+import mmap
+import bisect
+import hashlib
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
 from typing import List, Generator
 
+from fingerprint import buffer_fingerprint, document_fingerprint
+from render_cache import quantize_zoom
+from text_normalizer import DEFAULT_NORMALIZER
+from layout_profile import LAYOUT_VERSION, LayoutProfile, build_layout_profile, profile_lock
+from profiling import PROFILER, timed
+
+# Bump whenever get_page_data's output shape or heuristics change so cached pages are rebuilt
+EXTRACTOR_VERSION = 4
+
+# How PDFEngine.open() reads a file: "file" lets MuPDF read the path itself; "mmap" maps the
+# file and hands MuPDF the buffer, so worker processes opening the same file share the OS page
+# cache instead of each reading (and on network mounts, fetching) it separately
+OPEN_MODES = ("file", "mmap")
+
+# Header/footer band as a fraction of page height, per document type. Used for OCR'd pages,
+# which have no text layer for the layout profile to learn their furniture from, and for
+# pages read while the profile is still being built (PDFEngine.layout_pending).
+DOC_TYPE_MARGINS = {"Book": 0.12, "Research": 0.05}
+# Every doc_type the extractor accepts; "Standard" has no margin and keeps every line
+DOC_TYPES = ("Book", "Research", "Standard")
+
+# Sentence boundary: terminal punctuation, whitespace, then an uppercase start
+_SENTENCE_BREAK = re.compile(r'(?<=[.!?])\s+(?=[A-Z])')
+
+# Longest utterance handed to the synthesizer; longer sentences break at a clause or word
+MAX_SENTENCE_CHARS = 300
+
+
+def page_text_layer(page, textpage=None) -> dict:
+    """Reads a page's text layer from one TextPage into plain, picklable data.
+
+    Returns {"blocks": [...], "words": [...]} where blocks keep the "dict" layout
+    (bbox, lines, span text) and words are [x0, y0, x1, y1, text] lists. OCR
+    backends return the same shape, so both feed the same extraction pipeline.
+    """
+    if textpage is None:
+        textpage = page.get_textpage()
+    blocks = []
+    for b in page.get_text("dict", textpage=textpage)["blocks"]:
+        if "lines" not in b: continue
+        blocks.append({
+            "bbox": list(b["bbox"]),
+            "lines": [{"bbox": list(line["bbox"]), "spans": [{"text": span["text"]} for span in line["spans"]]}
+                      for line in b["lines"]]
+        })
+    words = [list(w[:5]) for w in page.get_text("words", textpage=textpage)]
+    return {"blocks": blocks, "words": words}
+
+
+def extract_page_range(file_path: str, doc_type: str, first: int, last: int, layout: dict = None,
+                       mode: str = "file", normalizer=None):
+    """Process-pool task: opens its own document and extracts pages first..last inclusive.
+
+    Pass the document's layout profile (LayoutProfile.to_dict()) so workers do
+    not each rebuild it, and the engine's TextNormalizer when it is not the
+    default, so workers clean text with the same rules.
+    """
+    engine = PDFEngine(file_path, normalizer=normalizer, mode=mode)
+    if not engine.open():
+        raise RuntimeError(f"Could not open {file_path}")
+    if layout is not None:
+        engine.layout = LayoutProfile.from_dict(layout)
+    try:
+        return [(p, engine.get_page_data(p, doc_type=doc_type)) for p in range(first, last + 1)]
+    finally:
+        engine.close()
+
+
+def extractor_signature(normalizer=None, ocr=None) -> str:
+    """Identifies the extraction pipeline, including the cleaning rules and OCR backend, for cache keys."""
+    normalizer = normalizer or DEFAULT_NORMALIZER
+    ocr_key = ocr.backend.cache_key() if ocr is not None else None
+    rules = repr((EXTRACTOR_VERSION, normalizer.signature(), ocr_key, sorted(DOC_TYPE_MARGINS.items()), LAYOUT_VERSION))
+    return f"{EXTRACTOR_VERSION}-{hashlib.sha1(rules.encode('utf-8')).hexdigest()[:12]}"
+
+
+def sentence_spans(text: str, max_chars: int = MAX_SENTENCE_CHARS) -> List[tuple]:
+    """Returns (start, end) offsets of the sentences in text, without surrounding whitespace.
+
+    Sentences longer than max_chars are broken after the last ", " or "; "
+    before the limit, or failing that at the last space.
+    """
+    spans = []
+    start = 0
+    for end, next_start in [(m.start(), m.end()) for m in _SENTENCE_BREAK.finditer(text)] + [(len(text), None)]:
+        while max_chars and end - start > max_chars:
+            cut = max(text.rfind(", ", start, start + max_chars), text.rfind("; ", start, start + max_chars)) + 1
+            if cut <= start:
+                cut = text.rfind(" ", start, start + max_chars)
+            if cut <= start:
+                break
+            spans.append((start, cut))
+            start = cut
+        spans.append((start, end))
+        start = next_start
+
+    trimmed = []
+    for s, e in spans:
+        while s < e and text[s].isspace(): s += 1
+        while e > s and text[e - 1].isspace(): e -= 1
+        if s < e:
+            trimmed.append((s, e))
+    return trimmed
+
+
+def _token_words(text: str, words: List[dict]) -> List[List[int]]:
+    """Maps each whitespace-separated token of a cleaned block text to its word boxes.
+
+    Cleaning keeps words one-to-one except for end-of-line hyphenation, where
+    "com-" and "puter" become one token. If the counts still disagree (OCR
+    noise, unusual spacing) tokens are mapped proportionally instead.
+    """
+    tokens = [m.group(0) for m in re.finditer(r"\S+", text)]
+    mapping, wi = [], 0
+    for token in tokens:
+        if wi >= len(words):
+            break
+        indices = [wi]
+        wi += 1
+        while words[indices[-1]]["text"].endswith("-") and not token.endswith("-") and wi < len(words):
+            indices.append(wi)
+            wi += 1
+        mapping.append(indices)
+    if len(mapping) == len(tokens) and wi == len(words):
+        return mapping
+    if not tokens or not words:
+        return [[] for _ in tokens]
+    scale = len(words) / len(tokens)
+    return [list(range(int(i * scale), max(int((i + 1) * scale), int(i * scale) + 1))) for i in range(len(tokens))]
+
+
+def word_offsets(text: str, words: List[dict]) -> List[int]:
+    """Character offset in the cleaned text of the token each word box was cleaned into.
+
+    Offsets are non-decreasing, so word_at() finds the box under any text
+    position (e.g. a speech boundary event) by bisection.
+    """
+    offsets = [len(text)] * len(words)
+    starts = [m.start() for m in re.finditer(r"\S+", text)]
+    for start, indices in zip(starts, _token_words(text, words)):
+        for i in indices:
+            offsets[i] = min(offsets[i], start)
+    return offsets
+
+
+def word_at(offsets: List[int], position: int) -> int:
+    """Index of the word box covering a character position of the block text, -1 before the first."""
+    return bisect.bisect_right(offsets, position) - 1
+
+
+def block_sentences(block: dict, max_chars: int = MAX_SENTENCE_CHARS) -> List[dict]:
+    """Splits a block into sentence-sized utterances mapped back onto the page.
+
+    Each sentence has its text, start/end offsets into block["text"], the word
+    boxes it covers, the indices of the block lines those words sit on, and
+    the bbox of those words (the block bbox if it has none).
+    """
+    text, words, lines = block["text"], block.get("words", []), block.get("lines", [])
+    offsets = block.get("offsets") or word_offsets(text, words)
+
+    sentences = []
+    for start, end in sentence_spans(text, max_chars):
+        boxes = [w["bbox"] for w in words[bisect.bisect_left(offsets, start):bisect.bisect_left(offsets, end)]]
+        line_ids = sorted({li for box in boxes for li, line in enumerate(lines)
+                           if line["bbox"][1] <= (box[1] + box[3]) / 2 <= line["bbox"][3]})
+        bbox = ([min(b[0] for b in boxes), min(b[1] for b in boxes), max(b[2] for b in boxes), max(b[3] for b in boxes)]
+                if boxes else list(block["bbox"]))
+        sentences.append({"text": text[start:end], "start": start, "end": end,
+                          "words": boxes, "lines": line_ids, "bbox": bbox})
+    return sentences
+
+
+def _mappable(stream) -> bool:
+    """Whether a stream is a real file at its start, which can be memory-mapped whole."""
+    try:
+        stream.fileno()
+        return stream.tell() == 0
+    except (AttributeError, OSError, ValueError):
+        return False
+
+
 class PDFEngine:
-    def __init__(self, file_path: str):
+    """Text extraction and rendering for one PDF.
+
+    The document is read from file_path in one of OPEN_MODES, or from memory
+    with from_bytes()/from_stream(). close() closes the document and then
+    releases any mapping or buffer open() created; pages must not be used
+    after it.
+    """
+
+    def __init__(self, file_path: str, cache=None, render_cache=None, normalizer=None, ocr=None, mode: str = "file"):
+        if mode not in OPEN_MODES:
+            raise ValueError(f"Unknown open mode {mode!r}; expected one of {OPEN_MODES}")
         self.file_path = file_path
+        # "file" or "mmap"; "bytes" or "stream" for engines made by from_bytes()/from_stream()
+        self.mode = mode
+        self._source = None  # The bytes or stream of an in-memory engine
+        self._file = None
+        self._mmap = None
+        self._buffer = None  # memoryview MuPDF reads from, released by close()
         self.doc = None
         self.total_pages = 0
         self.is_scanned = False
+        # Optional PageCache shared across engines; keyed by the document fingerprint
+        self.cache = cache
+        self.fingerprint = None
+        # Optional RenderCache for this document's rasterized pages
+        self.render_cache = render_cache
+        # Render pages that contain no images in grayscale (one third of the bytes)
+        self.grayscale_text_pages = False
+        self._colorspaces = {}
+        # TextNormalizer holding the cleaning rules; shared default unless customized
+        self.normalizer = normalizer or DEFAULT_NORMALIZER
+        # Optional OCRPipeline for pages that have no text layer
+        self.ocr = ocr
+        self.ocr_pages = set()
+        # False makes scanned pages not yet recognized come back empty instead of blocking;
+        # their Futures are in ocr_pending so the caller can read them again when done
+        self.ocr_wait = True
+        self.ocr_pending = {}
+        # Pages extracted without their OCR (failed or still running); never cached, so they are re-read
+        self._ocr_missing = set()
+        # LayoutProfile of the document's running heads/footers; see layout_profile()
+        self.layout = None
+        # Set while the profile is built elsewhere: pages use fixed margins and are not cached
+        self.layout_pending = False
+
+    @classmethod
+    def from_bytes(cls, data, **kwargs):
+        """An engine over a PDF held in memory (bytes, bytearray or memoryview); nothing is copied.
+
+        There is no path, so OCR and process-pool extraction are unavailable;
+        the page cache is keyed by the content fingerprint as usual.
+        """
+        engine = cls(None, **kwargs)
+        engine.mode = "bytes"
+        engine._source = data
+        return engine
+
+    @classmethod
+    def from_stream(cls, stream, **kwargs):
+        """An engine over a binary file-like object, which the caller keeps open and closes.
+
+        Real files positioned at their start are memory-mapped; other streams
+        are read into memory once, from their current position.
+        """
+        engine = cls(None, **kwargs)
+        engine.mode = "stream"
+        engine._source = stream
+        return engine
+
+    def _open_document(self):
+        """Opens self.doc according to self.mode."""
+        if self.mode == "file":
+            return fitz.open(self.file_path)
+        if self.mode == "mmap":
+            self._file = open(self.file_path, "rb")
+            self._map(self._file)
+        elif self.mode == "stream":
+            if _mappable(self._source):
+                self._map(self._source)
+            else:
+                self._buffer = memoryview(self._source.read())
+        else:
+            self._buffer = memoryview(self._source)
+        return fitz.open(stream=self._buffer, filetype="pdf")
+
+    def _map(self, f):
+        self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self._buffer = memoryview(self._mmap)
+
+    def _release(self):
+        # Only once MuPDF is done with the buffer: it reads through it without holding an export
+        if self._buffer is not None:
+            self._buffer.release()
+            self._buffer = None
+        if self._mmap is not None:
+            self._mmap.close()
+            self._mmap = None
+        if self._file is not None:
+            self._file.close()
+            self._file = None
 
+    @timed("pdf.open")
     def open(self) -> bool:
         """Opens the PDF document and checks if it's readable."""
         try:
-            self.doc = fitz.open(self.file_path)
+            self.doc = self._open_document()
             self.total_pages = len(self.doc)
             
             # Check if likely scanned (very little text in first few pages)
@@ -22,15 +305,27 @@ class PDFEngine:
             
             if len(sample_text.strip()) < 50:
                 self.is_scanned = True
+
+            if self.file_path is None:
+                # In-memory documents have no path to register, but the same content shares cache rows
+                self.fingerprint = buffer_fingerprint(self._buffer) if self.cache is not None else None
+            elif self.cache is not None or self.ocr is not None:
+                self.fingerprint = document_fingerprint(self.file_path)
+            if self.cache is not None and self.file_path is not None:
+                self.cache.register_document(self.file_path, self.fingerprint)
                 
             return True
         except Exception as e:
             print(f"Error opening PDF: {e}")
+            self.close()
             return False
 
     def close(self):
-        if self.doc:
+        """Closes the document and releases its file mapping or buffer. Safe to call more than once."""
+        if self.doc is not None:
             self.doc.close()
+            self.doc = None
+        self._release()
 
     def get_page_size(self, page_num: int):
         """Returns (width, height) of the original PDF page."""
@@ -39,47 +334,250 @@ class PDFEngine:
         page = self.doc[page_num - 1]
         return page.rect.width, page.rect.height
 
+    @timed("pdf.get_page_image")
     def get_page_image(self, page_num: int, zoom: float = 2.0):
         """Returns a PIL image of the specified page."""
+        data = self.get_page_pnm(page_num, zoom)
+        if data is None:
+            return None
+
+        from PIL import Image
+        return Image.open(io.BytesIO(data))
+
+    def get_page_pnm(self, page_num: int, zoom: float = 2.0):
+        """Returns the page rendered as binary PPM (or PGM in grayscale mode) bytes.
+
+        This is the display path: Tk's photo image reads these bytes directly, so no
+        PIL image is created. The zoom is snapped with quantize_zoom so renders can
+        be shared via the render cache.
+        """
+        return self._render_pnm(page_num, zoom)
+
+    def peek_page_pnm(self, page_num: int, zoom: float):
+        """Returns the cached render of a page at this zoom without rasterizing, or None."""
+        if self.render_cache is None or not self.doc or page_num < 1 or page_num > self.total_pages:
+            return None
+        return self.render_cache.get(page_num, quantize_zoom(zoom), self._page_colorspace(page_num))
+
+    def get_page_preview(self, page_num: int, zoom: float, scale: float = 0.25):
+        """Returns a quick low-resolution stand-in for get_page_pnm, upscaled to the same size.
+
+        Reuses a cached render of the page at any zoom when available, otherwise
+        rasterizes at zoom * scale.
+        """
         if not self.doc or page_num < 1 or page_num > self.total_pages:
             return None
-        
-        page = self.doc[page_num - 1]
-        mat = fitz.Matrix(zoom, zoom)
-        pix = page.get_pixmap(matrix=mat)
-        
+
         from PIL import Image
-        img = Image.frombytes("RGB", [pix.width, pix.height], pix.samples)
-        return img
+        zoom = quantize_zoom(zoom)
+        page = self.doc[page_num - 1]
+        colorspace = self._page_colorspace(page_num)
+        target = (page.rect * fitz.Matrix(zoom, zoom)).irect
+        cached = self.render_cache.best_for_page(page_num, colorspace) if self.render_cache is not None else None
+        if cached is not None:
+            img = Image.open(io.BytesIO(cached))
+        else:
+            pix = page.get_pixmap(matrix=fitz.Matrix(zoom * scale, zoom * scale), colorspace=self._fitz_colorspace(colorspace))
+            img = Image.frombytes("L" if pix.n == 1 else "RGB", [pix.width, pix.height], pix.samples)
+        img = img.resize((target.width, target.height), Image.NEAREST)
+        magic = b"P5" if img.mode == "L" else b"P6"
+        return b"%s\n%d %d\n255\n" % (magic, img.width, img.height) + img.tobytes()
+
+    def get_page_tile(self, page_num: int, zoom: float, col: int, row: int, tile_size: int = 512):
+        """Returns one tile_size x tile_size tile of the page rendered at zoom, as PNM bytes.
+
+        Tile (col, row) covers pixels [col*tile_size, (col+1)*tile_size) horizontally and
+        likewise vertically; edge tiles are cropped to the page.
+        """
+        return self._render_pnm(page_num, zoom, tile=(col, row, tile_size))
+
+    @timed("pdf.render")
+    def _render_pnm(self, page_num: int, zoom: float, tile=None):
+        if not self.doc or page_num < 1 or page_num > self.total_pages:
+            return None
+
+        zoom = quantize_zoom(zoom)
+        colorspace = self._page_colorspace(page_num)
+        if self.render_cache is not None:
+            data = self.render_cache.get(page_num, zoom, colorspace, tile=tile)
+            if data is not None:
+                return data
 
+        page = self.doc[page_num - 1]
+        clip = None
+        if tile is not None:
+            col, row, tile_size = tile
+            span = tile_size / zoom
+            clip = fitz.Rect(page.rect.x0 + col * span, page.rect.y0 + row * span,
+                             page.rect.x0 + (col + 1) * span, page.rect.y0 + (row + 1) * span) & page.rect
+            if clip.is_empty:
+                return None
+        pix = page.get_pixmap(matrix=fitz.Matrix(zoom, zoom), clip=clip, colorspace=self._fitz_colorspace(colorspace))
+        data = pix.tobytes("pnm")
+        if self.render_cache is not None:
+            self.render_cache.put(page_num, zoom, colorspace, data, tile=tile)
+        return data
+
+    def _page_colorspace(self, page_num: int) -> str:
+        """"GRAY" for pages without images when grayscale_text_pages is on, else "RGB"."""
+        if not self.grayscale_text_pages:
+            return "RGB"
+        colorspace = self._colorspaces.get(page_num)
+        if colorspace is None:
+            colorspace = "RGB" if self.doc[page_num - 1].get_images() else "GRAY"
+            self._colorspaces[page_num] = colorspace
+        return colorspace
+
+    def layout_profile(self, build: bool = True) -> LayoutProfile:
+        """Returns the document's header/footer profile, built in one pass on first use.
+
+        Profiles are stored in the page cache under the document fingerprint, so
+        each document is analysed once however many engines open it. With
+        build=False only an already cached profile is returned, else None.
+        """
+        if self.layout is not None or not self.doc:
+            return self.layout
+        if not build:
+            return self._cached_layout()
+        with profile_lock(self.fingerprint or self.file_path):
+            if self._cached_layout() is not None:
+                return self.layout
+            with PROFILER.span("extract.layout_profile"):
+                self.layout = build_layout_profile(self.doc)
+            if self.cache is not None and self.fingerprint:
+                self.cache.put_layout(self.fingerprint, LAYOUT_VERSION, self.layout.to_dict())
+        return self.layout
+
+    def _cached_layout(self):
+        data = self.cache.get_layout(self.fingerprint, LAYOUT_VERSION) if self.cache is not None and self.fingerprint else None
+        if data is not None:
+            self.layout = LayoutProfile.from_dict(data)
+        return self.layout
+
+    @staticmethod
+    def _fitz_colorspace(colorspace: str):
+        return fitz.csGRAY if colorspace == "GRAY" else fitz.csRGB
+
+    @timed("pdf.get_page_data")
     def get_page_data(self, page_num: int, doc_type: str = "Book"):
         """Returns paragraphs with both full text and word-level coordinate maps."""
         if not self.doc:
             return []
 
+        if self.cache is None or not self.fingerprint:
+            return self._extract_page_data(page_num, doc_type)
+
+        version = extractor_signature(self.normalizer, self.ocr)
+        blocks = self.cache.get(self.fingerprint, page_num, doc_type, version)
+        if blocks is None:
+            blocks = self._extract_page_data(page_num, doc_type)
+            if page_num in self._ocr_missing:
+                self._ocr_missing.discard(page_num)
+            elif not self.layout_pending:
+                self.cache.put(self.fingerprint, page_num, doc_type, version, blocks)
+        return blocks
+
+    def iter_blocks(self, doc_type: str = "Book", start_page: int = 1, end_page: int = None,
+                    workers: int = 0, pages_per_task: int = 16) -> Generator[dict, None, None]:
+        """Streams every block of the document in page order, each tagged with its "page".
+
+        With workers > 1, page ranges are extracted in a process pool where each
+        worker opens its own copy of the document, in this engine's open mode.
+        Results are re-ordered so the stream matches the serial one, and at most
+        2 * workers ranges are in flight so memory stays bounded however long the
+        document is. In-memory engines have no file for workers to open, and
+        engines with an OCR pipeline need it for scanned pages, so both always
+        extract serially.
+        """
+        if not self.doc:
+            return
+        end_page = min(end_page or self.total_pages, self.total_pages)
+        if start_page > end_page:
+            return
+
+        if workers <= 1 or self.file_path is None or self.ocr is not None:
+            for page_num in range(start_page, end_page + 1):
+                for block in self.get_page_data(page_num, doc_type=doc_type):
+                    yield dict(block, page=page_num)
+            return
+
+        ranges = [(first, min(first + pages_per_task - 1, end_page))
+                  for first in range(start_page, end_page + 1, pages_per_task)]
+        layout = self.layout_profile().to_dict()
+        normalizer = None if self.normalizer is DEFAULT_NORMALIZER else self.normalizer
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            pending = deque()
+            next_range = 0
+            try:
+                while pending or next_range < len(ranges):
+                    while next_range < len(ranges) and len(pending) < workers * 2:
+                        first, last = ranges[next_range]
+                        pending.append(pool.submit(extract_page_range, self.file_path, doc_type, first, last, layout,
+                                                   self.mode, normalizer))
+                        next_range += 1
+                    for page_num, blocks in pending.popleft().result():
+                        if self.cache is not None and self.fingerprint:
+                            self.cache.put(self.fingerprint, page_num, doc_type, extractor_signature(self.normalizer, self.ocr), blocks)
+                        for block in blocks:
+                            yield dict(block, page=page_num)
+            finally:
+                # Consumer stopped early: drop ranges that have not started yet
+                for future in pending:
+                    future.cancel()
+
+    def get_blocks(self, doc_type: str = "Book", **kwargs) -> Generator[dict, None, None]:
+        """Alias of iter_blocks for whole-document reading."""
+        return self.iter_blocks(doc_type=doc_type, **kwargs)
+
+    def _extract_page_data(self, page_num: int, doc_type: str):
+        """Runs the full extraction pipeline for one page, bypassing any cache."""
         page = self.doc[page_num - 1]
         page_height = page.rect.height
-        
-        if doc_type == "Book":
-            margin = page_height * 0.12
-        elif doc_type == "Research":
-            margin = page_height * 0.05
+
+        # One shared TextPage per page: dict and word extraction both read from it.
+        # Pages are classified lazily: no words plus embedded images means a scan.
+        with PROFILER.span("extract.text_layer"):
+            layer = page_text_layer(page)
+        if not layer["words"] and self.ocr is not None and self.file_path is not None and page.get_images():
+            with PROFILER.span("extract.ocr"):
+                recognized = self.ocr.recognize(self.file_path, self.fingerprint, page_num, wait=self.ocr_wait)
+            if isinstance(recognized, Future):
+                self.ocr_pending[page_num] = recognized
+                self._ocr_missing.add(page_num)
+            else:
+                self.ocr_pending.pop(page_num, None)
+                if recognized:
+                    layer = recognized
+                    self.ocr_pages.add(page_num)
+                else:
+                    self._ocr_missing.add(page_num)
+        blocks = [b for b in layer["blocks"] if "lines" in b]
+
+        # Running heads, footers and page numbers come from the document's layout
+        # profile; OCR'd pages, and any page read before the profile is ready,
+        # fall back to a fixed band at the top and bottom. Doc types without a
+        # margin ("Standard") keep every line.
+        margin = 0
+        furniture = set()
+        if doc_type not in DOC_TYPE_MARGINS:
+            pass
+        elif page_num in self.ocr_pages or self.layout_pending:
+            margin = page_height * DOC_TYPE_MARGINS.get(doc_type, 0)
         else:
-            margin = 0
-            
+            page_lines = [(" ".join(span["text"] for span in line["spans"]), line["bbox"])
+                          for b in blocks for line in b["lines"]]
+            furniture = self.layout_profile().furniture_lines(page_lines, page_height, page_num)
         content_top, content_bottom = margin, page_height - margin
 
-        # Get detailed text with dictionary format for line-level control
-        blocks = page.get_text("dict")["blocks"]
-        final_blocks = []
-        
+        raw_blocks = []
+        line_id = -1  # Position in page_lines, which furniture indexes
         for b in blocks:
-            if "lines" not in b: continue
-            
             block_text = ""
             block_lines = []
             
             for line in b["lines"]:
+                line_id += 1
+                if line_id in furniture: continue
                 line_text = ""
                 for span in line["spans"]:
                     line_text += span["text"] + " "
@@ -90,16 +588,43 @@ class PDFEngine:
                     "text": line_text.strip()
                 })
             
-            cleaned = self._clean_text(block_text)
+            if not block_lines: continue
+            bbox = b["bbox"]
+            if len(block_lines) < len(b["lines"]):
+                # Shrink the block to the lines that are left so words are assigned to it correctly
+                bbox = [min(l["bbox"][0] for l in block_lines), min(l["bbox"][1] for l in block_lines),
+                        max(l["bbox"][2] for l in block_lines), max(l["bbox"][3] for l in block_lines)]
+            raw_blocks.append((block_text, bbox, block_lines))
+
+        # Clean the whole page's text in one batch
+        final_blocks = []
+        with PROFILER.span("extract.clean"):
+            cleaned_texts = self.normalizer.clean_many([raw[0] for raw in raw_blocks])
+        for cleaned, (_, bbox, block_lines) in zip(cleaned_texts, raw_blocks):
             if cleaned:
-                # Store the block with its internal lines and word mapping
+                # Store the block with its internal lines; words are assigned below
                 final_blocks.append({
                     "text": cleaned,
-                    "bbox": list(b["bbox"]),
+                    "bbox": list(bbox),
                     "lines": block_lines,
-                    "words": self._extract_word_boxes(page, b["bbox"])
+                    "words": []
                 })
 
+        # Assign every word on the page to its block(s) in a single pass
+        with PROFILER.span("extract.word_boxes"):
+            word_lists = self._extract_word_boxes(page, [b["bbox"] for b in final_blocks], words=layer["words"])
+        for block, words in zip(final_blocks, word_lists):
+            block["words"] = words
+
+        result = self._merge_blocks(final_blocks, margin, content_top, content_bottom)
+        # Align the cleaned text with the word boxes, for word-level highlighting
+        for block in result:
+            block["offsets"] = word_offsets(block["text"], block["words"])
+        return result
+
+    @timed("extract.merge")
+    def _merge_blocks(self, final_blocks, margin, content_top, content_bottom):
+        """Merges vertically adjacent blocks into paragraphs and drops header/footer blocks."""
         # Merge blocks heuristic (natural paragraphs)
         merged = []
         if not final_blocks: return []
@@ -113,6 +638,7 @@ class PDFEngine:
             if 0 <= dist < 12:
                 curr["text"] += " " + nxt["text"]
                 curr["lines"].extend(nxt["lines"])
+                curr["words"].extend(nxt["words"])
                 curr["bbox"][0] = min(curr["bbox"][0], nxt["bbox"][0])
                 curr["bbox"][2] = max(curr["bbox"][2], nxt["bbox"][2])
                 curr["bbox"][3] = nxt["bbox"][3]
@@ -130,68 +656,51 @@ class PDFEngine:
                 
         return result
 
-    def _extract_word_boxes(self, page, block_bbox):
-        """Extracts individual word bounding boxes within a specific area."""
-        all_words = page.get_text("words")
-        found = []
-        bx0, by0, bx1, by1 = block_bbox
-        
+    def _extract_word_boxes(self, page, block_bboxes, textpage=None, words=None):
+        """Extracts word bounding boxes once and buckets them into each block area.
+
+        Returns one list of words per bbox in `block_bboxes`, in page word order.
+        A word belongs to every block whose bbox contains the word's center.
+        Pass `words` to reuse an already extracted word list.
+        """
+        found = [[] for _ in block_bboxes]
+        if not block_bboxes:
+            return found
+
+        all_words = words if words is not None else page.get_text("words", textpage=textpage)
+
+        # Coarse horizontal bands over the page: each block is registered in every
+        # band it spans, so a word only tests the few blocks sharing its band.
+        page_y0, page_y1 = page.rect.y0, page.rect.y1
+        band_count = max(1, min(64, len(block_bboxes)))
+        band_h = max(1.0, (page_y1 - page_y0) / band_count)
+        bands = [[] for _ in range(band_count)]
+        for idx, (bx0, by0, bx1, by1) in enumerate(block_bboxes):
+            first = min(band_count - 1, max(0, int((by0 - page_y0) // band_h)))
+            last = min(band_count - 1, max(0, int((by1 - page_y0) // band_h)))
+            for band in range(first, last + 1):
+                bands[band].append((idx, bx0, by0, bx1, by1))
+
         for w in all_words:
             # Check if word center is inside block bbox
             wx_mid = (w[0] + w[2]) / 2
             wy_mid = (w[1] + w[3]) / 2
-            if bx0 <= wx_mid <= bx1 and by0 <= wy_mid <= by1:
-                found.append({
-                    "text": w[4],
-                    "bbox": [w[0], w[1], w[2], w[3]]
-                })
+            band = min(band_count - 1, max(0, int((wy_mid - page_y0) // band_h)))
+            for idx, bx0, by0, bx1, by1 in bands[band]:
+                if bx0 <= wx_mid <= bx1 and by0 <= wy_mid <= by1:
+                    found[idx].append({
+                        "text": w[4],
+                        "bbox": [w[0], w[1], w[2], w[3]]
+                    })
         return found
 
     def _clean_text(self, text: str) -> str:
         """Cleans up PDF artifacts and corrects font-mapping errors."""
-        # Replace ligatures and specialized characters
-        replacements = {
-            "ﬀ": "ff", "ﬁ": "fi", "ﬂ": "fl", "ﬃ": "ffi", "ﬄ": "ffl",
-            "ﬅ": "st", "ﬆ": "st", "\u00ad": "", "\u2010": "-", "\u2011": "-",
-            "\u2012": "-", "\u2013": "-", "\u2014": "--", "\u2018": "'",
-            "\u2019": "'", "\u201c": '"', "\u201d": '"', "\u2026": "...",
-        }
-        for old, new in replacements.items():
-            text = text.replace(old, new)
-            
-        # Remove end-of-line hyphenation (e.g. "com- puter" -> "computer")
-        # Note: We look for a hyphen followed by a space because multiple spans 
-        # were joined with spaces in get_page_data.
-        text = re.sub(r"(\w+)-\s+(\w+)", r"\1\2", text)
-
-        # Correct common font-mapping/OCR errors
-        corrections = {
-            r"\bclifferent\b": "different",
-            r"\bcitYerent\b": "different",
-            r"\btl1at\b": "that",
-            r"\btllat\b": "that",
-            r"\bvvith\b": "with",
-            r"\bl\b": "I", # Standalone lowercase L as capital I
-        }
-        
-        # Heuristic for standalone 'J' or '1' as 'I'
-        text = re.sub(r"\b[J1]\b", "I", text) 
-        
-        for pattern, replacement in corrections.items():
-            text = re.sub(pattern, replacement, text, flags=re.IGNORECASE)
-
-        # Replace multiple spaces/newlines with single space
-        text = re.sub(r"\s+", " ", text)
-        
-        return text.strip()
+        return self.normalizer.clean(text)
 
     def _split_into_sentences(self, text: str) -> List[str]:
         """Splits text into meaningful sentences/chunks for TTS."""
-        # Simple regex-based sentence splitter
-        # Look for punctuation followed by space and uppercase
-        sentence_endings = r'(?<=[.!?])\s+(?=[A-Z])|(?<=[.!?])\s*$'
-        sentences = re.split(sentence_endings, text)
-        return [s.strip() for s in sentences if s.strip()]
+        return [text[s:e] for s, e in sentence_spans(text)]
 
 if __name__ == "__main__":
     # Quick debug test
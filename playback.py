@@ -0,0 +1,189 @@
+import time
+import threading
+from collections import deque
+from typing import Callable, List
+
+from profiling import PROFILER
+
+
+class PlaybackController:
+    """Reads a document sentence by sentence through TTSEngine events, with no polling.
+
+    Blocks are split with block_sentences(), so starting, clicking into a
+    paragraph or skipping costs one sentence of synthesis latency rather than
+    a whole (possibly page-long) block. The next sentence is queued on the
+    synthesizer as soon as the current one starts, so there is no gap between
+    sentences, paragraphs or pages. Events are tagged with a generation
+    number; anything from before the latest play()/stop() is ignored.
+
+    get_blocks(page) returns the blocks of a page; post(fn) runs fn on the
+    caller's thread (the Tk app passes `lambda fn: self.after(0, fn)`).
+    on_sentence(page, block, index, sentence) fires when a sentence starts
+    playing, on_word(page, block, offset) as each word is spoken (offset into
+    the block text) and on_finished() when the end of the document is reached.
+    """
+
+    def __init__(self, tts, get_blocks: Callable[[int], List[dict]], total_pages: Callable[[], int],
+                 post: Callable = None, ahead: int = 1):
+        self.tts = tts
+        self.get_blocks = get_blocks
+        self.total_pages = total_pages
+        self.post = post or (lambda fn: fn())
+        self.ahead = ahead
+        self.on_sentence = None
+        self.on_word = None
+        self.on_finished = None
+        self.is_playing = False
+        self.current = None  # (page, block, sentence) being spoken
+        self._generation = 0
+        self._cursor = None  # Next (page, block, sentence) to queue, None past the end
+        self._queued = deque()
+        self._sentences = {}
+        self._finished_at = None  # (tag, perf_counter) of the last finished utterance, for gap timing
+        self._lock = threading.RLock()
+        tts.on_started = lambda tag: self.post(lambda: self._on_started(tag))
+        tts.on_word = lambda tag, start, length: self.post(lambda: self._on_word(tag, start))
+        tts.on_finished = lambda tag: self.post(lambda: self._on_finished(tag))
+
+    def play(self, page: int, block: int = 0, sentence: int = 0):
+        """Starts reading at a sentence, dropping whatever was playing or queued."""
+        with self._lock:
+            self._generation += 1
+            self._queued.clear()
+            self._sentences.clear()
+            self.tts.stop()
+            self.is_playing = True
+            self.current = None
+            self._cursor = self._normalize((page, block, sentence))
+            self._fill_queue()
+            if not self._queued:
+                self.is_playing = False
+
+    def skip(self, delta: int):
+        """Restarts playback delta sentences after (or before, if negative) the current one."""
+        with self._lock:
+            if not self.is_playing or self.current is None:
+                return
+            pos = self.current
+            for _ in range(abs(delta)):
+                step = self._normalize((pos[0], pos[1], pos[2] + 1)) if delta > 0 else self._previous(pos)
+                if step is None:
+                    break
+                pos = step
+        self.play(*pos)
+
+    def stop(self):
+        with self._lock:
+            self._generation += 1
+            self._queued.clear()
+            self._cursor = None
+            self.is_playing = False
+            self.current = None
+        self.tts.stop()
+
+    def pause(self):
+        self.tts.pause()
+
+    def resume(self):
+        self.tts.resume()
+
+    def sentences(self, page: int, block: int) -> List[dict]:
+        key = (page, block)
+        if key not in self._sentences:
+            from pdf_engine import block_sentences  # Deferred so importing playback does not load PyMuPDF
+            blocks = self.get_blocks(page)
+            self._sentences[key] = block_sentences(blocks[block]) if block < len(blocks) else []
+        return self._sentences[key]
+
+    def _normalize(self, pos):
+        """Moves a position past exhausted blocks and pages; None past the end."""
+        page, block, sentence = pos
+        while True:
+            if block >= len(self.get_blocks(page)):
+                if page >= self.total_pages():
+                    return None
+                page, block, sentence = page + 1, 0, 0
+            elif sentence >= len(self.sentences(page, block)):
+                block, sentence = block + 1, 0
+            else:
+                return page, block, sentence
+
+    def _previous(self, pos):
+        page, block, sentence = pos
+        if sentence > 0:
+            return page, block, sentence - 1
+        while True:
+            if block > 0:
+                block -= 1
+            elif page > 1:
+                page -= 1
+                block = len(self.get_blocks(page)) - 1
+                if block < 0:
+                    continue
+            else:
+                return None
+            count = len(self.sentences(page, block))
+            if count:
+                return page, block, count - 1
+
+    def _fill_queue(self):
+        # The current utterance plus `ahead` more
+        while self._cursor is not None and len(self._queued) <= self.ahead:
+            page, block, sentence = self._cursor
+            tag = (self._generation, page, block, sentence)
+            self.tts.enqueue(self.sentences(page, block)[sentence]["text"], tag)
+            self._queued.append(tag)
+            self._cursor = self._normalize((page, block, sentence + 1))
+        # Keep only the sentences of blocks that are still in play
+        if len(self._sentences) > 8 and self._queued:
+            keep = {tag[1:3] for tag in self._queued}
+            self._sentences = {k: v for k, v in self._sentences.items() if k in keep}
+
+    def _is_current(self, tag) -> bool:
+        return isinstance(tag, tuple) and tag[0] == self._generation
+
+    def _on_started(self, tag):
+        with self._lock:
+            if not self._is_current(tag):
+                return
+            self.current = tag[1:]
+            self._record_gap(tag)
+            self._fill_queue()
+            sentence = self.sentences(*tag[1:3])[tag[3]]
+        if self.on_sentence:
+            self.on_sentence(*tag[1:], sentence)
+
+    def _on_word(self, tag, start):
+        with self._lock:
+            if not self._is_current(tag) or tag[1:] != self.current:
+                return
+            offset = self.sentences(*tag[1:3])[tag[3]]["start"] + start
+        if self.on_word:
+            self.on_word(tag[1], tag[2], offset)
+
+    def _on_finished(self, tag):
+        with self._lock:
+            if not self._is_current(tag):
+                return
+            if tag in self._queued:
+                self._queued.remove(tag)
+            if PROFILER.enabled:
+                self._finished_at = (tag, time.perf_counter())
+            self._fill_queue()
+            done = not self._queued
+            if done:
+                self.is_playing = False
+                self.current = None
+        if done and self.on_finished:
+            self.on_finished()
+
+    def _record_gap(self, tag):
+        """Times the silence between the previous utterance finishing and this one starting."""
+        if not PROFILER.enabled or self._finished_at is None:
+            return
+        previous, finished = self._finished_at
+        self._finished_at = None
+        if previous[0] != tag[0]:
+            return
+        kind = "page" if previous[1] != tag[1] else "block" if previous[2] != tag[2] else "sentence"
+        PROFILER.record(f"playback.{kind}_gap", time.perf_counter() - finished, finished)
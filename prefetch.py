@@ -0,0 +1,128 @@
+import threading
+from collections import deque
+
+from pdf_engine import PDFEngine
+
+
+class PagePrefetcher:
+    """Prepares the pages after the reading position on a background thread.
+
+    The worker opens its own PDFEngine on the same file. Text blocks go into the
+    shared PageCache and rendered images into the shared RenderCache, so the
+    reader's own get_page_data/get_page_pnm calls become cache hits. Every call
+    to schedule() starts a new generation and drops work queued for the old one.
+
+    request_render() puts a single full-resolution render ahead of the look-ahead
+    queue; a newer request replaces one that has not started yet.
+
+    With layout_pending, the caller is building the document's layout profile
+    and hands it over with set_layout(); until then pages are read with the
+    fixed margins (and not cached), so the worker never waits on that pass.
+    """
+
+    def __init__(self, file_path: str, cache=None, render_cache=None, depth: int = 2,
+                 grayscale_text_pages: bool = False, ocr=None, open_mode: str = "file", layout_pending: bool = False):
+        self.file_path = file_path
+        self.layout_pending = layout_pending
+        self._layout = None
+        self.open_mode = open_mode
+        self.ocr = ocr
+        self.grayscale_text_pages = grayscale_text_pages
+        self.cache = cache
+        self.render_cache = render_cache
+        self.depth = max(0, depth)
+        self._jobs = deque()
+        self._urgent = None
+        self._generation = 0
+        self._closed = False
+        self._cond = threading.Condition()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def schedule(self, page_num: int, doc_type: str, zoom: float):
+        """Queues pages page_num+1 .. page_num+depth, cancelling any earlier look-ahead.
+
+        Pass zoom=None to prefetch text only, e.g. when pages are shown as viewport tiles.
+        """
+        with self._cond:
+            self._generation += 1
+            self._jobs.clear()
+            for p in range(page_num + 1, page_num + self.depth + 1):
+                self._jobs.append((self._generation, p, doc_type, zoom))
+            self._cond.notify()
+
+    def request_render(self, page_num: int, zoom: float, on_done):
+        """Renders a page into the RenderCache next, then calls on_done(page_num, zoom) on the worker thread."""
+        with self._cond:
+            self._urgent = (page_num, zoom, on_done)
+            self._cond.notify()
+
+    def set_layout(self, profile):
+        """Gives the worker the document's LayoutProfile once it is built."""
+        with self._cond:
+            self._layout = profile
+
+    def cancel(self):
+        with self._cond:
+            self._generation += 1
+            self._jobs.clear()
+
+    def close(self):
+        with self._cond:
+            self._closed = True
+            self._generation += 1
+            self._jobs.clear()
+            self._urgent = None
+            self._cond.notify()
+
+    def join(self, timeout: float = None):
+        """Waits for the worker to finish its current page after close()."""
+        self._thread.join(timeout)
+
+    def _is_current(self, generation: int) -> bool:
+        with self._cond:
+            return generation == self._generation and not self._closed
+
+    def _run(self):
+        engine = PDFEngine(self.file_path, cache=self.cache, render_cache=self.render_cache, ocr=self.ocr,
+                           mode=self.open_mode)
+        engine.grayscale_text_pages = self.grayscale_text_pages
+        if not engine.open():
+            return
+        engine.layout_pending = self.layout_pending
+        try:
+            while True:
+                with self._cond:
+                    while not self._jobs and not self._urgent and not self._closed:
+                        self._cond.wait()
+                    if self._closed:
+                        return
+                    urgent, self._urgent = self._urgent, None
+                    if not urgent:
+                        generation, page_num, doc_type, zoom = self._jobs.popleft()
+                    if engine.layout_pending and self._layout is not None:
+                        engine.layout, engine.layout_pending = self._layout, False
+
+                if urgent:
+                    self._render_urgent(engine, *urgent)
+                    continue
+
+                if page_num > engine.total_pages:
+                    continue
+                try:
+                    if self.cache is not None:
+                        engine.get_page_data(page_num, doc_type=doc_type)
+                    if zoom is not None and self.render_cache is not None and self._is_current(generation):
+                        engine.get_page_pnm(page_num, zoom=zoom)
+                except Exception as e:
+                    print(f"Prefetch of page {page_num} failed: {e}")
+        finally:
+            engine.close()
+
+    def _render_urgent(self, engine, page_num, zoom, on_done):
+        try:
+            engine.get_page_pnm(page_num, zoom=zoom)
+        except Exception as e:
+            print(f"Render of page {page_num} failed: {e}")
+            return
+        on_done(page_num, zoom)
@@ -0,0 +1,197 @@
+import os
+import json
+import math
+import time
+import threading
+import functools
+from collections import deque
+
+# Histogram buckets: 10 per decade from 1 µs to 100 s (upper bounds, in seconds)
+_BUCKETS_PER_DECADE = 10
+_MIN_EXP, _MAX_EXP = -6, 2
+_BOUNDS = [10 ** (_MIN_EXP + i / _BUCKETS_PER_DECADE)
+           for i in range((_MAX_EXP - _MIN_EXP) * _BUCKETS_PER_DECADE + 1)]
+
+
+class Histogram:
+    """Log-bucketed latency histogram; percentiles are accurate to one bucket (~26%)."""
+
+    def __init__(self):
+        self.counts = [0] * (len(_BOUNDS) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.min = math.inf
+        self.max = 0.0
+
+    def add(self, seconds: float):
+        if seconds <= _BOUNDS[0]:
+            index = 0
+        else:
+            index = min(len(_BOUNDS), math.ceil((math.log10(seconds) - _MIN_EXP) * _BUCKETS_PER_DECADE))
+        self.counts[index] += 1
+        self.count += 1
+        self.total += seconds
+        self.min = min(self.min, seconds)
+        self.max = max(self.max, seconds)
+
+    def percentile(self, q: float) -> float:
+        if not self.count:
+            return 0.0
+        rank = q / 100 * self.count
+        seen = 0
+        for index, n in enumerate(self.counts):
+            seen += n
+            if seen >= rank and n:
+                bound = _BOUNDS[index] if index < len(_BOUNDS) else self.max
+                return min(bound, self.max)
+        return self.max
+
+    def to_dict(self) -> dict:
+        ms = lambda s: round(s * 1000, 4)
+        return {"count": self.count, "total_ms": ms(self.total), "mean_ms": ms(self.total / self.count) if self.count else 0.0,
+                "min_ms": ms(self.min) if self.count else 0.0, "max_ms": ms(self.max),
+                "p50_ms": ms(self.percentile(50)), "p90_ms": ms(self.percentile(90)), "p99_ms": ms(self.percentile(99))}
+
+
+class _NullSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class _Span:
+    __slots__ = ("profiler", "name", "start")
+
+    def __init__(self, profiler, name):
+        self.profiler = profiler
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.profiler.record(self.name, time.perf_counter() - self.start, self.start)
+        return False
+
+
+class Profiler:
+    """Named timing spans aggregated into histograms, with an optional event trace.
+
+    Disabled by default: span() then returns a shared no-op context manager and
+    timed() wrappers call straight through after one attribute check, so the
+    instrumentation can stay in the hot paths. enable() turns recording on,
+    optionally with tracemalloc so snapshot() can record the top allocators.
+    dump_json() writes histograms and snapshots; dump_chrome_trace() writes
+    the recent spans for chrome://tracing or Perfetto.
+    """
+
+    def __init__(self, max_events: int = 100_000):
+        self.enabled = False
+        self.histograms = {}
+        self.events = deque(maxlen=max_events)
+        self.snapshots = []
+        self._lock = threading.Lock()
+        self._origin = time.perf_counter()
+        self._trace_memory = False
+
+    def enable(self, trace_memory: bool = False):
+        if trace_memory and not self._trace_memory:
+            import tracemalloc
+            tracemalloc.start()
+            self._trace_memory = True
+        self.enabled = True
+
+    def disable(self):
+        self.enabled = False
+        if self._trace_memory:
+            import tracemalloc
+            tracemalloc.stop()
+            self._trace_memory = False
+
+    def reset(self):
+        with self._lock:
+            self.histograms.clear()
+            self.events.clear()
+            self.snapshots.clear()
+
+    def span(self, name: str):
+        """Context manager timing its body as `name`."""
+        if not self.enabled:
+            return _NULL_SPAN
+        return _Span(self, name)
+
+    def record(self, name: str, seconds: float, start: float = None):
+        """Adds one duration; `start` (a perf_counter value) places it on the trace."""
+        if not self.enabled:
+            return
+        with self._lock:
+            histogram = self.histograms.get(name)
+            if histogram is None:
+                histogram = self.histograms[name] = Histogram()
+            histogram.add(seconds)
+            if start is None:
+                start = time.perf_counter() - seconds
+            self.events.append((name, start, seconds, threading.get_ident()))
+
+    def snapshot(self, label: str, top: int = 15):
+        """Records the top allocation sites (requires enable(trace_memory=True))."""
+        if not self._trace_memory:
+            return
+        import tracemalloc
+        current, peak = tracemalloc.get_traced_memory()
+        stats = tracemalloc.take_snapshot().statistics("lineno")[:top]
+        with self._lock:
+            self.snapshots.append({
+                "label": label, "time": time.time(), "current_kb": current // 1024, "peak_kb": peak // 1024,
+                "top": [{"where": str(s.traceback), "size_kb": round(s.size / 1024, 1), "count": s.count} for s in stats],
+            })
+
+    def summary(self) -> dict:
+        with self._lock:
+            return {name: h.to_dict() for name, h in sorted(self.histograms.items())}
+
+    def dump_json(self, path: str):
+        with self._lock:
+            snapshots = list(self.snapshots)
+        data = {"spans": self.summary(), "memory": snapshots, "pid": os.getpid(), "time": time.time()}
+        with open(path, "w") as f:
+            json.dump(data, f, indent=2)
+
+    def dump_chrome_trace(self, path: str):
+        """Writes the recorded spans in Chrome trace-event format."""
+        pid = os.getpid()
+        with self._lock:
+            events = [{"name": name, "cat": name.split(".", 1)[0], "ph": "X", "pid": pid, "tid": tid,
+                       "ts": round((start - self._origin) * 1e6, 1), "dur": round(seconds * 1e6, 1)}
+                      for name, start, seconds, tid in self.events]
+        with open(path, "w") as f:
+            json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, f)
+
+
+PROFILER = Profiler()
+if os.environ.get("AUDILE_PROFILE"):
+    PROFILER.enable(trace_memory=os.environ.get("AUDILE_PROFILE") == "memory")
+
+
+def timed(name: str):
+    """Decorator recording each call of the function as a span on PROFILER."""
+    def decorate(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not PROFILER.enabled:
+                return fn(*args, **kwargs)
+            start = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                PROFILER.record(name, time.perf_counter() - start, start)
+        return wrapper
+    return decorate
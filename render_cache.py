@@ -0,0 +1,71 @@
+import threading
+from collections import OrderedDict
+
+# Zoom levels are snapped to this grid so nearly identical fit-to-width zooms share entries
+ZOOM_STEPS_PER_UNIT = 32
+
+
+def quantize_zoom(zoom: float) -> float:
+    return max(1, round(zoom * ZOOM_STEPS_PER_UNIT)) / ZOOM_STEPS_PER_UNIT
+
+
+class RenderCache:
+    """LRU cache of rendered pages as PNM bytes, bounded by total bytes rather than entry count.
+
+    Keys are (page, quantized zoom, colorspace, tile), where tile is None for a
+    whole-page render or a (column, row, tile size) index for a viewport tile. Safe to share
+    between the reader's engine and the prefetch worker's engine for the same document.
+    """
+
+    def __init__(self, max_bytes: int = 256 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self.current_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, page_num: int, zoom: float, colorspace: str = "RGB", tile=None):
+        key = (page_num, quantize_zoom(zoom), colorspace, tile)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, page_num: int, zoom: float, colorspace: str, data: bytes, tile=None):
+        size = len(data)
+        if size > self.max_bytes:
+            return
+        key = (page_num, quantize_zoom(zoom), colorspace, tile)
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self.current_bytes -= old[1]
+            self._entries[key] = (data, size)
+            self.current_bytes += size
+            while self.current_bytes > self.max_bytes:
+                _, (_, evicted_size) = self._entries.popitem(last=False)
+                self.current_bytes -= evicted_size
+                self.evictions += 1
+
+    def best_for_page(self, page_num: int, colorspace: str = "RGB"):
+        """Returns the highest-zoom whole-page render cached for a page at any zoom, or None."""
+        with self._lock:
+            matches = [(key[1], entry[0]) for key, entry in self._entries.items()
+                       if key[0] == page_num and key[2] == colorspace and key[3] is None]
+        return max(matches, key=lambda m: m[0])[1] if matches else None
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.current_bytes = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"entries": len(self._entries), "bytes": self.current_bytes, "max_bytes": self.max_bytes,
+                    "hits": self.hits, "misses": self.misses, "evictions": self.evictions}
@@ -0,0 +1,171 @@
+import os
+import re
+import json
+import sqlite3
+import threading
+from typing import List
+
+from page_cache import CACHE_DIR
+from fingerprint import document_fingerprint
+from pdf_engine import PDFEngine, extractor_signature
+
+_TERM = re.compile(r"\w+")
+
+
+class SearchIndex:
+    """Full-text index over the cleaned blocks of every library document (SQLite FTS5).
+
+    Rows are keyed by document fingerprint, so a document is only re-indexed when
+    its fingerprint (or the extractor that produced its blocks) changes. Each hit
+    carries the page, block index and word boxes needed to jump and highlight.
+    """
+
+    def __init__(self, db_path: str = None):
+        if db_path is None:
+            os.makedirs(CACHE_DIR, exist_ok=True)
+            db_path = os.path.join(CACHE_DIR, "search.db")
+        self.db_path = db_path
+        self._lock = threading.Lock()
+        # Written by the background indexer, queried from the Tk thread
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        with self._conn:
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS documents ("
+                " fingerprint TEXT PRIMARY KEY, path TEXT, doc_type TEXT, version TEXT, complete INTEGER)")
+            self._conn.execute(
+                "CREATE VIRTUAL TABLE IF NOT EXISTS blocks USING fts5("
+                " text, fingerprint UNINDEXED, page UNINDEXED, block UNINDEXED, words UNINDEXED,"
+                " tokenize = 'unicode61 remove_diacritics 2')")
+
+    def is_indexed(self, fingerprint: str, doc_type: str, version: str) -> bool:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT doc_type, version, complete FROM documents WHERE fingerprint = ?", (fingerprint,)).fetchone()
+        return bool(row) and row[0] == doc_type and row[1] == version and row[2] == 1
+
+    def index_document(self, path: str, doc_type: str = "Book", cache=None, ocr=None, should_stop=None) -> bool:
+        """Indexes one document unless it is already current; returns True when the index is complete.
+
+        should_stop is polled between pages so a background indexer can bail out early.
+        """
+        engine = PDFEngine(path, cache=cache, ocr=ocr)
+        if not engine.open():
+            return False
+        try:
+            fingerprint = engine.fingerprint or document_fingerprint(path)
+            version = extractor_signature(ocr=ocr)
+            if self.is_indexed(fingerprint, doc_type, version):
+                self._set_path(fingerprint, path)
+                return True
+
+            with self._lock, self._conn:
+                # Drop whatever this path or fingerprint held before (file replaced, doc_type changed)
+                stale = [r[0] for r in self._conn.execute(
+                    "SELECT fingerprint FROM documents WHERE path = ? OR fingerprint = ?", (path, fingerprint))]
+                for old in stale:
+                    self._conn.execute("DELETE FROM blocks WHERE fingerprint = ?", (old,))
+                    self._conn.execute("DELETE FROM documents WHERE fingerprint = ?", (old,))
+                self._conn.execute(
+                    "INSERT INTO documents (fingerprint, path, doc_type, version, complete) VALUES (?, ?, ?, ?, 0)",
+                    (fingerprint, path, doc_type, version))
+
+            for page_num in range(1, engine.total_pages + 1):
+                if should_stop and should_stop():
+                    return False
+                rows = [(b["text"], fingerprint, page_num, i, json.dumps([w["bbox"] + [w["text"]] for w in b["words"]]))
+                        for i, b in enumerate(engine.get_page_data(page_num, doc_type=doc_type))]
+                with self._lock, self._conn:
+                    self._conn.executemany(
+                        "INSERT INTO blocks (text, fingerprint, page, block, words) VALUES (?, ?, ?, ?, ?)", rows)
+
+            with self._lock, self._conn:
+                self._conn.execute("UPDATE documents SET complete = 1 WHERE fingerprint = ?", (fingerprint,))
+            return True
+        finally:
+            engine.close()
+
+    def remove_document(self, path: str):
+        with self._lock, self._conn:
+            for (fingerprint,) in self._conn.execute("SELECT fingerprint FROM documents WHERE path = ?", (path,)).fetchall():
+                self._conn.execute("DELETE FROM blocks WHERE fingerprint = ?", (fingerprint,))
+                self._conn.execute("DELETE FROM documents WHERE fingerprint = ?", (fingerprint,))
+
+    def search(self, query: str, limit: int = 50) -> List[dict]:
+        """Returns hits as dicts with path, fingerprint, page, block, snippet and the matching word boxes.
+
+        Every query term must appear in the block; the last term also matches as a prefix.
+        """
+        terms = [t.lower() for t in _TERM.findall(query)]
+        if not terms:
+            return []
+        match = " ".join(f'"{t}"' for t in terms[:-1]) + f' "{terms[-1]}"*'
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT d.path, d.fingerprint, b.page, b.block, snippet(blocks, 0, '[', ']', '…', 12), b.words"
+                " FROM blocks b JOIN documents d ON d.fingerprint = b.fingerprint"
+                " WHERE blocks MATCH ? ORDER BY rank LIMIT ?", (match, limit)).fetchall()
+
+        hits = []
+        for path, fingerprint, page_num, block, snippet, words in rows:
+            boxes = [w[:4] for w in json.loads(words)
+                     if any(t.startswith(term) for t in _TERM.findall(w[4].lower()) for term in terms)]
+            hits.append({"path": path, "fingerprint": fingerprint, "page": page_num, "block": block, "snippet": snippet, "words": boxes})
+        return hits
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    def _set_path(self, fingerprint: str, path: str):
+        with self._lock, self._conn:
+            self._conn.execute("UPDATE documents SET path = ? WHERE fingerprint = ?", (path, fingerprint))
+
+
+class SearchIndexer:
+    """Background thread that keeps the SearchIndex in step with the library."""
+
+    def __init__(self, index: SearchIndex, cache=None, ocr=None, on_indexed=None):
+        self.index = index
+        self.cache = cache
+        self.ocr = ocr
+        self.on_indexed = on_indexed
+        self._queue = []
+        self._cond = threading.Condition()
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def enqueue(self, path: str, doc_type: str = "Book"):
+        with self._cond:
+            if (path, doc_type) not in self._queue:
+                self._queue.append((path, doc_type))
+                self._cond.notify()
+
+    def close(self):
+        with self._cond:
+            self._closed = True
+            self._queue.clear()
+            self._cond.notify()
+
+    def join(self, timeout: float = None):
+        """Waits for the worker to stop after close(); indexing checks for it between pages."""
+        self._thread.join(timeout)
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._queue and not self._closed:
+                    self._cond.wait()
+                if self._closed:
+                    return
+                path, doc_type = self._queue.pop(0)
+            if not os.path.exists(path):
+                continue
+            try:
+                done = self.index.index_document(path, doc_type, cache=self.cache, ocr=self.ocr,
+                                                 should_stop=lambda: self._closed)
+            except Exception as e:
+                print(f"Indexing {path} failed: {e}")
+                continue
+            if done and self.on_indexed:
+                self.on_indexed(path)
@@ -0,0 +1,120 @@
+"""Cold-start measurements: import time of main.py and time to first paint.
+
+    python startup_timing.py -o before.json
+    python startup_timing.py -o after.json --baseline before.json
+
+Import time comes from `python -X importtime -c "import main"` in a fresh
+interpreter (total plus the slowest modules). Launch timings start the app
+with AUDILE_STARTUP_REPORT set; it prints its milestones (imports done, first
+paint, caches and search ready, voices listed, last document shown, in
+seconds since launch) and quits. Launches need a display; --imports-only
+skips them. Comparison and exit status work as in benchmark.py.
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import platform
+import tempfile
+import subprocess
+from typing import List
+
+from benchmark import summarize, compare
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+
+def import_profile(module: str = "main") -> tuple:
+    """Imports module in a fresh interpreter; returns (total seconds, {module: cumulative seconds})."""
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"], cwd=HERE,
+                          capture_output=True, text=True, check=True)
+    modules = {}
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = (part.strip() for part in line[len("import time:"):].split("|"))
+        if cumulative.isdigit():
+            modules[name] = int(cumulative) / 1e6
+    return modules.get(module, 0.0), modules
+
+
+def launch(timeout: float = 60.0, home: str = None) -> dict:
+    """Starts the app once and returns its startup milestones in seconds."""
+    env = dict(os.environ, AUDILE_STARTUP_REPORT="1", AUDILE_STARTUP_T0=repr(time.time()))
+    if home:
+        env["HOME"] = home
+    proc = subprocess.run([sys.executable, "main.py"], cwd=HERE, env=env, capture_output=True, text=True,
+                          timeout=timeout)
+    for line in proc.stdout.splitlines():
+        if line.startswith("AUDILE_STARTUP "):
+            return {k: float(v) for k, v in (item.split("=") for item in line.split()[1:])}
+    raise RuntimeError(f"No startup report (exit {proc.returncode}): {proc.stderr.strip()[-500:]}")
+
+
+def main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(description="Measure Audile's import time and time to first paint.")
+    parser.add_argument("-o", "--output", help="Write results JSON here")
+    parser.add_argument("--baseline", help="Compare against a previous results JSON")
+    parser.add_argument("--threshold", type=float, default=0.10, help="Relative slowdown flagged as a regression")
+    parser.add_argument("--fail-on-regression", action="store_true")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--imports-only", action="store_true", help="Skip launching the app (no display needed)")
+    parser.add_argument("--clean-state", action="store_true",
+                        help="Launch with an empty HOME: no saved library, caches or last document")
+    parser.add_argument("--top", type=int, default=8, help="Slowest imports to list")
+    args = parser.parse_args(argv)
+
+    results = {"meta": {"python": platform.python_version(), "platform": platform.platform(),
+                        "machine": platform.machine(), "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S")},
+               "results": {}}
+    totals, slowest = [], {}
+    for _ in range(args.repeat):
+        total, modules = import_profile()
+        totals.append(total)
+        for name, seconds in modules.items():
+            slowest.setdefault(name, []).append(seconds)
+    results["results"]["import_main"] = summarize(totals)
+    heavy = sorted(((min(v), k) for k, v in slowest.items() if k != "main" and "." not in k), reverse=True)[:args.top]
+    results["slowest_imports_ms"] = {name: round(seconds * 1000, 2) for seconds, name in heavy}
+
+    if not args.imports_only:
+        milestones = {}
+        with tempfile.TemporaryDirectory() as home:
+            for _ in range(args.repeat):
+                try:
+                    run = launch(home=home if args.clean_state else None)
+                except (RuntimeError, subprocess.SubprocessError) as e:
+                    print(f"Launch failed: {e}", file=sys.stderr)
+                    break
+                for key, seconds in run.items():
+                    milestones.setdefault(key, []).append(seconds)
+        for key, samples in milestones.items():
+            results["results"][f"launch/{key}"] = summarize(samples)
+
+    width = max(len(k) for k in results["results"])
+    for key, stats in results["results"].items():
+        print(f"{key:{width}}  median {stats['median_ms']:9.1f} ms  min {stats['min_ms']:9.1f} ms  n={stats['n']}")
+    print("slowest top-level imports (ms): " + ", ".join(f"{k} {v:.0f}" for k, v in results["slowest_imports_ms"].items()))
+
+    regressed = []
+    if args.baseline:
+        with open(args.baseline, "r") as f:
+            baseline = json.load(f)
+        rows = compare(results, baseline, args.threshold)
+        results["comparison"] = {key: {"baseline_ms": old, "median_ms": new, "ratio": round(ratio, 3), "regressed": bad}
+                                 for key, old, new, ratio, bad in rows}
+        print(f"\nvs {args.baseline} (threshold +{args.threshold:.0%}):")
+        for key, old, new, ratio, bad in rows:
+            flag = "REGRESSION" if bad else ("faster" if ratio < 1 - args.threshold else "")
+            print(f"{key:{width}}  {old:9.1f} -> {new:9.1f} ms  x{ratio:5.2f}  {flag}")
+        regressed = [row[0] for row in rows if row[4]]
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+    return 1 if regressed and args.fail_on_regression else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,209 @@
+import os
+import json
+import sqlite3
+import threading
+
+STATE_FILE = os.path.expanduser("~/.audile_state.db")
+
+
+def legacy_document_id(path: str) -> str:
+    """Placeholder id for a document known only by its path, until its fingerprint is resolved."""
+    return "path:" + path
+
+
+class StateStore:
+    """Crash-safe application state in SQLite (WAL mode) with small keyed writes.
+
+    Each change touches only its own row: a library entry, one document's
+    bookmarks, a setting. Reading positions change on every page turn, so
+    set_position() only records them in memory and a timer writes all pending
+    positions in a single transaction after `flush_delay` seconds; a burst of
+    page turns costs one write. Call flush() (or close()) before exiting.
+
+    Library entries and bookmarks are keyed by document id (the content
+    fingerprint), with the path stored alongside, so a moved or renamed file
+    keeps its progress. Rows from path-keyed stores get legacy_document_id()
+    placeholders until rekey_document() gives them their fingerprint.
+    """
+
+    def __init__(self, db_path: str = None, flush_delay: float = 2.0):
+        self.db_path = db_path or STATE_FILE
+        self.flush_delay = flush_delay
+        self._lock = threading.Lock()
+        self._pending_positions = {}
+        self._timer = None
+        # Written from the Tk thread and from the debounce timer
+        self._conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        with self._conn:
+            self._conn.execute("CREATE TABLE IF NOT EXISTS settings (key TEXT PRIMARY KEY, value TEXT)")
+            self._migrate_path_keys()
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS library (doc_id TEXT PRIMARY KEY, path TEXT, page INTEGER, data TEXT)")
+            self._conn.execute("CREATE TABLE IF NOT EXISTS bookmarks (doc_id TEXT PRIMARY KEY, data TEXT)")
+            self._conn.execute("CREATE TABLE IF NOT EXISTS hidden_voices (id TEXT PRIMARY KEY)")
+
+    def _migrate_path_keys(self):
+        """Converts library/bookmarks tables keyed by path (older stores) to doc_id keys."""
+        columns = [row[1] for row in self._conn.execute("PRAGMA table_info(library)")]
+        if "path" not in columns or "doc_id" in columns:
+            return
+        self._conn.execute("ALTER TABLE library RENAME TO library_by_path")
+        self._conn.execute("ALTER TABLE bookmarks RENAME TO bookmarks_by_path")
+        self._conn.execute(
+            "CREATE TABLE library (doc_id TEXT PRIMARY KEY, path TEXT, page INTEGER, data TEXT)")
+        self._conn.execute("CREATE TABLE bookmarks (doc_id TEXT PRIMARY KEY, data TEXT)")
+        self._conn.execute("INSERT INTO library (doc_id, path, page, data)"
+                           " SELECT 'path:' || path, path, page, data FROM library_by_path ORDER BY rowid")
+        self._conn.execute("INSERT INTO bookmarks (doc_id, data) SELECT 'path:' || path, data FROM bookmarks_by_path")
+        self._conn.execute("DROP TABLE library_by_path")
+        self._conn.execute("DROP TABLE bookmarks_by_path")
+
+    def is_empty(self) -> bool:
+        with self._lock:
+            return not any(self._conn.execute(f"SELECT 1 FROM {table} LIMIT 1").fetchone()
+                           for table in ("settings", "library", "bookmarks", "hidden_voices"))
+
+    def migrate_json(self, json_path: str) -> bool:
+        """Imports a legacy ~/.audile_config.json into an empty store in one transaction.
+
+        The JSON file is renamed to *.migrated afterwards so it is kept as a backup
+        but never imported twice. Returns True when something was imported.
+        """
+        if not os.path.exists(json_path) or not self.is_empty():
+            return False
+        try:
+            with open(json_path, "r") as f:
+                config = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"Config migration failed: {e}")
+            return False
+
+        settings = {k: v for k, v in config.items() if k not in ("library", "bookmarks", "hidden_voices")}
+        with self._lock, self._conn:
+            self._conn.executemany("INSERT OR REPLACE INTO settings (key, value) VALUES (?, ?)",
+                                   [(k, json.dumps(v)) for k, v in settings.items()])
+            self._conn.executemany("INSERT OR REPLACE INTO library (doc_id, path, page, data) VALUES (?, ?, ?, ?)",
+                                   [self._library_row(legacy_document_id(p), dict(info, path=p))
+                                    for p, info in config.get("library", {}).items()])
+            self._conn.executemany("INSERT OR REPLACE INTO bookmarks (doc_id, data) VALUES (?, ?)",
+                                   [(legacy_document_id(p), json.dumps(b)) for p, b in config.get("bookmarks", {}).items()])
+            self._conn.executemany("INSERT OR IGNORE INTO hidden_voices (id) VALUES (?)",
+                                   [(v,) for v in config.get("hidden_voices", [])])
+        try:
+            os.replace(json_path, json_path + ".migrated")
+        except OSError as e:
+            print(f"Could not rename migrated config: {e}")
+        return True
+
+    def load(self) -> dict:
+        """Returns the whole state as {"settings", "library", "bookmarks", "hidden_voices"}.
+
+        library and bookmarks are keyed by document id; each library entry
+        carries its "path".
+        """
+        with self._lock:
+            settings = {k: json.loads(v) for k, v in self._conn.execute("SELECT key, value FROM settings")}
+            library = {}
+            for doc_id, path, page, data in self._conn.execute(
+                    "SELECT doc_id, path, page, data FROM library ORDER BY rowid"):
+                info = json.loads(data)
+                info["path"] = path
+                info["page"] = self._pending_positions.get(doc_id, page)
+                library[doc_id] = info
+            bookmarks = {d: json.loads(b) for d, b in self._conn.execute("SELECT doc_id, data FROM bookmarks")}
+            hidden = {row[0] for row in self._conn.execute("SELECT id FROM hidden_voices")}
+        return {"settings": settings, "library": library, "bookmarks": bookmarks, "hidden_voices": hidden}
+
+    def set_setting(self, key: str, value):
+        self._write("INSERT OR REPLACE INTO settings (key, value) VALUES (?, ?)", (key, json.dumps(value)))
+
+    def put_document(self, doc_id: str, info: dict):
+        """Adds or updates one library entry (path, title, doc_type, page, ...), keeping its place in the order."""
+        with self._lock:
+            self._pending_positions.pop(doc_id, None)
+        # An upsert, not INSERT OR REPLACE: replacing would give the row a new rowid and move it to the end
+        self._write("INSERT INTO library (doc_id, path, page, data) VALUES (?, ?, ?, ?)"
+                    " ON CONFLICT(doc_id) DO UPDATE SET path = excluded.path, page = excluded.page, data = excluded.data",
+                    self._library_row(doc_id, info))
+
+    def remove_document(self, doc_id: str):
+        with self._lock:
+            self._pending_positions.pop(doc_id, None)
+        self._write("DELETE FROM library WHERE doc_id = ?", (doc_id,))
+
+    def rekey_document(self, old_id: str, new_id: str, path: str):
+        """Moves an entry and its bookmarks to a new document id and path in one transaction.
+
+        Used when a placeholder id gets its fingerprint, or when the file at a
+        known path was rewritten. If new_id already has an entry, that entry wins.
+        """
+        with self._lock:
+            page = self._pending_positions.pop(old_id, None)
+            if page is not None:
+                self._pending_positions.setdefault(new_id, page)
+            try:
+                with self._conn:
+                    self._conn.execute("UPDATE OR IGNORE library SET doc_id = ?, path = ? WHERE doc_id = ?",
+                                       (new_id, path, old_id))
+                    self._conn.execute("UPDATE OR IGNORE bookmarks SET doc_id = ? WHERE doc_id = ?", (new_id, old_id))
+                    self._conn.execute("DELETE FROM library WHERE doc_id = ?", (old_id,))
+                    self._conn.execute("DELETE FROM bookmarks WHERE doc_id = ?", (old_id,))
+            except sqlite3.Error as e:
+                print(f"State write failed: {e}")
+
+    def set_position(self, doc_id: str, page: int):
+        """Records the reading position; written out by the debounce timer."""
+        with self._lock:
+            self._pending_positions[doc_id] = page
+            if self._timer is None:
+                self._timer = threading.Timer(self.flush_delay, self.flush)
+                self._timer.daemon = True
+                self._timer.start()
+
+    def put_bookmarks(self, doc_id: str, bookmarks: list):
+        self._write("INSERT OR REPLACE INTO bookmarks (doc_id, data) VALUES (?, ?)", (doc_id, json.dumps(bookmarks)))
+
+    def set_hidden_voices(self, voice_ids):
+        with self._lock:
+            try:
+                with self._conn:
+                    self._conn.execute("DELETE FROM hidden_voices")
+                    self._conn.executemany("INSERT INTO hidden_voices (id) VALUES (?)", [(v,) for v in voice_ids])
+            except sqlite3.Error as e:
+                print(f"State write failed: {e}")
+
+    def flush(self):
+        """Writes all pending reading positions in one transaction."""
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            pending, self._pending_positions = self._pending_positions, {}
+            if not pending:
+                return
+            try:
+                with self._conn:
+                    self._conn.executemany("UPDATE library SET page = ? WHERE doc_id = ?",
+                                           [(page, doc_id) for doc_id, page in pending.items()])
+            except sqlite3.Error as e:
+                print(f"State write failed: {e}")
+
+    def close(self):
+        self.flush()
+        with self._lock:
+            self._conn.close()
+
+    def _write(self, sql: str, params):
+        with self._lock:
+            try:
+                with self._conn:
+                    self._conn.execute(sql, params)
+            except sqlite3.Error as e:
+                print(f"State write failed: {e}")
+
+    @staticmethod
+    def _library_row(doc_id: str, info: dict):
+        data = {k: v for k, v in info.items() if k not in ("page", "path")}
+        return doc_id, info.get("path"), int(info.get("page", 1)), json.dumps(data)
@@ -0,0 +1,35 @@
+import os
+import sys
+import tempfile
+
+# Flat layout: the modules live in the repository root. Caches go to a throwaway HOME.
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ["HOME"] = tempfile.mkdtemp(prefix="audile-tests-")
+
+import fitz  # noqa: E402
+import pytest  # noqa: E402
+
+from benchmark import make_pdf  # noqa: E402
+
+
+@pytest.fixture(scope="session")
+def text_pdf(tmp_path_factory):
+    """Six born-digital pages with running heads and page numbers."""
+    path = str(tmp_path_factory.mktemp("pdf") / "text.pdf")
+    make_pdf(path, 6, 1, 4, 30, True, False)
+    return path
+
+
+@pytest.fixture(scope="session")
+def mixed_pdf(tmp_path_factory):
+    """Four text pages followed by two image-only (scanned) pages."""
+    folder = tmp_path_factory.mktemp("pdf")
+    make_pdf(str(folder / "text.pdf"), 4, 1, 4, 30, True, False)
+    make_pdf(str(folder / "scan.pdf"), 2, 0, 0, 0, False, True)
+    doc = fitz.open(str(folder / "text.pdf"))
+    with fitz.open(str(folder / "scan.pdf")) as scan:
+        doc.insert_pdf(scan)
+    path = str(folder / "mixed.pdf")
+    doc.save(path)
+    doc.close()
+    return path
@@ -0,0 +1,71 @@
+import os
+import wave
+
+from audio_export import AudioExporter, StubSynthesisBackend
+import pdf_engine
+from ocr import OCRPipeline, StubOCRBackend
+from page_cache import PageCache
+from pdf_engine import PDFEngine, extractor_signature
+
+
+def test_chunk_without_text_is_exported_silent(mixed_pdf, tmp_path):
+    # Without OCR the two scanned pages form a chunk with nothing to say
+    exporter = AudioExporter(mixed_pdf, str(tmp_path), StubSynthesisBackend, pages_per_chunk=2, workers=2)
+    timing = exporter.run()
+    assert [c["file"] for c in timing["chunks"]] == ["001 Pages 1-2.wav", "002 Pages 3-4.wav", "003 Pages 5-6.wav"]
+    empty = timing["chunks"][2]
+    assert empty["duration"] == 0 and empty["segments"] == []
+    with wave.open(os.path.join(str(tmp_path), empty["file"]), "rb") as f:
+        assert f.getnframes() == 0
+    assert all(c["segments"] for c in timing["chunks"][:2])
+    assert not [name for name in os.listdir(str(tmp_path)) if ".part" in name]
+
+
+def test_export_reads_scanned_pages_with_ocr(mixed_pdf, tmp_path):
+    cache = PageCache(str(tmp_path / "pages.db"))
+    pipeline = OCRPipeline(StubOCRBackend("Recognized text."), cache=cache, workers=1)
+    try:
+        exporter = AudioExporter(mixed_pdf, str(tmp_path / "out"), StubSynthesisBackend, pages_per_chunk=2,
+                                 cache=cache, ocr=pipeline)
+        scanned = exporter.run()["chunks"][2]
+        assert [s[2:] for s in scanned["segments"]] == [[5, 0], [6, 0]]
+        # Rows written by the export match the reader's signature
+        engine = PDFEngine(mixed_pdf, cache=cache, ocr=pipeline)
+        assert engine.open()
+        try:
+            version = extractor_signature(engine.normalizer, pipeline)
+            assert cache.get(engine.fingerprint, 5, "Book", version) == engine.get_page_data(5)
+        finally:
+            engine.close()
+    finally:
+        pipeline.close()
+        cache.close()
+
+
+def test_layout_profile_is_built_once(text_pdf, tmp_path, monkeypatch):
+    calls = []
+    build = pdf_engine.build_layout_profile
+    monkeypatch.setattr(pdf_engine, "build_layout_profile", lambda doc: calls.append(doc) or build(doc))
+    exporter = AudioExporter(text_pdf, str(tmp_path), StubSynthesisBackend, pages_per_chunk=2, workers=3)
+    assert len(exporter.run()["chunks"]) == 3
+    assert len(calls) == 1
+
+
+def test_stopped_export_keeps_finished_chunks_only(text_pdf, tmp_path):
+    exporter = AudioExporter(text_pdf, str(tmp_path), lambda: StubSynthesisBackend(compute_per_word=0.002),
+                             pages_per_chunk=1, workers=1)
+    progress = []
+
+    def on_progress(done, total):
+        progress.append(done)
+        if done == 1:
+            exporter.stop()
+    try:
+        exporter.run(on_progress=on_progress)
+    except InterruptedError:
+        pass
+    else:
+        raise AssertionError("export was not stopped")
+    names = os.listdir(str(tmp_path))
+    assert not [n for n in names if ".part" in n]
+    assert len([n for n in names if n.endswith(".wav")]) == max(progress)
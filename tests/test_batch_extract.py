@@ -0,0 +1,38 @@
+import io
+import json
+
+from batch_extract import main, run_batch
+from pdf_engine import PDFEngine
+
+
+def serial_pages(path):
+    engine = PDFEngine(path)
+    assert engine.open()
+    try:
+        return [[b["text"] for b in engine.get_page_data(p)] for p in range(1, engine.total_pages + 1)]
+    finally:
+        engine.close()
+
+
+def test_pooled_batch_matches_serial_extraction_in_input_order(text_pdf, mixed_pdf, tmp_path):
+    missing = str(tmp_path / "missing.pdf")
+    paths = [text_pdf, missing, mixed_pdf, text_pdf]
+    out = io.StringIO()
+    stats = run_batch(paths, out, text_only=True, workers=2, pages_per_task=2)
+
+    records = [json.loads(line) for line in out.getvalue().splitlines()]
+    expected = [(path, page, blocks) for path in paths if path != missing
+                for page, blocks in enumerate(serial_pages(path), 1)]
+    assert [(r["file"], r["page"], r["blocks"]) for r in records] == expected
+    assert [path for path, err in stats.failures()] == [missing]
+    assert stats.failures()[0][1].startswith("open: ")
+
+
+def test_cli_accepts_every_doc_type(text_pdf, tmp_path):
+    out = str(tmp_path / "standard.jsonl")
+    assert main([text_pdf, "--doc-type", "Standard", "--text-only", "--workers", "1", "-q", "-o", out]) == 0
+    with open(out, encoding="utf-8") as f:
+        records = [json.loads(line) for line in f]
+    assert {r["doc_type"] for r in records} == {"Standard"}
+    # Standard documents keep their running heads
+    assert any("Synthetic Journal" in block for block in records[0]["blocks"])
@@ -0,0 +1,65 @@
+import os
+import shutil
+
+import pytest
+
+import fingerprint
+from benchmark import make_pdf
+from fingerprint import CHUNK, SAMPLES, FingerprintIndex, buffer_fingerprint, content_fingerprint, sample_offsets
+
+
+@pytest.fixture
+def pdf(text_pdf, tmp_path):
+    path = str(tmp_path / "book.pdf")
+    shutil.copy(text_pdf, path)
+    return path
+
+
+@pytest.fixture
+def hashes(monkeypatch):
+    calls = []
+    real = fingerprint.content_fingerprint
+    monkeypatch.setattr(fingerprint, "content_fingerprint", lambda path: calls.append(path) or real(path))
+    return calls
+
+
+def test_sample_offsets():
+    assert sample_offsets(0) == [0]
+    assert sample_offsets(3 * CHUNK) == [0, CHUNK, 2 * CHUNK]
+    size = 100 * CHUNK + 17
+    offsets = sample_offsets(size)
+    assert len(offsets) == SAMPLES and offsets[0] == 0 and offsets[-1] == size - CHUNK
+    assert offsets == sorted(offsets)
+
+
+def test_move_and_rename_keep_the_identity(pdf, tmp_path):
+    before = content_fingerprint(pdf)
+    os.makedirs(str(tmp_path / "moved"))
+    moved = str(tmp_path / "moved" / "renamed.pdf")
+    os.replace(pdf, moved)
+    assert content_fingerprint(moved) == before
+    with open(moved, "rb") as f:
+        assert buffer_fingerprint(f.read()) == before
+
+
+def test_edit_changes_the_identity(pdf, tmp_path):
+    before = content_fingerprint(pdf)
+    make_pdf(pdf, 6, 1, 4, 30, True, False, seed=2)
+    assert content_fingerprint(pdf) != before
+
+
+def test_unchanged_files_are_not_rehashed(pdf, tmp_path, hashes):
+    db = str(tmp_path / "fingerprints.db")
+    index = FingerprintIndex(db)
+    first = index.resolve(pdf)
+    assert index.resolve(pdf) == first
+    index.close()
+    # The stat stamp survives a restart
+    index = FingerprintIndex(db)
+    assert index.resolve(pdf) == first
+    assert hashes == [os.path.realpath(pdf)]
+
+    make_pdf(pdf, 6, 1, 4, 30, True, False, seed=2)
+    assert index.resolve(pdf) != first
+    assert len(hashes) == 2
+    index.close()
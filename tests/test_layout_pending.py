@@ -0,0 +1,82 @@
+import time
+
+import pytest
+
+import pdf_engine
+from page_cache import PageCache
+from pdf_engine import PDFEngine, extractor_signature
+from prefetch import PagePrefetcher
+
+
+@pytest.fixture
+def cache(tmp_path):
+    cache = PageCache(str(tmp_path / "pages.db"))
+    yield cache
+    cache.close()
+
+
+@pytest.fixture
+def engines(text_pdf, cache):
+    opened = []
+
+    def make():
+        engine = PDFEngine(text_pdf, cache=cache)
+        assert engine.open()
+        opened.append(engine)
+        return engine
+    yield make
+    for engine in opened:
+        engine.close()
+
+
+def test_cached_profile_only_without_build(engines):
+    reader = engines()
+    assert reader.layout_profile(build=False) is None and reader.layout is None
+    profile = engines().layout_profile()
+    assert reader.layout_profile(build=False).to_dict() == profile.to_dict()
+
+
+def test_pages_read_while_pending_use_margins_and_are_not_cached(engines, cache):
+    reader = engines()
+    reader.layout_pending = True
+    texts = [b["text"] for b in reader.get_page_data(1)]
+    assert texts and not any("Synthetic Journal" in t for t in texts)
+    version = extractor_signature(reader.normalizer)
+    assert cache.get(reader.fingerprint, 1, "Book", version) is None
+
+    reader.layout, reader.layout_pending = engines().layout_profile(), False
+    blocks = reader.get_page_data(1)
+    assert cache.get(reader.fingerprint, 1, "Book", version) == blocks
+    assert not any("Synthetic Journal" in b["text"] for b in blocks)
+
+
+def test_standard_documents_keep_every_line(engines):
+    reader = engines()
+    reader.layout_profile()
+    texts = [b["text"] for b in reader.get_page_data(1, doc_type="Standard")]
+    assert any("Synthetic Journal" in t for t in texts)
+    assert not any("Synthetic Journal" in b["text"] for b in reader.get_page_data(1, doc_type="Book"))
+
+
+def test_pending_prefetcher_never_builds_the_profile(text_pdf, cache, engines, monkeypatch):
+    calls = []
+    build = pdf_engine.build_layout_profile
+    monkeypatch.setattr(pdf_engine, "build_layout_profile", lambda doc: calls.append(doc) or build(doc))
+    prefetcher = PagePrefetcher(text_pdf, cache=cache, layout_pending=True)
+    try:
+        reader = engines()
+        version = extractor_signature(reader.normalizer)
+        prefetcher.schedule(1, "Book", None)
+        time.sleep(0.5)
+        assert calls == [] and cache.get(reader.fingerprint, 2, "Book", version) is None
+
+        prefetcher.set_layout(reader.layout_profile())
+        prefetcher.schedule(2, "Book", None)
+        deadline = time.monotonic() + 5
+        while cache.get(reader.fingerprint, 3, "Book", version) is None and time.monotonic() < deadline:
+            time.sleep(0.05)
+        assert cache.get(reader.fingerprint, 3, "Book", version) == reader.get_page_data(3)
+        assert len(calls) == 1
+    finally:
+        prefetcher.close()
+        prefetcher.join(5)
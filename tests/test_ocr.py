@@ -0,0 +1,128 @@
+import time
+
+import pytest
+
+from ocr import OCRPipeline, StubOCRBackend
+from page_cache import PageCache
+from pdf_engine import PDFEngine, extractor_signature
+
+SCANNED = (5, 6)  # Image-only pages of mixed_pdf
+
+
+class FailingOCRBackend(StubOCRBackend):
+    """Shares the stub's cache key, like a Tesseract install that is missing and later fixed."""
+
+    def recognize(self, page) -> dict:
+        raise RuntimeError("tesseract not found")
+
+
+class SlowOCRBackend(StubOCRBackend):
+    def recognize(self, page) -> dict:
+        time.sleep(0.5)
+        return super().recognize(page)
+
+
+@pytest.fixture
+def cache(tmp_path):
+    cache = PageCache(str(tmp_path / "pages.db"))
+    yield cache
+    cache.close()
+
+
+def open_engine(path, cache, backend):
+    pipeline = OCRPipeline(backend, cache=cache, workers=1)
+    engine = PDFEngine(path, cache=cache, ocr=pipeline)
+    assert engine.open()
+    return engine, pipeline
+
+
+def test_scanned_pages_are_recognized_and_cached(mixed_pdf, cache):
+    engine, pipeline = open_engine(mixed_pdf, cache, StubOCRBackend("Recognized text."))
+    try:
+        for page_num in SCANNED:
+            assert [b["text"] for b in engine.get_page_data(page_num)] == ["Recognized text."]
+        assert engine.ocr_pages == set(SCANNED)
+        assert engine.get_page_data(1) and 1 not in engine.ocr_pages
+        version = extractor_signature(engine.normalizer, pipeline)
+        assert cache.get(engine.fingerprint, SCANNED[0], "Book", version)
+        assert cache.get_ocr(engine.fingerprint, SCANNED[0], pipeline.backend.cache_key())
+    finally:
+        engine.close()
+        pipeline.close()
+
+
+def test_failed_ocr_is_not_cached_and_retried(mixed_pdf, cache):
+    engine, pipeline = open_engine(mixed_pdf, cache, FailingOCRBackend())
+    try:
+        assert engine.get_page_data(SCANNED[0]) == []
+        version = extractor_signature(engine.normalizer, pipeline)
+        assert cache.get(engine.fingerprint, SCANNED[0], "Book", version) is None
+    finally:
+        engine.close()
+        pipeline.close()
+
+    engine, pipeline = open_engine(mixed_pdf, cache, StubOCRBackend("Recognized text."))
+    try:
+        assert [b["text"] for b in engine.get_page_data(SCANNED[0])] == ["Recognized text."]
+    finally:
+        engine.close()
+        pipeline.close()
+
+
+def test_pooled_iter_blocks_keeps_ocr(mixed_pdf, cache):
+    engine, pipeline = open_engine(mixed_pdf, cache, StubOCRBackend("Recognized text."))
+    try:
+        pooled = list(engine.iter_blocks(workers=2, pages_per_task=2))
+        version = extractor_signature(engine.normalizer, pipeline)
+        assert cache.get(engine.fingerprint, SCANNED[1], "Book", version)
+    finally:
+        engine.close()
+        pipeline.close()
+
+    plain = PDFEngine(mixed_pdf)
+    assert plain.open()
+    try:
+        text_only = list(plain.iter_blocks())
+    finally:
+        plain.close()
+    assert [b for b in pooled if b["page"] not in SCANNED] == text_only
+    assert [b["text"] for b in pooled if b["page"] in SCANNED] == ["Recognized text."] * len(SCANNED)
+
+
+def test_failed_pages_are_not_resubmitted(mixed_pdf, cache, monkeypatch):
+    engine, pipeline = open_engine(mixed_pdf, cache, FailingOCRBackend())
+    submitted = []
+    submit = pipeline._submit
+    monkeypatch.setattr(pipeline, "_submit", lambda *args: submitted.append(args[2]) or submit(*args))
+    try:
+        assert engine.get_page_data(SCANNED[0]) == []
+        assert engine.get_page_data(SCANNED[0]) == []
+        pipeline.prefetch(mixed_pdf, engine.fingerprint, [SCANNED[0]])
+        assert submitted == [SCANNED[0]]
+    finally:
+        engine.close()
+        pipeline.close()
+
+
+def test_pending_ocr_does_not_block(mixed_pdf, cache):
+    engine, pipeline = open_engine(mixed_pdf, cache, SlowOCRBackend("Recognized text."))
+    engine.ocr_wait = False
+    try:
+        start = time.perf_counter()
+        assert engine.get_page_data(SCANNED[0]) == []
+        assert time.perf_counter() - start < 0.4
+        future = engine.ocr_pending[SCANNED[0]]
+        future.result(timeout=30)
+        assert [b["text"] for b in engine.get_page_data(SCANNED[0])] == ["Recognized text."]
+        assert SCANNED[0] not in engine.ocr_pending and SCANNED[0] in engine.ocr_pages
+    finally:
+        engine.close()
+        pipeline.close()
+
+
+def test_closed_pipeline_refuses_work(mixed_pdf, cache):
+    pipeline = OCRPipeline(StubOCRBackend(), cache=cache, workers=1)
+    pipeline.close()
+    assert pipeline.recognize(mixed_pdf, "doc", SCANNED[0]) is None
+    pipeline.prefetch(mixed_pdf, "doc", SCANNED)
+    assert pipeline._pool is None
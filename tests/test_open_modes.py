@@ -0,0 +1,92 @@
+import io
+
+import pytest
+
+from pdf_engine import OPEN_MODES, PDFEngine
+from state_store import StateStore
+
+
+def page_texts(engine):
+    return [engine.doc[i].get_text() for i in range(engine.total_pages)]
+
+
+@pytest.fixture
+def reference(text_pdf):
+    engine = PDFEngine(text_pdf)
+    assert engine.open()
+    try:
+        yield page_texts(engine)
+    finally:
+        engine.close()
+
+
+def open_in(kind, path, handles):
+    if kind in OPEN_MODES:
+        return PDFEngine(path, mode=kind)
+    if kind == "bytes":
+        with open(path, "rb") as f:
+            return PDFEngine.from_bytes(f.read())
+    if kind == "bytesio":
+        with open(path, "rb") as f:
+            return PDFEngine.from_stream(io.BytesIO(f.read()))
+    handles.append(open(path, "rb"))
+    return PDFEngine.from_stream(handles[-1])
+
+
+@pytest.mark.parametrize("kind", OPEN_MODES + ("bytes", "bytesio", "file-stream"))
+def test_every_open_mode_reads_the_same_document(kind, text_pdf, reference):
+    handles = []
+    engine = open_in(kind, text_pdf, handles)
+    try:
+        assert engine.open()
+        assert page_texts(engine) == reference
+        # A real file (or the path in mmap mode) is mapped, not read
+        assert (engine._mmap is not None) == (kind in ("mmap", "file-stream"))
+        engine.close()
+        engine.close()
+        assert engine.doc is None and engine._buffer is None and engine._mmap is None and engine._file is None
+        # The caller's stream stays the caller's to close
+        assert all(not f.closed for f in handles)
+    finally:
+        for f in handles:
+            f.close()
+
+
+@pytest.mark.parametrize("kind", ("mmap", "bytes", "file-stream"))
+def test_failed_open_releases_the_mapping(kind, tmp_path):
+    path = str(tmp_path / "broken.pdf")
+    with open(path, "wb") as f:
+        f.write(b"not a pdf at all" * 100)
+    handles = []
+    engine = open_in(kind, path, handles)
+    try:
+        assert not engine.open()
+        assert engine.doc is None and engine._buffer is None and engine._mmap is None and engine._file is None
+    finally:
+        for f in handles:
+            f.close()
+
+
+def test_opening_another_document_closes_the_previous_engine(text_pdf, tmp_path):
+    main = pytest.importorskip("main")
+
+    class App:
+        _on_pdf_loaded = main.AudileApp._on_pdf_loaded
+
+        def __getattr__(self, name):
+            # UI refreshes are not under test
+            return lambda *args, **kwargs: None
+
+    old, new = PDFEngine(text_pdf, mode="mmap"), PDFEngine(text_pdf, mode="mmap")
+    assert old.open() and new.open()
+    app = App()
+    app.library, app.missing_docs, app._startup_times, app._pending_hit = {}, set(), {"document": 0.0}, None
+    app.state = StateStore(str(tmp_path / "state.db"))
+    app.pdf_engine, app.current_doc_id, app.current_pdf_path = new, "doc", text_pdf
+    try:
+        app._on_pdf_loaded("Book", old)
+        assert old.doc is None and old._mmap is None
+        assert new.doc is not None and app.library["doc"]["path"] == text_pdf
+    finally:
+        new.close()
+        app.state.close()
@@ -0,0 +1,43 @@
+import json
+import zlib
+import sqlite3
+
+import pytest
+
+from page_cache import PageCache
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    return str(tmp_path / "pages.db")
+
+
+def test_versions_do_not_overwrite_each_other(db_path):
+    cache = PageCache(db_path, memory_entries=0)
+    try:
+        cache.put("doc", 1, "Book", "plain", [{"text": "plain"}])
+        cache.put("doc", 1, "Book", "ocr", [{"text": "ocr"}])
+        assert cache.get("doc", 1, "Book", "plain") == [{"text": "plain"}]
+        assert cache.get("doc", 1, "Book", "ocr") == [{"text": "ocr"}]
+    finally:
+        cache.close()
+
+
+def test_store_keyed_without_version_is_migrated(db_path):
+    conn = sqlite3.connect(db_path)
+    with conn:
+        conn.execute("CREATE TABLE pages (fingerprint TEXT, page INTEGER, doc_type TEXT, version TEXT, data BLOB,"
+                     " PRIMARY KEY (fingerprint, page, doc_type))")
+        conn.execute("INSERT INTO pages VALUES (?, ?, ?, ?, ?)",
+                     ("doc", 1, "Book", "plain", zlib.compress(json.dumps([{"text": "plain"}]).encode("utf-8"))))
+    conn.close()
+
+    cache = PageCache(db_path, memory_entries=0)
+    try:
+        assert cache.get("doc", 1, "Book", "plain") == [{"text": "plain"}]
+        cache.put("doc", 1, "Book", "ocr", [{"text": "ocr"}])
+        assert cache.get("doc", 1, "Book", "plain") == [{"text": "plain"}]
+    finally:
+        cache.close()
+    # Reopening the migrated store leaves it alone
+    PageCache(db_path).close()
@@ -0,0 +1,144 @@
+import time
+import queue
+
+import pytest
+
+from playback import PlaybackController
+from tts_engine import FakeSpeechBackend, TTSEngine
+
+
+def make_block(text: str, y: float) -> dict:
+    words, x = [], 72.0
+    for token in text.split():
+        words.append({"text": token, "bbox": [x, y, x + 6 * len(token), y + 12]})
+        x += 6 * len(token) + 4
+    bbox = [72.0, y, x - 4, y + 12]
+    return {"text": text, "words": words, "lines": [{"bbox": bbox, "text": text}], "bbox": bbox}
+
+
+# Page 2 has no text, so reading and skipping must step over it
+PAGES = {
+    1: [make_block("First one. Second one.", 100), make_block("Third here.", 140)],
+    2: [],
+    3: [make_block("Fourth on page three. Fifth in 1975 too.", 100)],
+}
+SENTENCES = [(1, 0, 0, "First one."), (1, 0, 1, "Second one."), (1, 1, 0, "Third here."),
+             (3, 0, 0, "Fourth on page three."), (3, 0, 1, "Fifth in 1975 too.")]
+
+
+class Harness:
+    """A controller over FakeSpeechBackend whose posted callbacks run on the test thread via pump()."""
+
+    def __init__(self, seconds_per_word: float = 0.0):
+        # 180 wpm is 1/3 s per word at the 1x rate
+        self.backend = FakeSpeechBackend(words_per_minute=180, time_scale=seconds_per_word * 3)
+        self.events = queue.Queue()
+        self.controller = PlaybackController(TTSEngine(self.backend), lambda p: PAGES.get(p, []), lambda: len(PAGES),
+                                             post=self.events.put)
+        self.sentences, self.words, self.finished = [], [], []
+        self.controller.on_sentence = lambda page, block, index, sentence: self.sentences.append(
+            (page, block, index, sentence["text"]))
+        self.controller.on_word = lambda page, block, offset: self.words.append((page, block, offset))
+        self.controller.on_finished = lambda: self.finished.append(True)
+
+    def pump(self, until=None, timeout: float = 5.0):
+        """Runs posted callbacks until until() holds (or for `timeout` seconds without one)."""
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if until is not None and until():
+                return True
+            try:
+                self.events.get(timeout=0.01)()
+            except queue.Empty:
+                pass
+        return until is None or until()
+
+    def close(self):
+        self.controller.stop()
+
+
+@pytest.fixture
+def harness():
+    made = []
+
+    def make(seconds_per_word: float = 0.0):
+        made.append(Harness(seconds_per_word))
+        return made[-1]
+    yield make
+    for h in made:
+        h.close()
+
+
+def test_reads_every_sentence_in_order(harness):
+    h = harness()
+    h.controller.play(1)
+    assert h.pump(lambda: h.finished)
+    assert h.sentences == SENTENCES
+    assert not h.controller.is_playing and h.controller.current is None
+
+
+def test_word_offsets_point_into_block_text(harness):
+    h = harness()
+    h.controller.play(1)
+    assert h.pump(lambda: h.finished)
+    # The year is spoken as several words, each highlighting the source token
+    year = (3, 0, PAGES[3][0]["text"].index("1975"))
+    assert h.words.count(year) > 1
+    distinct = [w for i, w in enumerate(h.words) if i == 0 or w != h.words[i - 1]]
+    spoken = [PAGES[page][block]["text"][offset:].split()[0] for page, block, offset in distinct]
+    expected = [token for page in sorted(PAGES) for block in PAGES[page] for token in block["text"].split()]
+    assert spoken == expected
+
+
+def test_starts_mid_block(harness):
+    h = harness()
+    h.controller.play(1, 0, 1)
+    assert h.pump(lambda: h.finished)
+    assert h.sentences == SENTENCES[1:]
+
+
+def test_pause_and_resume(harness):
+    h = harness(seconds_per_word=0.05)
+    h.controller.play(1)
+    assert h.pump(lambda: h.words)
+    h.controller.pause()
+    heard = len(h.words)
+    h.pump(timeout=0.4)
+    # At most the word already on its way when pausing
+    assert len(h.words) <= heard + 1 and not h.finished
+    h.controller.resume()
+    assert h.pump(lambda: h.finished)
+    assert h.sentences == SENTENCES
+
+
+def test_stop_silences_queued_events(harness):
+    h = harness(seconds_per_word=0.05)
+    h.controller.play(1)
+    assert h.pump(lambda: h.sentences)
+    h.controller.stop()
+    assert not h.controller.is_playing and h.controller.current is None
+    heard = list(h.sentences)
+    h.pump(timeout=0.4)
+    assert h.sentences == heard and not h.finished
+
+
+def test_skip_forward_and_back(harness):
+    h = harness(seconds_per_word=0.2)
+    h.controller.play(1)
+    assert h.pump(lambda: h.controller.current == (1, 0, 0))
+    h.controller.skip(2)
+    assert h.pump(lambda: h.controller.current == (1, 1, 0))
+    # Forward over the empty page 2
+    h.controller.skip(1)
+    assert h.pump(lambda: h.controller.current == (3, 0, 0))
+    h.controller.skip(-2)
+    assert h.pump(lambda: h.controller.current == (1, 0, 1))
+    assert h.sentences[-1] == SENTENCES[1]
+
+
+def test_play_past_the_end_does_nothing(harness):
+    h = harness()
+    h.controller.play(3, 1)
+    assert not h.controller.is_playing
+    h.pump(timeout=0.2)
+    assert h.sentences == [] and not h.finished
@@ -0,0 +1,67 @@
+import json
+import types
+import sqlite3
+
+import pytest
+
+from state_store import StateStore, legacy_document_id
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    return str(tmp_path / "state.db")
+
+
+def test_reopening_a_document_keeps_library_order(db_path):
+    store = StateStore(db_path)
+    for doc_id in "abc":
+        store.put_document(doc_id, {"path": f"/{doc_id}.pdf", "title": doc_id, "page": 1})
+    store.put_document("a", {"path": "/moved/a.pdf", "title": "a", "page": 7})
+    store.close()
+
+    store = StateStore(db_path)
+    library = store.load()["library"]
+    store.close()
+    assert list(library) == ["a", "b", "c"]
+    assert library["a"]["path"] == "/moved/a.pdf" and library["a"]["page"] == 7
+
+
+def test_path_keyed_store_migrates_to_placeholder_ids(db_path):
+    conn = sqlite3.connect(db_path)
+    with conn:
+        conn.execute("CREATE TABLE library (path TEXT PRIMARY KEY, page INTEGER, data TEXT)")
+        conn.execute("CREATE TABLE bookmarks (path TEXT PRIMARY KEY, data TEXT)")
+        for path, page in (("/b.pdf", 4), ("/a.pdf", 9)):
+            conn.execute("INSERT INTO library VALUES (?, ?, ?)", (path, page, json.dumps({"title": path})))
+        conn.execute("INSERT INTO bookmarks VALUES (?, ?)", ("/a.pdf", json.dumps([{"page": 2, "note": "x"}])))
+    conn.close()
+
+    store = StateStore(db_path)
+    state = store.load()
+    assert list(state["library"]) == [legacy_document_id("/b.pdf"), legacy_document_id("/a.pdf")]
+    assert state["library"][legacy_document_id("/a.pdf")]["page"] == 9
+    assert state["bookmarks"] == {legacy_document_id("/a.pdf"): [{"page": 2, "note": "x"}]}
+
+    store.rekey_document(legacy_document_id("/a.pdf"), "fp-a", "/a.pdf")
+    state = store.load()
+    assert list(state["library"]) == [legacy_document_id("/b.pdf"), "fp-a"]
+    assert state["bookmarks"] == {"fp-a": [{"page": 2, "note": "x"}]}
+    store.close()
+
+
+def test_rekey_merges_bookmarks_one_per_page(db_path):
+    main = pytest.importorskip("main")
+    store = StateStore(db_path)
+    app = types.SimpleNamespace(
+        library={"old": {"path": "/a.pdf"}, "new": {"path": "/a.pdf"}},
+        bookmarks={"old": [{"page": 1, "note": "one"}, {"page": 3, "note": "old three"}],
+                   "new": [{"page": 3, "note": "new three"}]},
+        state=store)
+    for doc_id, marks in app.bookmarks.items():
+        store.put_bookmarks(doc_id, marks)
+    main.AudileApp._rekey_document(app, "old", "new", "/a.pdf")
+
+    merged = [{"page": 3, "note": "new three"}, {"page": 1, "note": "one"}]
+    assert app.bookmarks == {"new": merged} and list(app.library) == ["new"]
+    assert store.load()["bookmarks"] == {"new": merged}
+    store.close()
@@ -0,0 +1,49 @@
+import os
+import json
+
+import pytest
+
+from pdf_engine import PDFEngine
+from text_normalizer import TextNormalizer
+
+# Inputs and the outputs of the original chain of str.replace/re.sub calls in PDFEngine._clean_text
+GOLDEN = os.path.join(os.path.dirname(__file__), "data", "clean_text_golden.json")
+
+
+def golden_cases():
+    with open(GOLDEN, "r", encoding="utf-8") as f:
+        return [tuple(case) for case in json.load(f)]
+
+
+@pytest.mark.parametrize("text,expected", golden_cases())
+def test_matches_original_clean_text(text, expected):
+    assert TextNormalizer().clean(text) == expected
+    assert PDFEngine(None)._clean_text(text) == expected
+
+
+def test_clean_many_matches_clean():
+    normalizer = TextNormalizer()
+    texts = [text for text, _ in golden_cases()]
+    assert normalizer.clean_many(texts) == [normalizer.clean(t) for t in texts]
+
+
+def test_signature_tracks_rules():
+    normalizer = TextNormalizer()
+    before = normalizer.signature()
+    normalizer.add_corrections({"teh": "the"})
+    assert normalizer.signature() != before
+    assert normalizer.clean("teh end") == "the end"
+
+
+def test_pooled_extraction_uses_custom_rules(text_pdf):
+    normalizer = TextNormalizer()
+    normalizer.add_corrections({"the": "THE"})
+    engine = PDFEngine(text_pdf, normalizer=normalizer)
+    assert engine.open()
+    try:
+        serial = list(engine.iter_blocks())
+        pooled = list(engine.iter_blocks(workers=2, pages_per_task=2))
+    finally:
+        engine.close()
+    assert pooled == serial
+    assert any("THE" in block["text"] for block in serial)
@@ -0,0 +1,30 @@
+from voice_catalog import VoiceCatalog
+
+RAW = [
+    {"id": "com.apple.voice.enhanced.en-US.Ava", "name": "Ava", "lang": "en-US", "quality_val": 2},
+    {"id": "com.apple.voice.enhanced.en-US.Ava2", "name": "Ava", "lang": "en-US", "quality_val": 2},
+    {"id": "com.apple.voice.compact.en-US.Fred", "name": "Fred", "lang": "en-US", "quality_val": 1},
+    {"id": "com.apple.speech.synthesis.voice.Zarvox", "name": "Zarvox", "lang": "en-US", "quality_val": 1},
+]
+
+
+def test_variants_share_a_label_and_resolve_to_the_shown_one():
+    catalog = VoiceCatalog(RAW)
+    shown = catalog.visible()
+    assert [v["name"] for v in shown] == ["Ava", "Fred"]
+    label = shown[0]["display"]
+    assert catalog.for_display(label)["id"] == shown[0]["id"]
+
+    # Hiding the shown variant brings up the other under the same label, and the label follows it
+    hidden = {shown[0]["id"]}
+    after = catalog.visible(hidden_ids=hidden)
+    assert after[0]["display"] == label and after[0]["id"] != shown[0]["id"]
+    assert catalog.for_display(label, hidden_ids=hidden)["id"] == after[0]["id"]
+    assert catalog.for_display(label, hidden_ids={v["id"] for v in RAW if v["name"] == "Ava"}) is None
+
+
+def test_premium_filter_and_novelty_voices():
+    catalog = VoiceCatalog(RAW)
+    assert [v["name"] for v in catalog.visible(premium_only=True)] == ["Ava"]
+    assert catalog.for_display(catalog.get(RAW[2]["id"])["display"], premium_only=True) is None
+    assert all(not v["is_novelty"] for v in catalog.visible())
@@ -0,0 +1,69 @@
+from pdf_engine import _token_words, block_sentences, word_at, word_offsets
+
+
+def boxes(*texts):
+    return [{"text": t, "bbox": [10.0 * i, 0, 10.0 * i + 8, 12]} for i, t in enumerate(texts)]
+
+
+def test_one_box_per_token():
+    text = "The quick brown fox."
+    words = boxes("The", "quick", "brown", "fox.")
+    assert _token_words(text, words) == [[0], [1], [2], [3]]
+    assert word_offsets(text, words) == [0, 4, 10, 16]
+
+
+def test_hyphenated_line_break_maps_both_halves_to_one_token():
+    text = "A computer program runs."
+    words = boxes("A", "com-", "puter", "program", "runs.")
+    assert _token_words(text, words) == [[0], [1, 2], [3], [4]]
+    offsets = word_offsets(text, words)
+    assert offsets == [0, 2, 2, 11, 19]
+    # Every position inside "computer" lands on its last box, so highlighting moves forward
+    assert {word_at(offsets, p) for p in range(2, 10)} == {2}
+
+
+def test_kept_hyphen_is_not_merged():
+    text = "A well- known fact."
+    words = boxes("A", "well-", "known", "fact.")
+    assert _token_words(text, words) == [[0], [1], [2], [3]]
+
+
+def test_count_mismatch_falls_back_to_proportional_mapping():
+    # OCR split one word into two boxes that cleaning did not rejoin
+    text = "one two three"
+    words = boxes("one", "tw", "o", "three")
+    assert _token_words(text, words) == [[0], [1], [2, 3]]
+    assert word_offsets(text, words) == [0, 4, 8, 8]
+
+
+def test_fewer_boxes_than_tokens_still_map_every_token():
+    text = "one two three four"
+    mapping = _token_words(text, boxes("one", "two"))
+    assert mapping == [[0], [0], [1], [1]]
+
+
+def test_no_boxes():
+    assert _token_words("one two", []) == [[], []]
+    assert word_offsets("one two", []) == []
+
+
+def test_word_at():
+    offsets = [0, 4, 10]
+    assert word_at(offsets, 0) == 0
+    assert word_at(offsets, 3) == 0
+    assert word_at(offsets, 4) == 1
+    assert word_at(offsets, 99) == 2
+    assert word_at([5], 2) == -1
+
+
+def test_block_sentences_carry_their_word_boxes():
+    text = "First one here. Second one."
+    words = boxes("First", "one", "here.", "Second", "one.")
+    block = {"text": text, "words": words, "bbox": [0, 0, 48, 12],
+             "lines": [{"bbox": [0, 0, 48, 12], "text": text}]}
+    first, second = block_sentences(block)
+    assert first["text"] == "First one here." and second["text"] == "Second one."
+    assert first["words"] == [w["bbox"] for w in words[:3]]
+    assert second["words"] == [w["bbox"] for w in words[3:]]
+    assert first["lines"] == second["lines"] == [0]
+    assert second["bbox"] == [30.0, 0, 48.0, 12]
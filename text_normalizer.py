@@ -0,0 +1,129 @@
+import re
+import hashlib
+from typing import Dict, List
+
+# Ligatures and specialized characters
+DEFAULT_REPLACEMENTS = {
+    "ﬀ": "ff", "ﬁ": "fi", "ﬂ": "fl", "ﬃ": "ffi", "ﬄ": "ffl",
+    "ﬅ": "st", "ﬆ": "st", "\u00ad": "", "\u2010": "-", "\u2011": "-",
+    "\u2012": "-", "\u2013": "-", "\u2014": "--", "\u2018": "'",
+    "\u2019": "'", "\u201c": '"', "\u201d": '"', "\u2026": "...",
+}
+
+# Common font-mapping/OCR errors, matched as whole words regardless of case
+DEFAULT_CORRECTIONS = {
+    "clifferent": "different",
+    "cityerent": "different",
+    "tl1at": "that",
+    "tllat": "that",
+    "vvith": "with",
+    "l": "I",  # Standalone lowercase L as capital I
+}
+
+# Whole-word corrections that only apply with this exact case
+DEFAULT_EXACT_CORRECTIONS = {
+    "J": "I",  # Standalone 'J' or '1' as 'I'
+    "1": "I",
+}
+
+# Remove end-of-line hyphenation (e.g. "com- puter" -> "computer").
+# Spans are joined with spaces in get_page_data, so the break shows up as "- ".
+_HYPHENATION = re.compile(r"(\w+)-\s+(\w+)")
+
+# Joins texts for clean_many; it is neither a word nor a whitespace character,
+# so no rule can match across it.
+_BATCH_SEPARATOR = "\x00"
+
+
+class TextNormalizer:
+    """Cleans up PDF artifacts and corrects font-mapping errors in three passes.
+
+    1. One str.translate call for every single-character replacement.
+    2. One regex pass for end-of-line hyphenation.
+    3. One precompiled alternation that handles both the whole-word corrections
+       (looked up in a dispatch dict) and whitespace collapsing.
+
+    Rules can be extended with add_replacements/add_corrections; the tables and
+    regex are rebuilt, so the pass count never grows. Replaced text is never
+    re-scanned by a later rule.
+    """
+
+    def __init__(self, replacements: Dict[str, str] = None, corrections: Dict[str, str] = None,
+                 exact_corrections: Dict[str, str] = None):
+        self.replacements = dict(DEFAULT_REPLACEMENTS if replacements is None else replacements)
+        self.corrections = {k.lower(): v for k, v in (DEFAULT_CORRECTIONS if corrections is None else corrections).items()}
+        self.exact_corrections = dict(DEFAULT_EXACT_CORRECTIONS if exact_corrections is None else exact_corrections)
+        self._compile()
+
+    def add_replacements(self, mapping: Dict[str, str]):
+        """Adds single-character replacements, e.g. {"ﬅ": "st"}."""
+        for old in mapping:
+            if len(old) != 1:
+                raise ValueError(f"Replacement keys must be single characters, got {old!r}")
+        self.replacements.update(mapping)
+        self._compile()
+
+    def add_corrections(self, mapping: Dict[str, str], exact_case: bool = False):
+        """Adds whole-word corrections, case-insensitive unless exact_case is set."""
+        for word in mapping:
+            if not re.fullmatch(r"\w+", word):
+                raise ValueError(f"Corrections must be single words, got {word!r}")
+        if exact_case:
+            self.exact_corrections.update(mapping)
+        else:
+            self.corrections.update({k.lower(): v for k, v in mapping.items()})
+        self._compile()
+
+    def signature(self) -> str:
+        """Short hash of the active rules, so caches can tell when they change."""
+        return self._signature
+
+    def clean(self, text: str) -> str:
+        text = text.translate(self._table)
+        text = _HYPHENATION.sub(r"\1\2", text)
+        return self._pattern.sub(self._dispatch, text).strip()
+
+    def clean_many(self, texts: List[str]) -> List[str]:
+        """Cleans a whole page's texts with one pass of each rule over the joined batch."""
+        if not texts:
+            return []
+        if any(_BATCH_SEPARATOR in t for t in texts):
+            return [self.clean(t) for t in texts]
+        joined = _BATCH_SEPARATOR.join(texts).translate(self._table)
+        joined = _HYPHENATION.sub(r"\1\2", joined)
+        joined = self._pattern.sub(self._dispatch, joined)
+        return [t.strip() for t in joined.split(_BATCH_SEPARATOR)]
+
+    def _dispatch(self, match) -> str:
+        word = match.group(2)
+        if word is None:
+            return " "
+        exact = self.exact_corrections.get(word)
+        if exact is not None:
+            return exact
+        return self.corrections.get(word.lower(), word)
+
+    def _compile(self):
+        self._table = str.maketrans(self.replacements)
+
+        def alternation(words):
+            return "|".join(re.escape(w) for w in sorted(words, key=lambda w: (-len(w), w)))
+
+        words = []
+        if self.exact_corrections:
+            words.append(f"(?-i:{alternation(self.exact_corrections)})")
+        if self.corrections:
+            words.append(alternation(self.corrections))
+        # Whitespace runs other than a lone space collapse to one space; a lone space
+        # is already normalized and skipping it keeps the callback off the hot path.
+        pattern = r"(\s{2,}|[^\S ])"
+        if words:
+            pattern += r"|\b(" + "|".join(words) + r")\b"
+        self._pattern = re.compile(pattern, re.IGNORECASE)
+
+        rules = repr((sorted(self.replacements.items()), sorted(self.corrections.items()),
+                      sorted(self.exact_corrections.items())))
+        self._signature = hashlib.sha1(rules.encode("utf-8")).hexdigest()[:12]
+
+
+DEFAULT_NORMALIZER = TextNormalizer()
@@ -1,107 +1,429 @@
-from AVFoundation import (
-    AVSpeechSynthesizer, 
-    AVSpeechUtterance, 
-    AVSpeechSynthesisVoice,
-    AVSpeechBoundaryImmediate
-)
-import time
 import os
 import re
+import time
+import bisect
+import hashlib
+import platform
+import threading
+from collections import deque
 from typing import List, Dict
 
-class TTSEngine:
+from profiling import timed
+from voice_catalog import VoiceCatalog, default_catalog_path, load_catalog
+
+
+_YEAR = re.compile(r'\b\d{4}\b')
+
+
+def _spoken_year(year: str) -> str:
+    y_int = int(year)
+    if 1800 <= y_int <= 2099:
+        if 2000 <= y_int <= 2009:
+            return f"two thousand {y_int % 100 if y_int % 100 > 0 else ''}"
+        else:
+            return f"{year[:2]} {year[2:]}"
+    return year
+
+
+def fix_years(text: str) -> str:
+    """Heuristic to make years sound natural."""
+    return _YEAR.sub(lambda m: _spoken_year(m.group(0)), text)
+
+
+def fix_years_mapped(text: str):
+    """fix_years() plus the rewritten segments, for mapping spoken offsets back with source_offset().
+
+    Segments are (spoken_start, spoken_end, start, end) tuples in text order.
+    """
+    parts, segments, last, shift = [], [], 0, 0
+    for m in _YEAR.finditer(text):
+        spoken = _spoken_year(m.group(0))
+        if spoken == m.group(0):
+            continue
+        parts.append(text[last:m.start()])
+        parts.append(spoken)
+        segments.append((m.start() + shift, m.start() + shift + len(spoken), m.start(), m.end()))
+        shift += len(spoken) - (m.end() - m.start())
+        last = m.end()
+    if not segments:
+        return text, segments
+    parts.append(text[last:])
+    return "".join(parts), segments
+
+
+def source_offset(segments: list, position: int, is_end: bool = False) -> int:
+    """Maps an offset in fix_years_mapped() output back to the original text.
+
+    Offsets inside a rewritten year map to its start, or to its end for is_end.
+    """
+    i = bisect.bisect_right(segments, (position, float("inf"))) - 1
+    if i < 0:
+        return position
+    spoken_start, spoken_end, start, end = segments[i]
+    if position < spoken_end:
+        return end if is_end and position > spoken_start else start
+    return position - spoken_end + end
+
+
+class SpeechBackend:
+    """Speaks queued utterances and reports their progress as events.
+
+    Utterances are spoken in the order they were queued. Each one carries an
+    opaque tag, and the backend calls `on_event(kind, tag, *args)` with:
+      "started", tag
+      "word", tag, char_start, length   (offsets into the spoken text)
+      "finished", tag
+      "cancelled", tag
+    Events may arrive on any thread.
+    """
+
+    def __init__(self):
+        self.on_event = None
+
+    @staticmethod
+    def voice_signature():
+        """Cheap fingerprint of the installed voices, or None if enumerating is the only way to tell."""
+        return None
+
+    def get_voices(self) -> List[Dict]:
+        """Returns raw voice descriptors: id, name, lang and quality_val (1-3)."""
+        return []
+
+    def speak(self, text: str, tag, voice_id: str = None, rate: float = 0.5, volume: float = 1.0):
+        raise NotImplementedError
+
+    def is_speaking(self) -> bool:
+        raise NotImplementedError
+
+    def pause(self):
+        raise NotImplementedError
+
+    def resume(self):
+        raise NotImplementedError
+
+    def stop(self):
+        """Stops the current utterance and drops everything queued."""
+        raise NotImplementedError
+
+    def _emit(self, kind: str, tag, *args):
+        if self.on_event:
+            self.on_event(kind, tag, *args)
+
+
+_delegate_class = None
+
+
+def _speech_delegate_class():
+    """AVSpeechSynthesizerDelegate that forwards to an AVSpeechBackend (defined once, on first use)."""
+    global _delegate_class
+    if _delegate_class is None:
+        import objc
+        from Foundation import NSObject
+
+        class AudileSpeechDelegate(NSObject):
+            def initWithBackend_(self, backend):
+                self = objc.super(AudileSpeechDelegate, self).init()
+                if self is None:
+                    return None
+                self.backend = backend
+                return self
+
+            def speechSynthesizer_didStartSpeechUtterance_(self, synth, utterance):
+                self.backend._on_delegate("started", utterance)
+
+            def speechSynthesizer_willSpeakRangeOfSpeechString_utterance_(self, synth, char_range, utterance):
+                location, length = char_range
+                self.backend._on_delegate("word", utterance, location, length)
+
+            def speechSynthesizer_didFinishSpeechUtterance_(self, synth, utterance):
+                self.backend._on_delegate("finished", utterance)
+
+            def speechSynthesizer_didCancelSpeechUtterance_(self, synth, utterance):
+                self.backend._on_delegate("cancelled", utterance)
+
+        _delegate_class = AudileSpeechDelegate
+    return _delegate_class
+
+
+# Where macOS keeps installed voices; installing or removing one changes these directories
+_VOICE_DIRS = (
+    "/System/Library/Speech/Voices",
+    "/Library/Speech/Voices",
+    "~/Library/Speech/Voices",
+    "/System/Library/AssetsV2/com_apple_MobileAsset_VoiceServicesVocalizerVoice",
+    "/System/Library/AssetsV2/com_apple_MobileAsset_VoiceServices_CustomVoice",
+    "/System/Library/AssetsV2/com_apple_MobileAsset_VoiceServices_GryphonVoice",
+)
+
+
+class AVSpeechBackend(SpeechBackend):
+    """macOS AVSpeechSynthesizer; events come from its delegate."""
+
+    @staticmethod
+    def voice_signature():
+        """OS version plus the modification times of the voice directories; no AVFoundation needed."""
+        parts = [platform.mac_ver()[0]]
+        for path in _VOICE_DIRS:
+            try:
+                parts.append(f"{path}:{os.stat(os.path.expanduser(path)).st_mtime_ns}")
+            except OSError:
+                parts.append(f"{path}:-")
+        return hashlib.sha1("|".join(parts).encode("utf-8")).hexdigest()
+
+    @staticmethod
+    def preload():
+        """Imports AVFoundation ahead of first use; safe to call off the main thread."""
+        try:
+            import AVFoundation  # noqa: F401
+        except ImportError:
+            pass
+
     def __init__(self):
-        # Using modern AVFoundation for high-quality macOS voices
+        super().__init__()
+        from AVFoundation import AVSpeechSynthesizer, AVSpeechSynthesisVoice, AVSpeechUtterance, AVSpeechBoundaryImmediate
+        self._AVSpeechSynthesisVoice = AVSpeechSynthesisVoice
+        self._AVSpeechUtterance = AVSpeechUtterance
+        self._boundary = AVSpeechBoundaryImmediate
         self._synth = AVSpeechSynthesizer.alloc().init()
+        # The synthesizer only holds its delegate weakly
+        self._delegate = _speech_delegate_class().alloc().initWithBackend_(self)
+        self._synth.setDelegate_(self._delegate)
+        self._tags = {}
+        self._voices = {}
+
+    def get_voices(self) -> List[Dict]:
+        return [{"id": v.identifier(), "name": v.name(), "lang": v.language(), "quality_val": v.quality()}
+                for v in self._AVSpeechSynthesisVoice.speechVoices()]
+
+    def speak(self, text: str, tag, voice_id: str = None, rate: float = 0.5, volume: float = 1.0):
+        utterance = self._AVSpeechUtterance.speechUtteranceWithString_(text)
+        if voice_id:
+            if voice_id not in self._voices:
+                self._voices[voice_id] = self._AVSpeechSynthesisVoice.voiceWithIdentifier_(voice_id)
+            if self._voices[voice_id]:
+                utterance.setVoice_(self._voices[voice_id])
+        utterance.setRate_(rate)
+        utterance.setVolume_(volume)
+        self._tags[utterance] = tag
+        self._synth.speakUtterance_(utterance)
+
+    def is_speaking(self) -> bool:
+        return self._synth.isSpeaking()
+
+    def pause(self):
+        self._synth.pauseSpeakingAtBoundary_(self._boundary)
+
+    def resume(self):
+        self._synth.continueSpeaking()
+
+    def stop(self):
+        self._synth.stopSpeakingAtBoundary_(self._boundary)
+
+    def _on_delegate(self, kind, utterance, *args):
+        if kind in ("finished", "cancelled"):
+            tag = self._tags.pop(utterance, None)
+        else:
+            tag = self._tags.get(utterance)
+        self._emit(kind, tag, *args)
+
+
+class FakeSpeechBackend(SpeechBackend):
+    """Deterministic backend for tests and Linux: "speaks" on a worker thread.
+
+    Each word takes 60 / words_per_minute seconds at rate 0.5 (the 1x rate),
+    scaled by time_scale; time_scale=0 speaks instantly. Spoken texts are
+    recorded in `spoken`, in order.
+    """
+
+    def __init__(self, words_per_minute: float = 180, time_scale: float = 1.0):
+        super().__init__()
+        self.words_per_minute = words_per_minute
+        self.time_scale = time_scale
+        self.spoken = []
+        self._queue = deque()
+        self._current = None
+        self._paused = False
+        self._cancel = False
+        self._cond = threading.Condition()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def get_voices(self) -> List[Dict]:
+        return [{"id": "fake.voice.premium", "name": "Fake", "lang": "en-US", "quality_val": 3},
+                {"id": "fake.voice.compact", "name": "Fake Compact", "lang": "en-US", "quality_val": 1}]
+
+    def speak(self, text: str, tag, voice_id: str = None, rate: float = 0.5, volume: float = 1.0):
+        with self._cond:
+            self._queue.append((text, tag, rate))
+            self._cond.notify_all()
+
+    def is_speaking(self) -> bool:
+        with self._cond:
+            return self._current is not None or bool(self._queue)
+
+    def pause(self):
+        with self._cond:
+            self._paused = True
+
+    def resume(self):
+        with self._cond:
+            self._paused = False
+            self._cond.notify_all()
+
+    def stop(self):
+        with self._cond:
+            self._queue.clear()
+            self._paused = False
+            if self._current is not None:
+                self._cancel = True
+            self._cond.notify_all()
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._queue:
+                    self._cond.wait()
+                text, tag, rate = self._queue.popleft()
+                self._current = tag
+                self._cancel = False
+            self.spoken.append(text)
+            self._emit("started", tag)
+            delay = 60.0 / (self.words_per_minute * max(rate, 0.05) / 0.5) * self.time_scale
+            completed = True
+            for match in re.finditer(r"\S+", text):
+                self._emit("word", tag, match.start(), match.end() - match.start())
+                if not self._wait(delay):
+                    completed = False
+                    break
+            with self._cond:
+                completed = completed and not self._cancel
+                self._current = None
+            self._emit("finished" if completed else "cancelled", tag)
+
+    def _wait(self, seconds: float) -> bool:
+        """Sleeps for seconds of unpaused time; False if stopped meanwhile."""
+        with self._cond:
+            remaining = seconds
+            while not self._cancel:
+                if self._paused:
+                    self._cond.wait()
+                    continue
+                if remaining <= 0:
+                    return True
+                start = time.monotonic()
+                self._cond.wait(remaining)
+                remaining -= time.monotonic() - start
+            return False
+
+
+class TTSEngine:
+    """Narration front end: voice metadata, rate mapping and text fixes over a SpeechBackend.
+
+    Set on_started/on_word/on_finished/on_cancelled to receive events; each is
+    called with the utterance tag (plus char_start, length for on_word, as
+    offsets into the text that was queued, not the year-fixed text spoken).
+    Utterances queue up, so the next one can be handed over before the
+    current one ends.
+    """
+
+    def __init__(self, backend: SpeechBackend = None, catalog_path: str = None):
+        # Using modern AVFoundation for high-quality macOS voices; without a backend
+        # one is created on first use, so constructing the engine imports nothing
+        self._backend = None
+        self._backend_lock = threading.Lock()
+        if backend is not None:
+            self._attach(backend)
+        self.catalog_path = catalog_path  # Defaults to a per-backend file in the cache directory
+        self._catalog = None
         self._voice = None
-        self._rate = 0.5 
+        self._rate = 0.5
         self._volume = 1.0
         self.is_paused = False
+        self.on_started = None
+        self.on_word = None
+        self.on_finished = None
+        self.on_cancelled = None
+        # tag -> fix_years_mapped() segments of utterances whose spoken text differs from the queued text
+        self._offset_maps = {}
+
+    @property
+    def backend(self) -> SpeechBackend:
+        if self._backend is None:
+            with self._backend_lock:
+                if self._backend is None:
+                    self._attach(AVSpeechBackend())
+        return self._backend
+
+    def preload(self):
+        """Loads the default backend's framework so creating it later is quick."""
+        if self._backend is None:
+            AVSpeechBackend.preload()
+
+    def _attach(self, backend: SpeechBackend):
+        backend.on_event = self._on_event
+        self._backend = backend
 
     def get_voices(self) -> List[Dict]:
-        """Returns a list of available macOS voices with metadata, filtered for quality."""
-        voices = AVSpeechSynthesisVoice.speechVoices()
-        results = []
-        qualities = {1: "Standard", 2: "Enhanced", 3: "Premium"}
-        
-        # Purge creepy/legacy novelty voices from 1990s macOS
-        creepy_keywords = {
-            "albert", "badnews", "bahh", "bells", "boing", "bubbles", "cellos", 
-            "deranged", "goodnews", "hysterical", "junior", "organ", "princess", 
-            "ralph", "trinoids", "whisper", "zarvox", "eloquence", "jester", "wobble", "superstar"
-        }
-        
-        for v in voices:
-            name = v.name()
-            v_id = v.identifier().lower()
-            lang = v.language()
-            quality_num = v.quality()
-            
-            is_personal = "personalvoice" in v_id or "personal" in name.lower()
-            is_novelty = any(x in v_id for x in creepy_keywords) or any(x in name.lower() for x in ["bad news", "good news", "pipe organ", "jester", "wobble", "superstar"])
-            is_compact = "compact" in v_id
-            
-            # Smart high-quality detection for Sequoia (where quality_num is often buggy)
-            is_premium = (quality_num >= 2 or is_personal or ("compact" not in v_id and not is_novelty))
-
-            results.append({
-                "id": v.identifier(), 
-                "name": name, 
-                "lang": lang, 
-                "quality": qualities.get(quality_num, "Standard"),
-                "quality_val": quality_num,
-                "is_personal": is_personal,
-                "is_novelty": is_novelty,
-                "is_premium": is_premium
-            })
-        return results
+        """Returns the available voices with metadata (quality, personal/novelty/premium flags)."""
+        return self.voice_catalog().voices
+
+    def voice_catalog(self, refresh: bool = False) -> VoiceCatalog:
+        """The indexed voice catalog, read from disk unless the installed voices changed."""
+        if self._catalog is None or refresh:
+            backend_type = type(self._backend) if self._backend is not None else AVSpeechBackend
+            self._catalog = load_catalog(lambda: self.backend.get_voices(), backend_type.voice_signature(),
+                                         path=self.catalog_path or default_catalog_path(backend_type.__name__),
+                                         refresh=refresh)
+        return self._catalog
+
+    @property
+    def voice_id(self):
+        return self._voice
+
+    @property
+    def rate(self) -> float:
+        """Synthesizer rate (0.0-1.0) for the current speed setting."""
+        return self._rate
 
     def set_voice(self, voice_id: str):
-        self._voice = AVSpeechSynthesisVoice.voiceWithIdentifier_(voice_id)
+        self._voice = voice_id
 
     def set_rate(self, rate: float):
         # Map user 0.5x-3.0x to AVFoundation 0.0-1.0
         new_rate = 0.2 + (rate * 0.3)
         self._rate = max(0.0, min(1.0, new_rate))
 
-    def speak(self, text: str):
+    @timed("tts.speak")
+    def speak(self, text: str, tag=None):
+        """Stops whatever is playing and speaks text."""
+        self.stop()
+        self.enqueue(text, tag)
+
+    @timed("tts.enqueue")
+    def enqueue(self, text: str, tag=None):
+        """Queues text behind the current utterance without interrupting it."""
         self.is_paused = False
         # Pre-process years for natural narration (e.g. 1975 -> nineteen seventy-five)
-        processed_text = self._fix_years(text)
-        utterance = AVSpeechUtterance.speechUtteranceWithString_(processed_text)
-        if self._voice:
-            utterance.setVoice_(self._voice)
-        utterance.setRate_(self._rate)
-        utterance.setVolume_(self._volume)
-        self._synth.speakUtterance_(utterance)
-
-    def _fix_years(self, text: str) -> str:
-        """Heuristic to make years sound natural."""
-        def year_repl(match):
-            year = match.group(0)
-            y_int = int(year)
-            if 1800 <= y_int <= 2099:
-                if 2000 <= y_int <= 2009:
-                    return f"two thousand {y_int % 100 if y_int % 100 > 0 else ''}"
-                else:
-                    return f"{year[:2]} {year[2:]}"
-            return year
-        return re.sub(r'\b\d{4}\b', year_repl, text)
+        spoken, segments = fix_years_mapped(text)
+        if segments:
+            self._offset_maps[tag] = segments
+        self.backend.speak(spoken, tag, self._voice, self._rate, self._volume)
 
     def is_speaking(self) -> bool:
-        return self._synth.isSpeaking()
+        return self._backend is not None and self._backend.is_speaking()
 
     def pause(self):
         self.is_paused = True
-        self._synth.pauseSpeakingAtBoundary_(AVSpeechBoundaryImmediate)
+        self.backend.pause()
 
     def resume(self):
         self.is_paused = False
-        self._synth.continueSpeaking()
+        self.backend.resume()
 
     def stop(self):
         self.is_paused = False
-        self._synth.stopSpeakingAtBoundary_(AVSpeechBoundaryImmediate)
+        if self._backend is not None:
+            self._backend.stop()
 
     def preview(self, voice_id: str):
         """Play a short test sentence in a specific voice."""
@@ -110,3 +432,17 @@ class TTSEngine:
         self.set_voice(voice_id)
         self.speak("This is a preview of my high-fidelity narration voice.")
         self._voice = orig_voice
+
+    def _on_event(self, kind: str, tag, *args):
+        if kind == "word":
+            segments = self._offset_maps.get(tag)
+            if segments:
+                start, length = args
+                begin = source_offset(segments, start)
+                args = (begin, source_offset(segments, start + length, is_end=True) - begin)
+        elif kind in ("finished", "cancelled"):
+            self._offset_maps.pop(tag, None)
+        callback = {"started": self.on_started, "word": self.on_word,
+                    "finished": self.on_finished, "cancelled": self.on_cancelled}.get(kind)
+        if callback:
+            callback(tag, *args)
@@ -0,0 +1,147 @@
+import sys
+import tkinter as tk
+import customtkinter as ctk
+
+_UNBOUND = object()
+
+
+class _Row:
+    """A pooled row widget and the list row it currently shows."""
+
+    def __init__(self, widget, window):
+        self.widget = widget
+        self.window = window
+        self.index = None
+        self.item = _UNBOUND
+
+
+class VirtualList(ctk.CTkFrame):
+    """Scrollable list that only materializes the rows in view.
+
+    Rows have a fixed height and come from a small pool of widgets created by
+    make_row(parent) and filled in by bind_row(widget, item). Scrolling moves
+    pooled widgets to the rows coming into view instead of creating new ones,
+    and set_items() only rebinds rows whose item changed, so a list of
+    thousands of entries costs about as much as one screenful.
+    """
+
+    def __init__(self, master, row_height, make_row, bind_row, empty_text="", overscan=2, **kwargs):
+        super().__init__(master, **kwargs)
+        self.row_height = row_height
+        self.make_row = make_row
+        self.bind_row = bind_row
+        self.overscan = overscan
+        self._items = []
+        self._rows = []
+
+        self._canvas = tk.Canvas(self, highlightthickness=0, bd=0, bg=self._canvas_color(),
+                                 yscrollincrement=max(1, row_height // 3))
+        self._scrollbar = ctk.CTkScrollbar(self, command=self._canvas.yview)
+        self._canvas.configure(yscrollcommand=self._on_view_changed)
+        self._scrollbar.pack(side="right", fill="y")
+        self._canvas.pack(side="left", fill="both", expand=True)
+        self._canvas.bind("<Configure>", self._on_resize)
+        self._bind_wheel(self._canvas)
+
+        self._empty_label = ctk.CTkLabel(self, text=empty_text, font=ctk.CTkFont(slant="italic"))
+        self.empty_text = empty_text
+
+    def set_items(self, items, empty_text=None):
+        """Replaces the list contents; rows whose item is unchanged are left alone."""
+        items = list(items)
+        if empty_text is not None and empty_text != self.empty_text:
+            self.empty_text = empty_text
+            self._empty_label.configure(text=empty_text)
+        if items:
+            self._empty_label.place_forget()
+        else:
+            self._empty_label.place(relx=0.5, y=40, anchor="n")
+        if items == self._items:
+            return
+        self._items = items
+        self._canvas.configure(scrollregion=(0, 0, self._canvas.winfo_width(), len(items) * self.row_height))
+        self._update_rows()
+
+    def scroll_to(self, index: int):
+        if self._items:
+            self._canvas.yview_moveto(index / len(self._items))
+
+    def _update_rows(self):
+        top = self._canvas.canvasy(0)
+        height = max(self._canvas.winfo_height(), self.row_height)
+        first = max(0, int(top // self.row_height) - self.overscan)
+        last = min(len(self._items), int((top + height) // self.row_height) + 1 + self.overscan)
+
+        # Rows still in view keep their widget; the rest are free for reuse
+        placed = {}
+        free = []
+        for row in self._rows:
+            if row.index is not None and first <= row.index < last:
+                placed[row.index] = row
+            else:
+                free.append(row)
+
+        for index in range(first, last):
+            row = placed.get(index)
+            if row is None:
+                row = free.pop() if free else self._new_row()
+                self._canvas.coords(row.window, 0, index * self.row_height)
+                self._canvas.itemconfigure(row.window, state="normal")
+                row.index = index
+            item = self._items[index]
+            if row.item is _UNBOUND or row.item != item:
+                self.bind_row(row.widget, item)
+                row.item = item
+
+        for row in free:
+            if row.index is not None:
+                self._canvas.itemconfigure(row.window, state="hidden")
+                row.index = None
+
+    def _new_row(self):
+        widget = self.make_row(self._canvas)
+        window = self._canvas.create_window(0, 0, window=widget, anchor="nw",
+                                            width=self._canvas.winfo_width(), height=self.row_height)
+        self._bind_wheel(widget)
+        row = _Row(widget, window)
+        self._rows.append(row)
+        return row
+
+    def _on_view_changed(self, first, last):
+        self._scrollbar.set(first, last)
+        self._update_rows()
+
+    def _on_resize(self, event):
+        for row in self._rows:
+            self._canvas.itemconfigure(row.window, width=event.width)
+        self._canvas.configure(scrollregion=(0, 0, event.width, len(self._items) * self.row_height))
+        self._update_rows()
+
+    def _bind_wheel(self, widget):
+        widget.bind("<MouseWheel>", self._on_wheel, add="+")
+        widget.bind("<Button-4>", self._on_wheel, add="+")
+        widget.bind("<Button-5>", self._on_wheel, add="+")
+        for child in widget.winfo_children():
+            self._bind_wheel(child)
+
+    def _on_wheel(self, event):
+        if event.num == 4:
+            delta = -1
+        elif event.num == 5:
+            delta = 1
+        elif sys.platform == "darwin":
+            delta = -event.delta
+        else:
+            delta = -int(event.delta / 120)
+        if self._canvas.yview() != (0.0, 1.0):
+            self._canvas.yview_scroll(delta, "units")
+        # The wheel belongs to the list: keep the window's bind_all handler from scrolling the page too
+        return "break"
+
+    def _canvas_color(self):
+        color = self._bg_color if self._fg_color == "transparent" else self._fg_color
+        return self._apply_appearance_mode(color)
+
+    def _set_appearance_mode(self, mode_string):
+        super()._set_appearance_mode(mode_string)
+        self._canvas.configure(bg=self._canvas_color())
@@ -0,0 +1,172 @@
+import os
+import re
+import json
+import time
+import hashlib
+from typing import List
+
+from page_cache import CACHE_DIR
+
+# Bump whenever classify_voice() or the stored shape changes
+CATALOG_VERSION = 1
+# Re-enumerate at least this often, in case a voice change left the signature untouched
+MAX_AGE = 7 * 24 * 3600
+
+QUALITIES = {1: "Standard", 2: "Enhanced", 3: "Premium"}
+
+# Purge creepy/legacy novelty voices from 1990s macOS
+_NOVELTY_IDS = re.compile("|".join(re.escape(k) for k in (
+    "albert", "badnews", "bahh", "bells", "boing", "bubbles", "cellos",
+    "deranged", "goodnews", "hysterical", "junior", "organ", "princess",
+    "ralph", "trinoids", "whisper", "zarvox", "eloquence", "jester", "wobble", "superstar")))
+_NOVELTY_NAMES = re.compile("|".join(re.escape(k) for k in (
+    "bad news", "good news", "pipe organ", "jester", "wobble", "superstar")))
+
+
+def classify_voice(raw: dict) -> dict:
+    """Adds quality, personal/novelty/premium flags and a sort key to a backend voice descriptor."""
+    name, quality_num = raw["name"], raw["quality_val"]
+    v_id, lower_name = raw["id"].lower(), name.lower()
+    is_personal = "personalvoice" in v_id or "personal" in lower_name
+    is_novelty = bool(_NOVELTY_IDS.search(v_id) or _NOVELTY_NAMES.search(lower_name))
+    # Smart high-quality detection for Sequoia (where quality_num is often buggy)
+    is_premium = quality_num >= 2 or is_personal or ("compact" not in v_id and not is_novelty)
+    return {
+        "id": raw["id"],
+        "name": name,
+        "lang": raw["lang"],
+        "quality": QUALITIES.get(quality_num, "Standard"),
+        "quality_val": quality_num,
+        "is_personal": is_personal,
+        "is_novelty": is_novelty,
+        "is_premium": is_premium,
+    }
+
+
+def voices_digest(raw_voices: List[dict]) -> str:
+    """Content hash of an enumerated voice list, order-independent."""
+    rows = sorted((v["id"], v["name"], v["lang"], v["quality_val"]) for v in raw_voices)
+    return hashlib.sha1(repr((CATALOG_VERSION, rows)).encode("utf-8")).hexdigest()
+
+
+class VoiceCatalog:
+    """Classified voices, sorted once and indexed by id, display name and language.
+
+    Voices are ordered personal first, then by quality and name, and each gets
+    a menu label ("display"); variants of one (name, language) share it.
+    visible() applies the premium and hidden filters, keeping the best voice
+    per (name, language), and memoizes the result per filter setting;
+    for_display() resolves a label against that same list. The catalog is saved to disk with the signature
+    of the voices it was built from, so it is only rebuilt when they change.
+    """
+
+    def __init__(self, raw_voices: List[dict], signature: str = None, digest: str = None, built: float = None):
+        self.raw = list(raw_voices)
+        self.signature = signature
+        self.digest = digest or voices_digest(self.raw)
+        self.built = built or time.time()
+        voices = sorted((classify_voice(v) for v in self.raw),
+                        key=lambda v: (not v["is_personal"], -v["quality_val"], v["name"], v["lang"], v["id"]))
+        langs_per_name = {}
+        for v in voices:
+            langs_per_name.setdefault(v["name"], set()).add(v["lang"])
+        for v in voices:
+            badge = "👤" if v["is_personal"] else "✨" if v["quality_val"] == 3 else "★" if v["quality_val"] == 2 else ""
+            suffix = f" ({v['lang']})" if len(langs_per_name[v["name"]]) > 1 else ""
+            v["display"] = f"{v['name']}{suffix}  {badge}"
+        self.voices = voices
+        self.by_id = {v["id"]: v for v in voices}
+        self.by_lang = {}
+        for v in voices:
+            self.by_lang.setdefault(v["lang"], []).append(v)
+            base = v["lang"].split("-")[0]
+            if base != v["lang"]:
+                self.by_lang.setdefault(base, []).append(v)
+        self._visible = {}
+
+    def __len__(self):
+        return len(self.voices)
+
+    def get(self, voice_id: str):
+        return self.by_id.get(voice_id)
+
+    def for_display(self, display: str, premium_only: bool = False, hidden_ids=()):
+        """The voice shown under a menu label by visible() with the same filters, or None."""
+        self.visible(premium_only, hidden_ids)
+        return self._visible[(premium_only, frozenset(hidden_ids))][1].get(display)
+
+    def for_language(self, lang: str) -> List[dict]:
+        """Voices for "en-GB", or for every English variant given "en", best first."""
+        return self.by_lang.get(lang, [])
+
+    def visible(self, premium_only: bool = False, hidden_ids=()) -> List[dict]:
+        """Menu voices: no novelty, hidden or (with premium_only) non-premium voices, best per (name, lang)."""
+        key = (premium_only, frozenset(hidden_ids))
+        memo = self._visible.get(key)
+        if memo is None:
+            result, seen = [], set()
+            for v in self.voices:
+                if v["is_novelty"] or v["id"] in key[1] or (premium_only and not v["is_premium"]):
+                    continue
+                group = (v["name"], v["lang"])
+                if group not in seen:
+                    seen.add(group)
+                    result.append(v)
+            if len(self._visible) >= 16:
+                self._visible.clear()
+            # Labels are unique within one result, so each resolves to the variant actually shown
+            memo = self._visible[key] = (result, {v["display"]: v for v in result})
+        return memo[0]
+
+    def to_dict(self) -> dict:
+        return {"version": CATALOG_VERSION, "signature": self.signature, "digest": self.digest,
+                "built": self.built, "voices": self.raw}
+
+    def save(self, path: str):
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path + ".tmp", "w") as f:
+                json.dump(self.to_dict(), f)
+            os.replace(path + ".tmp", path)
+        except OSError as e:
+            print(f"Saving voice catalog failed: {e}")
+
+    @classmethod
+    def load(cls, path: str):
+        """Reads a saved catalog; None if missing, unreadable or from another version."""
+        try:
+            with open(path, "r") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if data.get("version") != CATALOG_VERSION:
+            return None
+        return cls(data["voices"], data.get("signature"), data.get("digest"), data.get("built"))
+
+
+def default_catalog_path(backend: str = "default") -> str:
+    """One catalog file per speech backend, so a test backend never replaces the system voices."""
+    return os.path.join(CACHE_DIR, f"voices-{backend.lower()}.json")
+
+
+def load_catalog(enumerate_voices, signature: str = None, path: str = None, refresh: bool = False) -> VoiceCatalog:
+    """Returns the saved catalog while `signature` still matches it, else enumerates and saves a new one.
+
+    `signature` is a cheap fingerprint of the installed voices (None when the
+    backend has none). Without one, or when the saved catalog is stale, the
+    voices are enumerated; if they turn out unchanged the saved catalog is
+    kept and only its timestamp is renewed.
+    """
+    path = path or default_catalog_path()
+    cached = None if refresh else VoiceCatalog.load(path)
+    if cached and signature is not None and cached.signature == signature and time.time() - cached.built < MAX_AGE:
+        return cached
+    raw = [dict(v) for v in enumerate_voices()]
+    digest = voices_digest(raw)
+    if cached and cached.digest == digest:
+        cached.signature, cached.built = signature, time.time()
+        cached.save(path)
+        return cached
+    catalog = VoiceCatalog(raw, signature, digest)
+    catalog.save(path)
+    return catalog